@@ -0,0 +1,75 @@
+"""Compare request throughput of ``async def`` handlers using the sync
+``SessionLocal`` against handlers using the async ``AsyncSessionLocal``.
+
+Each request runs ``SELECT pg_sleep(<delay>)`` to simulate DB latency. With the
+sync session the query blocks the event loop, so concurrent requests are
+served one after another; with the async session they overlap.
+
+Usage::
+
+    $ python benchmarks/db_concurrency.py --requests 200 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+
+from pictures2pages_v2.app.api.auth import get_async_db
+from pictures2pages_v2.app.db.session import session_scope
+
+QUERY = text("SELECT pg_sleep(:delay)")
+
+
+def build_app(delay: float) -> FastAPI:
+    """Build a minimal app with one endpoint per session type."""
+    app = FastAPI()
+
+    @app.get("/sync-session")
+    async def sync_session():
+        with session_scope() as db:
+            db.execute(QUERY, {"delay": delay})
+        return {}
+
+    @app.get("/async-session")
+    async def async_session(db=Depends(get_async_db)):
+        await db.execute(QUERY, {"delay": delay})
+        return {}
+
+    return app
+
+
+async def run(app: FastAPI, path: str, requests: int, concurrency: int) -> float:
+    """Send ``requests`` requests to ``path`` and return requests per second."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+
+        async def one():
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    app = build_app(args.delay)
+    for label, path in (("before", "/sync-session"), ("after", "/async-session")):
+        rps = asyncio.run(run(app, path, args.requests, args.concurrency))
+        print(f"{label:<7} {path:<15} {rps:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
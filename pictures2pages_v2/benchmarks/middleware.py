@@ -0,0 +1,164 @@
+"""Compare the per request overhead of the request timing middleware, as a
+``BaseHTTPMiddleware`` with a ``log_time`` dispatch function (before) and as
+the pure ASGI ``LogTimeMiddleware`` (after), and of the ``MetricsMiddleware``
+added inside it (metrics).
+
+A minimal app with a JSON endpoint and a streamed endpoint is wrapped in each
+variant, and in no middleware at all as the baseline. The requests are sent
+in-process through httpx, so only the middleware stack is measured. For the
+streamed endpoint, which sends a chunk every ``--chunk-delay`` seconds, the
+time to the first chunk is reported as well.
+
+Usage::
+
+    $ python benchmarks/middleware.py --requests 5000
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from pictures2pages_v2.app.configs import get_settings
+from pictures2pages_v2.app.middlewares import LogTimeMiddleware, MetricsMiddleware
+from pictures2pages_v2.app.utils.logging import (
+    get_request_msg_args,
+    request_msg_format,
+)
+
+logger = logging.getLogger(get_settings().PROJECT_SLUG)
+
+
+async def log_time(request: Request, call_next):
+    """The previous ``BaseHTTPMiddleware`` dispatch function."""
+    start_time = time.time()
+    response = await call_next(request)
+    process_time = (time.time() - start_time) * 1000
+    args = get_request_msg_args(request, response.status_code, process_time)
+    logger.info(request_msg_format, *args)
+    return response
+
+
+def build_app(variant: str, chunks: int, chunk_delay: float) -> FastAPI:
+    """Build the app wrapped in the middleware of the given variant."""
+    app = FastAPI()
+
+    @app.get("/json")
+    async def json():
+        return {"status": "ok"}
+
+    @app.get("/stream")
+    async def stream():
+        async def body():
+            for _ in range(chunks):
+                yield b"x" * 64
+                await asyncio.sleep(chunk_delay)
+
+        return StreamingResponse(body())
+
+    if variant == "before":
+        app.add_middleware(BaseHTTPMiddleware, dispatch=log_time)
+    elif variant == "after":
+        app.add_middleware(LogTimeMiddleware)
+    elif variant == "metrics":
+        app.add_middleware(MetricsMiddleware)
+        app.add_middleware(LogTimeMiddleware)
+    return app
+
+
+async def throughput(app: FastAPI, path: str, requests: int, concurrency: int):
+    """Send ``requests`` requests to ``path`` and return requests per second."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+
+        async def one():
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return requests / (time.perf_counter() - start)
+
+
+async def first_chunk(app: FastAPI, requests: int) -> float:
+    """Get the median time in ms to the first chunk of the streamed endpoint.
+
+    The app is called directly, since the httpx transport buffers the whole
+    response before returning it."""
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("bench", 80),
+        "path": "/stream",
+        "raw_path": b"/stream",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("bench", 50000),
+    }
+    timings = []
+    for _ in range(requests):
+        done = asyncio.Event()
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+        first = None
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal first
+            if message["type"] == "http.response.body":
+                if first is None:
+                    first = time.perf_counter()
+                if not message.get("more_body", False):
+                    done.set()
+
+        start = time.perf_counter()
+        await app(scope, receive, send)
+        timings.append(first - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=10)
+    parser.add_argument("--chunk-delay", type=float, default=0.005)
+    args = parser.parse_args()
+    # measure the middleware, not the log handler
+    logger.disabled = True
+
+    for variant in ("none", "before", "after", "metrics"):
+        app = build_app(variant, args.chunks, args.chunk_delay)
+        # warm up, then take the best of three runs
+        asyncio.run(throughput(app, "/json", args.requests // 10, args.concurrency))
+        json_rps = max(
+            asyncio.run(throughput(app, "/json", args.requests, args.concurrency))
+            for _ in range(3)
+        )
+        stream_rps = asyncio.run(
+            throughput(app, "/stream", args.requests // 10, args.concurrency)
+        )
+        ttfb = asyncio.run(first_chunk(app, 50))
+        print(
+            f"{variant:<7} /json {json_rps:8.1f} req/s  "
+            f"/stream {stream_rps:7.1f} req/s  first chunk {ttfb:6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Measure the latency of the full text search at a large number of rows.
+
+The rows are generated inside postgres, in a scratch schema which is dropped
+afterwards, so the tables of the service are not touched. Each term is searched
+with the ranked tsvector query of ``/search`` (after) and with the equivalent
+``ILIKE`` filter over the text columns (before).
+
+Usage::
+
+    $ python benchmarks/search.py --rows 1000000 --repeat 20
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import or_, select, text
+
+from pictures2pages_v2.app.db.base import Base
+from pictures2pages_v2.app.db.models import GeneratedContent
+from pictures2pages_v2.app.db.queries.search import search_content
+from pictures2pages_v2.app.db.session import engine
+
+SCHEMA = "bench_search"
+WORDS = (
+    "dragon castle forest river moon star ocean storm garden mountain "
+    "winter summer candle mirror lantern whisper shadow meadow harbor valley"
+).split()
+# (term, description)
+TERMS = [
+    ("dragon", "common"),
+    ("lantern whisper", "two terms"),
+    ('"castle dragon"', "phrase"),
+    ("zeppelin", "no match"),
+]
+
+POPULATE = text(f"""
+    INSERT INTO users (id, username, email, hashed_password)
+    SELECT i, 'user' || i, 'user' || i || '@example.com', 'x'
+    FROM generate_series(1, 1000) AS i;
+
+    INSERT INTO generated_content (content, title, theme, is_public, created_at,
+        image_url_1, image_url_2, image_url_3, caption_1, caption_2, caption_3,
+        owner_id, is_story)
+    SELECT
+        (SELECT string_agg(w[1 + ((i::bigint * k * 7919) % {len(WORDS)})], ' ')
+         FROM generate_series(1, 60) AS k),
+        w[1 + i % {len(WORDS)}] || ' ' || w[1 + (i / 7) % {len(WORDS)}],
+        w[1 + (i / 13) % {len(WORDS)}],
+        i % 2 = 0,
+        now() - i * interval '1 second',
+        'u1', 'u2', 'u3',
+        '[''Dog'']', '[''Cat'']', '[''Tree'']',
+        1 + i % 1000,
+        true
+    FROM generate_series(1, :rows) AS i,
+         (SELECT ARRAY[{", ".join(f"'{w}'" for w in WORDS)}]) AS words(w);
+    """)
+
+
+def like_statement(term: str, user_id: int, limit: int):
+    """The search without the tsvector: a substring filter, newest first."""
+    pattern = f"%{term.strip(chr(34))}%"
+    columns = [GeneratedContent.title, GeneratedContent.content]
+    columns += [GeneratedContent.theme, GeneratedContent.caption_1]
+    return (
+        select(GeneratedContent.id, GeneratedContent.title)
+        .where(
+            or_(*(column.ilike(pattern) for column in columns)),
+            or_(
+                GeneratedContent.is_public.is_(True),
+                GeneratedContent.owner_id == user_id,
+            ),
+        )
+        .order_by(GeneratedContent.created_at.desc(), GeneratedContent.id.desc())
+        .limit(limit + 1)
+    )
+
+
+def measure(connection, statement, repeat: int) -> tuple:
+    """Run the statement ``repeat`` times and return the p50 and p95 in ms."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        connection.execute(statement).all()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with engine.connect() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"SET search_path TO {SCHEMA}"))
+        try:
+            Base.metadata.create_all(connection)
+            connection.commit()
+            start = time.perf_counter()
+            connection.execute(POPULATE, {"rows": args.rows})
+            connection.execute(text("ANALYZE"))
+            connection.commit()
+            print(f"populated {args.rows} rows in {time.perf_counter() - start:.0f}s")
+
+            for term, description in TERMS:
+                for label, statement in (
+                    ("before", like_statement(term, 1, args.limit)),
+                    ("after", search_content(term, 1, None, args.limit)),
+                ):
+                    p50, p95 = measure(connection, statement, args.repeat)
+                    print(
+                        f"{label:<7} {description:<10} {term:<18} "
+                        f"p50 {p50:8.1f} ms  p95 {p95:8.1f} ms"
+                    )
+        finally:
+            connection.rollback()
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            connection.commit()
+
+
+if __name__ == "__main__":
+    main()
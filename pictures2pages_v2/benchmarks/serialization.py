@@ -0,0 +1,108 @@
+"""Compare the per item cost of serializing the pages of the listings, with
+page models validated by FastAPI and encoded with the stdlib json (before) and
+with the ``FAST_JSON`` path of ``page_response`` (after).
+
+Pages of in-memory ORM objects are serialized as an endpoint returning them
+would, for ``GeneratedContentPage`` and ``ImagePage``: building the page model
+from the rows, the validation against the response model and the encoding of
+FastAPI before, reading the rows into dicts and encoding them with orjson (or
+the stdlib json if it is not installed) after.
+
+Usage::
+
+    $ python benchmarks/serialization.py --items 100 --repeat 200
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from pictures2pages_v2.app.db.models import GeneratedContent, Image
+from pictures2pages_v2.app.schemas.base import GeneratedContentPage, ImagePage
+from pictures2pages_v2.app.utils import serialization
+
+
+def build_rows(schema: str, items: int) -> list:
+    """Build the ORM objects of a page."""
+    now = datetime.utcnow()
+    if schema == "image":
+        return [
+            Image(
+                id=i,
+                url=f"https://pictures-to-pages-bucket.s3.amazonaws.com/{i}.jpg",
+                is_public=True,
+                created_at=now - timedelta(minutes=i),
+                owner_id=1,
+            )
+            for i in range(items)
+        ]
+    return [
+        GeneratedContent(
+            id=i,
+            content="Once upon a time, a dog and a cat looked at a tree. " * 12,
+            title=f"The dog, the cat and the tree {i}",
+            theme="friendship",
+            is_story=True,
+            is_public=True,
+            created_at=now - timedelta(minutes=i),
+            image_url_1=f"https://pictures-to-pages-bucket.s3.amazonaws.com/{i}-1.jpg",
+            image_url_2=f"https://pictures-to-pages-bucket.s3.amazonaws.com/{i}-2.jpg",
+            image_url_3=f"https://pictures-to-pages-bucket.s3.amazonaws.com/{i}-3.jpg",
+            caption_1="['Dog', 'Pet', 'Animal']",
+            caption_2="['Cat', 'Pet']",
+            caption_3="['Tree', 'Plant']",
+            owner_id=1,
+        )
+        for i in range(items)
+    ]
+
+
+async def before(page_model, field, rows) -> bytes:
+    page = page_model(items=rows, next_cursor="cursor")
+    content = await serialize_response(field=field, response_content=page)
+    return JSONResponse(content).body
+
+
+async def after(page_model, field, rows) -> bytes:
+    return serialization.page_response(page_model, rows, "cursor").body
+
+
+async def measure(variant, page_model, rows, repeat: int) -> float:
+    """Get the best time in µs per item of serializing a page."""
+    field = create_response_field(name="Response", type_=page_model)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await variant(page_model, field, rows)
+        timings.append(time.perf_counter() - start)
+    return min(timings) / len(rows) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    serialization.settings.FAST_JSON = True
+    encoder = "orjson" if serialization.orjson is not None else "json"
+
+    for schema, page_model in (
+        ("content", GeneratedContentPage),
+        ("image", ImagePage),
+    ):
+        rows = build_rows(schema, args.items)
+        slow = asyncio.run(measure(before, page_model, rows, args.repeat))
+        fast = asyncio.run(measure(after, page_model, rows, args.repeat))
+        print(
+            f"{page_model.__name__:<21} before {slow:7.1f} µs/item  "
+            f"after ({encoder}) {fast:6.1f} µs/item  {slow / fast:4.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Measure the cold start of a worker: the time from a fresh python process to
+the application having run its startup events.
+
+Each run starts a new process, like a worker of the process manager. The
+"before" variant creates the tables on start, as ``create_application`` did;
+the "after" variant is the current application, which does not touch the DB.
+Besides the time of each phase, the number of statements sent to the DB is
+reported, each of them is a round trip to a possibly remote database.
+
+Usage::
+
+    $ python benchmarks/startup.py --runs 10
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+WORKER = """
+import json, time
+timings, start = {{}}, time.perf_counter()
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from pictures2pages_v2.app.application import create_application
+from pictures2pages_v2.app.db import Base, engine
+timings["import"] = time.perf_counter() - start
+statements = []
+event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+app = create_application()
+if {create_tables}:
+    Base.metadata.create_all(engine)
+timings["create"] = time.perf_counter() - start - timings["import"]
+with TestClient(app):
+    timings["total"] = time.perf_counter() - start
+print("startup", json.dumps(dict(timings, statements=len(statements))))
+"""
+
+
+def cold_start(create_tables: bool) -> dict:
+    """Start a worker process and return its startup timings in seconds."""
+    output = subprocess.run(
+        [sys.executable, "-c", WORKER.format(create_tables=create_tables)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    # the application logs to stdout as well
+    (line,) = (line for line in output.splitlines() if line.startswith("startup "))
+    return json.loads(line.split(" ", 1)[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for label, create_tables in (("before", True), ("after", False)):
+        runs = [cold_start(create_tables) for _ in range(args.runs)]
+        median = {
+            key: statistics.median(run[key] * 1000 for run in runs)
+            for key in ("import", "create", "total")
+        }
+        print(
+            f"{label:<7} import {median['import']:7.1f} ms  "
+            f"create app {median['create']:6.1f} ms  "
+            f"total {median['total']:7.1f} ms  "
+            f"DB statements {runs[0]['statements']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
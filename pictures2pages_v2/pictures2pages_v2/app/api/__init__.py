@@ -3,9 +3,11 @@ module inside the API folder"""
 
 from fastapi import APIRouter
 from .base import router
+from .internal import router as internal_router
 
 # TODO: import your modules here.
 
 api_router = APIRouter()
 api_router.include_router(router, tags=["base"])
+api_router.include_router(internal_router, tags=["internal"])
 # TODO: include the routers from other modules
@@ -1,13 +1,19 @@
+import math
 from datetime import datetime, timedelta
+from functools import lru_cache, partial
 from typing import Optional
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Cookie, Depends, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..db.session import SessionLocal
+from ..configs import get_settings
+from ..db.replica import PIN_COOKIE, pins
+from ..db.session import SessionLocal, AsyncSessionLocal, ReplicaSessionLocal
 from ..db.models.user import User
 import os
 from dotenv import load_dotenv
@@ -30,7 +36,15 @@ fake_users_db = {
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache()
+def get_pwd_context():
+    # passlib and bcrypt are imported on the first password check, not at import
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login")
 
 
@@ -42,29 +56,59 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_token_subject(token: str) -> Optional[str]:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+    return payload.get("sub")
+
+
+async def get_async_read_db(
+    token: str = Depends(oauth2_scheme),
+    primary_pin: Optional[str] = Cookie(
+        None, alias=PIN_COOKIE, include_in_schema=False
+    ),
+):
+    # users who wrote recently read from the primary to see their own writes
+    if pins.is_pinned(get_token_subject(token), primary_pin):
+        session_factory = AsyncSessionLocal
+    else:
+        session_factory = ReplicaSessionLocal
+    async with session_factory() as db:
+        yield db
+
+
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
-def get_user(db, username: str):
-    return db.query(User).filter(User.username == username).first()
+async def get_user(db: AsyncSession, username: str):
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
 
 
-def authenticate_user(db, username: str, password: str):
-    user = get_user(db, username)
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_user(db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    # bcrypt is slow on purpose, keep it off the event loop
+    if not await run_in_threadpool(verify_password, password, user.hashed_password):
         return False
     return user
 
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -78,23 +122,48 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-):
+async def _get_user_from_token(token: str, db: AsyncSession):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except jwt.PyJWTError:
+    username = get_token_subject(token)
+    if username is None:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == username).first()
+    user = await get_user(db, username)
     if user is None:
         raise credentials_exception
     return user
+
+
+def set_pin_cookie(response: Response, pin: str) -> None:
+    """Set the cookie pinning the user of a response to the primary."""
+    response.set_cookie(
+        PIN_COOKIE,
+        pin,
+        max_age=math.ceil(get_settings().DB_READ_YOUR_WRITES_SECONDS),
+        httponly=True,
+        samesite="lax",
+    )
+
+
+async def get_current_user(
+    response: Response,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+):
+    user = await _get_user_from_token(token, db)
+    # writes committed in this session pin the user to the primary
+    db.info["username"] = user.username
+    db.info["on_pin"] = partial(set_pin_cookie, response)
+    return user
+
+
+async def get_current_reader(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get the current user for read-only endpoints, from the read replica
+    unless the user wrote recently."""
+    return await _get_user_from_token(token, db)
@@ -3,28 +3,40 @@ Endpoints for Pictures2Pages app.
 Handles user registration, login, image upload, AI story/poem creation, visibility updates, content browsing, and deletion.
 """
 
+import logging
 import os
 import uuid
-import boto3
 from fastapi import File, UploadFile, HTTPException, Depends, Form, Query
+from fastapi import Request, Response
 from fastapi.responses import JSONResponse
 from typing import Any, List
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..db.base import Base
-from ..db.session import engine
 from .auth import (
     get_db,
+    get_async_db,
+    get_async_read_db,
     create_access_token,
     get_current_user,
+    get_current_reader,
     hash_password,
     authenticate_user,
 )
+from .cache import cache_listing, get_cached_listing, invalidate_public_listings
+from .conditional import check_not_modified
+from .deadline import Deadline, get_deadline
 from ..db.models.user import User
 from typing import Optional
 from ..db.models.image import Image
 from ..db.models.contents import GeneratedContent
+from ..db.models.feed import PublicFeedItem
+from ..db.models.labels import ContentLabel, ImageLabel, Label
+from ..db.models.stats import UserStats
 
 
 from datetime import timedelta
@@ -34,19 +46,43 @@ import jwt
 from fastapi import Depends, FastAPI, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jwt.exceptions import InvalidTokenError
-from passlib.context import CryptContext
 from pydantic import BaseModel
 
 from ..schemas.base import (
     VersionResponse,
     ImageResponse,
+    ImagePage,
     UserCreate,
     GeneratedContentResponse,
+    GeneratedContentPage,
+    GeneratedContentSummaryPage,
+    FeedPage,
+    SearchPage,
     Token,
+    BulkVisibilityRequest,
+    BulkDeleteRequest,
+    BulkResponse,
+    UserStatsResponse,
 )
+from ..constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..db.queries.contents import delete_contents, set_contents_visibility
+from ..db.queries.feed import publish_to_feed, sync_feed
+from ..db.queries.labels import (
+    get_stored_image_labels,
+    store_content_labels,
+    store_image_labels,
+)
+from ..db.queries.pagination import paginate, build_page
+from ..db.queries.stats import update_user_stats
+from ..db.queries.search import search_content, build_search_page
+from ..configs import get_settings
+from ..utils.errors import InvalidCursorError
+from ..utils.tracing import span
+from ..utils.serialization import page_response
+from ..services.clients import S3_REGION, get_s3_client, observe_call
 from ..services.generate_content import (
     generate_content_from_image_labels,
-    get_caption_for_image,
+    detect_labels,
     extract_s3_filename,
 )
 from ..version import __version__
@@ -55,20 +91,20 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(get_settings().PROJECT_SLUG)
+
 # Set up AWS S3
 S3_BUCKET_NAME = "pictures-to-pages-bucket"
-S3_REGION = "eu-west-2"  # e.g., us-east-1
-AWS_KEY_ID = os.getenv("AWS_KEY_ID")
-AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
-
-s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=AWS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=S3_REGION,
-)
+# the S3 client is constructed on the first upload, see services.clients
+
+
+def upload_to_s3(fileobj: Any, key: str, content_type: Optional[str]) -> None:
+    """Upload a file to the bucket of the images, timed as an external call."""
+    with observe_call("s3", "upload_fileobj"):
+        get_s3_client().upload_fileobj(
+            fileobj, S3_BUCKET_NAME, key, ExtraArgs={"ContentType": content_type}
+        )
 
-Base.metadata.create_all(bind=engine)
 
 # Initialize router
 router = APIRouter()
@@ -83,24 +119,38 @@ async def get_version() -> Any:
 
 
 @router.post("/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Username already registered")
-    hashed_pw = hash_password(user.password)
-    new_user = User(username=user.username, email=user.email, hashed_password=hashed_pw)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Register a new user with a unique username and email.
+    The unique constraints detect duplicates, also of concurrent registrations.
+    """
+    # hashing is slow by design, keep it off the event loop
+    hashed_pw = await run_in_threadpool(hash_password, user.password)
+    statement = (
+        pg_insert(User)
+        .values(username=user.username, email=user.email, hashed_password=hashed_pw)
+        .on_conflict_do_nothing()
+        .returning(User.id)
+    )
+    if await db.scalar(statement) is None:
+        # only on a conflict, find out which of the unique values is taken
+        taken = await db.scalar(
+            select(User.username).where(User.username == user.username).limit(1)
+        )
+        await db.rollback()
+        if taken:
+            raise HTTPException(status_code=400, detail="Username already registered")
+        raise HTTPException(status_code=409, detail="Email already registered")
+    await db.commit()
     return {"msg": "User registered"}
 
 
 @router.post("/login")
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> Token:
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -115,34 +165,52 @@ async def login_for_access_token(
 
 
 @router.get("/user/me")
-def read_users_me(current_user: User = Depends(get_current_user)):
+def read_users_me(current_user: User = Depends(get_current_reader)):
     return {"username": current_user.username}
 
 
+@router.get("/user/me/stats", response_model=UserStatsResponse)
+async def read_users_me_stats(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_reader),
+) -> Any:
+    """
+    Get the numbers of your images, stories, poems and public items.
+    Reads the counters kept up to date on every change. Requires authentication.
+    """
+    stats = await db.get(UserStats, current_user.id)
+    if stats is None:
+        return UserStatsResponse()
+    return stats
+
+
 @router.post("/upload-image", response_model=ImageResponse)
 async def upload_image(
     file: UploadFile = File(...),
     description: Optional[str] = Form(None),
     is_public: bool = Form(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    deadline: Deadline = Depends(get_deadline),
 ) -> Any:
     """
     Upload an image to S3 and return its metadata.
+    The upload is given up on when the deadline of the request passes or the
+    client disconnects.
     """
     try:
 
         # Generate a unique file name
         file_extension = file.filename.split(".")[-1]
         unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        print(f"Unique file name for uploaded file: {unique_filename}")
+        logger.debug("Uploading %s as %s", file.filename, unique_filename)
 
         # Upload to S3
-        s3_client.upload_fileobj(
+        await deadline.run(
+            upload_to_s3,
             file.file,
-            S3_BUCKET_NAME,
             unique_filename,
-            ExtraArgs={"ContentType": file.content_type},
+            file.content_type,
         )
 
         # Build the image URL
@@ -150,16 +218,22 @@ async def upload_image(
             f"https://{S3_BUCKET_NAME}.s3.{S3_REGION}.amazonaws.com/{unique_filename}"
         )
 
-        # Save to DB
-        image = Image(
-            url=image_url,
-            description=description,
-            is_public=is_public,
-            owner_id=current_user.id,
+        # Save to DB, getting the generated columns back in the same round trip
+        await deadline.check()
+        image = await db.scalar(
+            insert(Image)
+            .values(
+                url=image_url,
+                description=description,
+                is_public=is_public,
+                owner_id=current_user.id,
+            )
+            .returning(Image)
         )
-        db.add(image)
-        db.commit()
-        db.refresh(image)
+        await update_user_stats(
+            db, current_user.id, images=1, public_images=int(is_public)
+        )
+        await db.commit()
 
         return ImageResponse(
             id=image.id,
@@ -170,25 +244,58 @@ async def upload_image(
             owner_id=image.owner_id,
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image upload failed: {str(e)}")
 
 
-@router.get("/images", response_model=List[ImageResponse])
-def list_user_images(
-    skip: int = 0,
-    limit: int = 10,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+@router.get("/images", response_model=ImagePage)
+async def list_user_images(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor of the next page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_reader),
 ):
-    images = (
-        db.query(Image)
-        .filter(Image.owner_id == current_user.id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
-    return images
+    """
+    List your own images, newest first, one page at a time.
+    Supports conditional requests with If-None-Match. Requires authentication.
+    """
+    not_modified = await check_not_modified(request, response, db, current_user.id)
+    if not_modified is not None:
+        return not_modified
+    statement = select(Image).where(Image.owner_id == current_user.id)
+    try:
+        statement = paginate(statement, Image, cursor, limit)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    result = await db.execute(statement)
+    items, next_cursor = build_page(result.scalars().all(), limit)
+    return page_response(ImagePage, items, next_cursor, response)
+
+
+async def get_image_labels(
+    db: AsyncSession, image_url: str, owner_id: int, deadline: Deadline
+) -> List[str]:
+    """
+    Get the labels of an image, from the DB if they were detected before,
+    otherwise from Rekognition, storing them for an uploaded image.
+    """
+    with span("stored_labels"):
+        labels = await get_stored_image_labels(db, image_url, owner_id)
+    if labels is not None:
+        logger.debug("Reusing stored labels for %s", image_url)
+        return labels
+    with span("extract_key"):
+        key = extract_s3_filename(image_url)
+    logger.debug("Detecting labels of %s", key)
+    with span("detect_labels"):
+        detected = await deadline.run(detect_labels, key, S3_BUCKET_NAME)
+    with span("store_labels"):
+        await store_image_labels(db, image_url, owner_id, detected)
+    return [name for name, _ in detected]
 
 
 @router.post("/generate-content", response_model=GeneratedContentResponse)
@@ -198,64 +305,92 @@ async def generate_content(
     image_url_3: str = Form(...),
     theme: Optional[str] = Form(None),
     is_story: bool = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
+    deadline: Deadline = Depends(get_deadline),
 ) -> Any:
     """
     Generate a story or poem from images, save it, and return it.
+    The Rekognition and OpenAI calls are given up on, and nothing is saved,
+    when the deadline of the request passes or the client disconnects.
     """
     try:
-        # 🔍 Extract filenames from image URLs
-        key_1 = extract_s3_filename(image_url_1)
-        key_2 = extract_s3_filename(image_url_2)
-        key_3 = extract_s3_filename(image_url_3)
-
-        # 🧠 Generate captions
-        caption_1 = get_caption_for_image(key_1, S3_BUCKET_NAME)
-        caption_2 = get_caption_for_image(key_2, S3_BUCKET_NAME)
-        caption_3 = get_caption_for_image(key_3, S3_BUCKET_NAME)
-        print(f"Key 1: {key_1}")
-        print(f"Key 2: {key_2}")
-        print(f"Key 3: {key_3}")
-
-        print(f"Caption 1: {caption_1}")
-        print(f"Caption 2: {caption_2}")
-        print(f"Caption 3: {caption_3}")
+        # 🧠 Generate captions, reusing the labels stored for uploaded images
+        with span("caption_1"):
+            caption_1 = await get_image_labels(
+                db, image_url_1, current_user.id, deadline
+            )
+        with span("caption_2"):
+            caption_2 = await get_image_labels(
+                db, image_url_2, current_user.id, deadline
+            )
+        with span("caption_3"):
+            caption_3 = await get_image_labels(
+                db, image_url_3, current_user.id, deadline
+            )
+
+        logger.debug("Captions: %s, %s, %s", caption_1, caption_2, caption_3)
 
         if is_story:
             content_type = "story"
         else:
             content_type = "poem"
 
-        # ✨ Generate content using AI
-        result = generate_content_from_image_labels(
-            caption_1, caption_2, caption_3, theme=theme, content_type=content_type
-        )
-        print(f"Generated {content_type} result: {result}")
-
-        # 🗂️ Save to database
-        new_content = GeneratedContent(
-            image_url_1=image_url_1,
-            image_url_2=image_url_2,
-            image_url_3=image_url_3,
-            caption_1=caption_1,
-            caption_2=caption_2,
-            caption_3=caption_3,
-            title=result["title"],
-            content=result[content_type],
-            theme=theme,
-            is_story=is_story,
-            owner_id=current_user.id,
-        )
-        db.add(new_content)
-        db.commit()
-        db.refresh(new_content)
-        print(f"Generated content saved to DB: {new_content.title}")
+        # ✨ Generate content using AI, timed by stage in the thread
+        with span("generate"):
+            result = await deadline.run(
+                generate_content_from_image_labels,
+                caption_1,
+                caption_2,
+                caption_3,
+                theme=theme,
+                content_type=content_type,
+                timeout=deadline.remaining(),
+            )
+        logger.debug("Generated %s: %s", content_type, result)
+
+        # 🗂️ Save to database, unless the client gave up
+        await deadline.check()
+        with span("persist"):
+            new_content = await db.scalar(
+                insert(GeneratedContent)
+                .values(
+                    image_url_1=image_url_1,
+                    image_url_2=image_url_2,
+                    image_url_3=image_url_3,
+                    caption_1=str(caption_1),
+                    caption_2=str(caption_2),
+                    caption_3=str(caption_3),
+                    title=result["title"],
+                    content=result[content_type],
+                    theme=theme,
+                    is_story=is_story,
+                    owner_id=current_user.id,
+                )
+                .returning(GeneratedContent)
+            )
+            await store_content_labels(
+                db, new_content.id, [*caption_1, *caption_2, *caption_3]
+            )
+            if new_content.is_public:
+                await publish_to_feed(db, new_content, current_user)
+            await update_user_stats(
+                db,
+                current_user.id,
+                stories=int(is_story),
+                poems=int(not is_story),
+                public_contents=int(bool(new_content.is_public)),
+            )
+            await db.commit()
+            await invalidate_public_listings(db)
+        logger.debug("Generated content %s saved", new_content.id)
 
         return GeneratedContentResponse.from_orm(new_content)
 
-    except Exception as e:
-        print(f"❌ Error generating content: {e}")
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Generating content failed")
         raise HTTPException(status_code=500, detail="Failed to generate content")
 
 
@@ -263,7 +398,7 @@ async def generate_content(
 async def set_visibility(
     content_id: int = Query(..., description="ID of the content to update"),
     is_public: bool = Query(..., description="New visibility status"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ) -> Any:
     """
@@ -271,9 +406,7 @@ async def set_visibility(
     Only the content owner can update visibility.
     Requires authentication.
     """
-    content = (
-        db.query(GeneratedContent).filter(GeneratedContent.id == content_id).first()
-    )
+    content = await db.get(GeneratedContent, content_id)
 
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
@@ -283,37 +416,247 @@ async def set_visibility(
             status_code=403, detail="Not authorized to modify this content"
         )
 
+    was_public = bool(content.is_public)
     content.is_public = is_public
-    db.commit()
-    db.refresh(content)
+    await sync_feed(db, content, current_user)
+    await db.flush()
+    if was_public != is_public:
+        await update_user_stats(
+            db, current_user.id, public_contents=1 if is_public else -1
+        )
+    await db.commit()
+    await invalidate_public_listings(db)
+    await db.refresh(content)
 
     return {"message": f"Visibility updated for item {content_id} to {is_public}"}
 
 
-@router.get("/view-content", response_model=List[GeneratedContentResponse])
+def _bulk_response(ids: List[int], affected: List[int]) -> BulkResponse:
+    affected_ids = set(affected)
+    return BulkResponse(
+        affected=sorted(affected_ids),
+        not_affected=sorted(set(ids) - affected_ids),
+    )
+
+
+@router.patch("/set-visibility/bulk", response_model=BulkResponse)
+async def set_visibility_bulk(
+    request: BulkVisibilityRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Set the visibility of many of your stories or poems in one request.
+    Reports the changed ids, and the ids which do not exist or are not yours.
+    Requires authentication.
+    """
+    affected = await set_contents_visibility(
+        db, request.ids, request.is_public, current_user
+    )
+    await db.commit()
+    await invalidate_public_listings(db)
+    return _bulk_response(request.ids, affected)
+
+
+@router.get("/view-content", response_model=GeneratedContentPage)
 async def view_content(
+    request: Request,
+    response: Response,
+    user_id: int = Query(..., description="User ID to filter public content by"),
+    cursor: Optional[str] = Query(None, description="Cursor of the next page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_reader),  # 👈 authentication check
+) -> Any:
+    """
+    View public content (stories or poems) generated by a specific user,
+    newest first, one page at a time.
+    Only returns content marked as public. The pages are cached until the
+    user's public content changes. Supports conditional requests with
+    If-None-Match. Requires authentication.
+    """
+    not_modified = await check_not_modified(request, response, db, user_id)
+    if not_modified is not None:
+        return not_modified
+    key, cached = await get_cached_listing(request, response, user_id)
+    if cached is not None:
+        return cached
+    statement = select(GeneratedContent).where(
+        GeneratedContent.owner_id == user_id, GeneratedContent.is_public
+    )
+    try:
+        statement = paginate(statement, GeneratedContent, cursor, limit)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    result = await db.execute(statement)
+    items, next_cursor = build_page(result.scalars().all(), limit)
+    page = page_response(GeneratedContentPage, items, next_cursor, response)
+    return await cache_listing(key, response, page)
+
+
+@router.get("/view-content/summary", response_model=GeneratedContentSummaryPage)
+async def view_content_summary(
+    request: Request,
+    response: Response,
     user_id: int = Query(..., description="User ID to filter public content by"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),  # 👈 authentication check
+    cursor: Optional[str] = Query(None, description="Cursor of the next page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_reader),
+) -> Any:
+    """
+    List summaries of the public content of a specific user, newest first.
+    Only the columns shown in a list are loaded, the full item is fetched
+    from /content/{content_id}. The pages are cached until the user's public
+    content changes. Supports conditional requests with If-None-Match.
+    Requires authentication.
+    """
+    not_modified = await check_not_modified(request, response, db, user_id)
+    if not_modified is not None:
+        return not_modified
+    key, cached = await get_cached_listing(request, response, user_id)
+    if cached is not None:
+        return cached
+    statement = select(
+        GeneratedContent.id,
+        GeneratedContent.title,
+        GeneratedContent.created_at,
+        GeneratedContent.is_story,
+        GeneratedContent.image_url_1.label("thumbnail"),
+    ).where(GeneratedContent.owner_id == user_id, GeneratedContent.is_public)
+    try:
+        statement = paginate(statement, GeneratedContent, cursor, limit)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    result = await db.execute(statement)
+    items, next_cursor = build_page(result.all(), limit)
+    page = page_response(GeneratedContentSummaryPage, items, next_cursor, response)
+    return await cache_listing(key, response, page)
+
+
+@router.get("/feed", response_model=FeedPage)
+async def view_feed(
+    cursor: Optional[str] = Query(None, description="Cursor of the next page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_reader),
+) -> Any:
+    """
+    List the latest public content of all users, newest first.
+    Served from the precomputed feed table. Requires authentication.
+    """
+    try:
+        statement = paginate(select(PublicFeedItem), PublicFeedItem, cursor, limit)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    result = await db.execute(statement)
+    items, next_cursor = build_page(result.scalars().all(), limit)
+    return page_response(FeedPage, items, next_cursor)
+
+
+@router.get("/labels/{label}/images", response_model=ImagePage)
+async def list_user_images_by_label(
+    label: str,
+    cursor: Optional[str] = Query(None, description="Cursor of the next page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_reader),
+) -> Any:
+    """
+    List your own images with a detected label (e.g. "Dog"), newest first.
+    Requires authentication.
+    """
+    statement = (
+        select(Image)
+        .join(ImageLabel, ImageLabel.image_id == Image.id)
+        .join(Label, Label.id == ImageLabel.label_id)
+        .where(Label.name == label, Image.owner_id == current_user.id)
+    )
+    try:
+        statement = paginate(statement, Image, cursor, limit)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    result = await db.execute(statement)
+    items, next_cursor = build_page(result.scalars().all(), limit)
+    return page_response(ImagePage, items, next_cursor)
+
+
+@router.get("/labels/{label}/content", response_model=GeneratedContentSummaryPage)
+async def view_content_by_label(
+    label: str,
+    cursor: Optional[str] = Query(None, description="Cursor of the next page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_reader),
 ) -> Any:
     """
-    View public content (stories or poems) generated by a specific user.
-    Only returns content marked as public. Requires authentication.
+    List summaries of the public content generated from images with a
+    detected label (e.g. "Dog"), newest first. Requires authentication.
     """
-    content = (
-        db.query(GeneratedContent)
-        .filter(
-            GeneratedContent.owner_id == user_id, GeneratedContent.is_public == True
+    statement = (
+        select(
+            GeneratedContent.id,
+            GeneratedContent.title,
+            GeneratedContent.created_at,
+            GeneratedContent.is_story,
+            GeneratedContent.image_url_1.label("thumbnail"),
         )
-        .all()
+        .join(ContentLabel, ContentLabel.content_id == GeneratedContent.id)
+        .join(Label, Label.id == ContentLabel.label_id)
+        .where(Label.name == label, GeneratedContent.is_public.is_(True))
     )
+    try:
+        statement = paginate(statement, GeneratedContent, cursor, limit)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    result = await db.execute(statement)
+    items, next_cursor = build_page(result.all(), limit)
+    return page_response(GeneratedContentSummaryPage, items, next_cursor)
+
+
+@router.get("/search", response_model=SearchPage)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms"),
+    cursor: Optional[str] = Query(None, description="Cursor of the next page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_reader),
+) -> Any:
+    """
+    Search the titles, texts, themes and image captions of the public content
+    and of your own content, most relevant first.
+    Supports "quoted phrases", `or` and `-excluded` terms. Requires authentication.
+    """
+    try:
+        statement = search_content(q, current_user.id, cursor, limit)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    result = await db.execute(statement)
+    items, next_cursor = build_search_page(result.all(), limit)
+    return page_response(SearchPage, items, next_cursor)
+
+
+@router.get("/content/{content_id}", response_model=GeneratedContentResponse)
+async def get_content(
+    content_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_reader),
+) -> Any:
+    """
+    Get a single story or poem, including its full text.
+    Public content is visible to everyone, private content only to its owner.
+    Requires authentication.
+    """
+    content = await db.get(GeneratedContent, content_id)
+    if not content or (not content.is_public and content.owner_id != current_user.id):
+        raise HTTPException(status_code=404, detail="Content not found")
     return content
 
 
 @router.delete("/delete-content", response_model=Any)
 async def delete_content(
     content_id: int = Query(..., description="ID of the content to delete"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ) -> Any:
     """
@@ -322,9 +665,7 @@ async def delete_content(
     Requires authentication.
     """
     # Fetch content from database
-    content = (
-        db.query(GeneratedContent).filter(GeneratedContent.id == content_id).first()
-    )
+    content = await db.get(GeneratedContent, content_id)
 
     # Handle case where content doesn't exist
     if not content:
@@ -336,8 +677,26 @@ async def delete_content(
             status_code=403, detail="Not authorized to delete this content"
         )
 
-    # Delete the content
-    db.delete(content)
-    db.commit()
+    # Delete the content, with its feed item and labels
+    await delete_contents(db, [content_id], current_user.id)
+    await db.commit()
+    await invalidate_public_listings(db)
 
     return {"message": f"Content with ID {content_id} has been deleted successfully"}
+
+
+@router.post("/delete-content/bulk", response_model=BulkResponse)
+async def delete_content_bulk(
+    request: BulkDeleteRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Delete many of your stories or poems in one request.
+    Reports the deleted ids, and the ids which do not exist or are not yours.
+    Requires authentication.
+    """
+    affected = await delete_contents(db, request.ids, current_user.id)
+    await db.commit()
+    await invalidate_public_listings(db)
+    return _bulk_response(request.ids, affected)
@@ -0,0 +1,132 @@
+"""Cache the serialized public listings of the users.
+
+The pages of /view-content and /view-content/summary are cached as rendered in
+the `ResponseCache` of the worker, so a popular user's listing is answered
+without running the listing query. The ETag of the listing, which holds the
+change version of the user (see `app.api.conditional`), is part of the key: a
+change to the user's public content increments the version in its transaction,
+so the listings cached before it are never served after its commit, by any
+worker. The lookup of the version is a primary key read, which also answers
+the conditional requests before the cache.
+
+The entries of a user are grouped, and the group is invalidated after a
+transaction changed the public content of the user (see
+`app.db.queries.stats.update_user_stats`), by calling
+`invalidate_public_listings` once the transaction is committed. This frees the
+stale entries early, their versions are not requested anymore anyway.
+"""
+
+from typing import Any, Optional, Tuple
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..configs import get_settings
+from ..db.queries.stats import PUBLIC_CHANGES_KEY
+from ..utils.cache import LRUCache, RedisBackend, ResponseCache
+from ..utils.metrics import Counter, Gauge
+
+settings = get_settings()
+
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "response_cache_lookups_total",
+    "Lookups of the response cache by result, hit or miss.",
+    labelnames=("result",),
+)
+RESPONSE_CACHE_BYTES = Gauge(
+    "response_cache_bytes", "Memory used by the response cache of this worker."
+)
+
+
+def build_response_cache() -> ResponseCache:
+    """Build the response cache of the worker from the settings."""
+    shared = None
+    if settings.RESPONSE_CACHE_REDIS_URL:
+        shared = RedisBackend(settings.RESPONSE_CACHE_REDIS_URL)
+    local = LRUCache(settings.RESPONSE_CACHE_MAX_BYTES, settings.RESPONSE_CACHE_TTL)
+    return ResponseCache(local, shared)
+
+
+response_cache = build_response_cache()
+
+
+def _group(owner_id: int) -> str:
+    return f"public:{owner_id}"
+
+
+async def get_cached_listing(
+    request: Request, response: Response, owner_id: int
+) -> Tuple[Optional[str], Optional[Response]]:
+    """Look up the cached listing of a request, after `check_not_modified`
+    set the ETag of the current version of the user on the response.
+
+    Args:
+        request (Request): the request of the listing, its route, path and
+            query select the entry.
+        response (Response): the response of the endpoint, holding the ETag
+            and Cache-Control headers.
+        owner_id (int): id of the user owning the listed rows.
+
+    Returns:
+        Tuple[Optional[str], Optional[Response]]: the key to store the listing
+        under, None if the cache is disabled, and the cached response, or None
+        on a miss.
+    """
+    if settings.RESPONSE_CACHE_MAX_BYTES <= 0:
+        return None, None
+    route = getattr(request.scope.get("route"), "name", request.url.path)
+    etag = response.headers["etag"]
+    key = await response_cache.key(
+        _group(owner_id), f"{route}?{request.url.query}#{etag}"
+    )
+    value = await response_cache.get(key)
+    RESPONSE_CACHE_LOOKUPS.labels("miss" if value is None else "hit").inc()
+    if value is None:
+        return key, None
+    return key, Response(
+        value, media_type="application/json", headers=_headers(response)
+    )
+
+
+def _headers(response: Response) -> dict:
+    return {
+        name: response.headers[name]
+        for name in ("etag", "cache-control")
+        if name in response.headers
+    }
+
+
+async def cache_listing(key: Optional[str], response: Response, page: Any) -> Any:
+    """Render a listing and store it in the cache.
+
+    Args:
+        key (Optional[str]): the key from `get_cached_listing`, None if the
+            cache is disabled.
+        response (Response): the response of the endpoint, holding the ETag
+            and Cache-Control headers set by `check_not_modified`.
+        page (Any): the page of the listing, a page model or a response
+            rendered by `page_response`.
+
+    Returns:
+        Any: the rendered response, or the page if the cache is disabled.
+    """
+    if key is None:
+        return page
+    if isinstance(page, Response):
+        rendered = page
+    else:
+        rendered = JSONResponse(jsonable_encoder(page), headers=_headers(response))
+    await response_cache.set(key, rendered.body)
+    RESPONSE_CACHE_BYTES.set(response_cache.local.size)
+    return rendered
+
+
+async def invalidate_public_listings(db: AsyncSession) -> None:
+    """Invalidate the cached listings of the users whose public content was
+    changed by the committed transaction of a session.
+
+    Args:
+        db (AsyncSession): the session, after the commit.
+    """
+    for owner_id in db.info.pop(PUBLIC_CHANGES_KEY, ()):
+        await response_cache.invalidate(_group(owner_id))
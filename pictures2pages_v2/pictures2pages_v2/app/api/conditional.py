@@ -0,0 +1,95 @@
+"""Support conditional GET requests of the listing endpoints.
+
+The ETag of a listing is weak and derived from the change version of the user
+owning the listed rows (see `app.db.queries.stats.get_user_version`) and the
+requested URL. It is computed with a primary key lookup, instead of running the
+listing query and hashing the body, so a request whose ``If-None-Match`` holds
+the current ETag is answered with 304 Not Modified before the listing query.
+"""
+
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..configs import get_settings
+from ..db.queries.stats import get_user_version
+from ..version import __version__
+
+settings = get_settings()
+
+DEFAULT_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(request: Request, owner_id: int, version: int) -> str:
+    """Build the weak ETag of a listing.
+
+    Args:
+        request (Request): the request of the listing, its path and query
+            select the page.
+        owner_id (int): id of the user owning the listed rows.
+        version (int): the change version of the user.
+
+    Returns:
+        str: the ETag, e.g. ``W/"12-3f2a..."``.
+    """
+    # the app version changes the ETags when the serialization may change
+    key = f"{__version__}:{owner_id}:{request.url.path}?{request.url.query}"
+    digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    return f'W/"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag, with the weak
+    comparison of RFC 9110.
+
+    Args:
+        if_none_match (Optional[str]): the header value, a list of ETags or *.
+        etag (str): the current ETag.
+
+    Returns:
+        bool: whether the ETag is listed.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def get_cache_control(request: Request) -> str:
+    """Get the configured Cache-Control header of the requested endpoint."""
+    route = request.scope.get("route")
+    name = getattr(route, "name", None)
+    return settings.CACHE_CONTROL.get(name, DEFAULT_CACHE_CONTROL)
+
+
+async def check_not_modified(
+    request: Request, response: Response, db: AsyncSession, owner_id: int
+) -> Optional[Response]:
+    """Set the ETag and Cache-Control headers of a listing, and answer the
+    request with 304 if the client holds the current version.
+
+    Args:
+        request (Request): the request of the listing.
+        response (Response): the response of the endpoint, the headers are
+            set on it.
+        db (AsyncSession): the session of the request.
+        owner_id (int): id of the user owning the listed rows.
+
+    Returns:
+        Optional[Response]: the 304 response, None if the listing has to be
+        sent.
+    """
+    version = await get_user_version(db, owner_id)
+    headers = {
+        "ETag": make_etag(request, owner_id, version),
+        "Cache-Control": get_cache_control(request),
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
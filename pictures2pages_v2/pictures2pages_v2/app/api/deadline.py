@@ -0,0 +1,139 @@
+"""Bound the time spent on the upstream calls of a request.
+
+The deadline of a request is set by endpoint name in ``REQUEST_TIMEOUTS``, and
+a client may shorten it with the header ``REQUEST_TIMEOUT_HEADER``, e.g.
+``X-Request-Timeout: 20``. The blocking S3, Rekognition and OpenAI calls run in
+the threadpool through `Deadline.run`, which gets the remaining time to pass on
+to the call, and stops waiting for it once the deadline passed (504 Gateway
+Timeout) or the client disconnected (499 Client Closed Request), so nothing is
+written for a response nobody waits for. A call that was given up on runs on in
+its thread until its own timeout: the OpenAI calls get the remaining time, the
+AWS clients are bounded by ``AWS_READ_TIMEOUT`` since boto3 has no per call
+timeout.
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Optional
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from ..configs import get_settings
+from ..utils.metrics import Counter
+
+settings = get_settings()
+
+# seconds between two checks of the connection of the client
+DISCONNECT_POLL_INTERVAL = 0.1
+
+REQUESTS_CANCELLED = Counter(
+    "http_requests_cancelled_total",
+    "Requests whose upstream work was cancelled, by reason, deadline or disconnect.",
+    labelnames=("reason",),
+)
+
+
+class Deadline:
+    """Deadline of a request, from the start of its handler."""
+
+    def __init__(
+        self,
+        request: Request,
+        timeout: Optional[float],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.request = request
+        self.clock = clock
+        self.expires_at = None if timeout is None else clock() + timeout
+
+    def remaining(self) -> Optional[float]:
+        """Get the seconds left before the deadline, None without deadline.
+
+        Raises:
+            HTTPException, 504 if the deadline passed.
+        """
+        if self.expires_at is None:
+            return None
+        remaining = self.expires_at - self.clock()
+        if remaining <= 0:
+            REQUESTS_CANCELLED.labels("deadline").inc()
+            raise HTTPException(status_code=504, detail="Request deadline exceeded")
+        return remaining
+
+    async def check(self) -> None:
+        """Check that the deadline did not pass and the client is still
+        waiting for the response, e.g. before writing its results.
+
+        Raises:
+            HTTPException, 504 if the deadline passed and 499 if the client
+            disconnected.
+        """
+        self.remaining()
+        if await self.request.is_disconnected():
+            REQUESTS_CANCELLED.labels("disconnect").inc()
+            raise HTTPException(status_code=499, detail="Client closed request")
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking call in the threadpool, until the deadline passes or
+        the client disconnects.
+
+        Args:
+            func (Callable[..., Any]): the call.
+            *args: its positional arguments.
+            **kwargs: its keyword arguments.
+
+        Returns:
+            Any: the result of the call.
+
+        Raises:
+            HTTPException, 504 if the deadline passed and 499 if the client
+            disconnected before the call returned.
+        """
+        await self.check()
+        call = asyncio.ensure_future(run_in_threadpool(func, *args, **kwargs))
+        try:
+            while True:
+                remaining = self.remaining()
+                interval = DISCONNECT_POLL_INTERVAL
+                if remaining is not None:
+                    interval = min(interval, remaining)
+                done, _ = await asyncio.wait({call}, timeout=interval)
+                if done:
+                    return call.result()
+                await self.check()
+        finally:
+            # the thread runs on, but its result is not waited for
+            call.cancel()
+
+
+def get_request_timeout(request: Request) -> Optional[float]:
+    """Get the timeout of a request, from its endpoint and its header.
+
+    Args:
+        request (Request): the request.
+
+    Returns:
+        Optional[float]: the timeout in seconds, None without timeout.
+
+    Raises:
+        HTTPException, 400 if the header is not a positive number.
+    """
+    route = getattr(request.scope.get("route"), "name", None)
+    timeout = settings.REQUEST_TIMEOUTS.get(route)
+    header = request.headers.get(settings.REQUEST_TIMEOUT_HEADER)
+    if header is not None:
+        try:
+            requested = float(header)
+        except ValueError:
+            requested = 0
+        if not requested > 0:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid {settings.REQUEST_TIMEOUT_HEADER} header",
+            )
+        timeout = requested if timeout is None else min(timeout, requested)
+    return timeout
+
+
+async def get_deadline(request: Request) -> Deadline:
+    """Provide the deadline of the request to an endpoint."""
+    return Deadline(request, get_request_timeout(request))
@@ -0,0 +1,108 @@
+"""
+Internal endpoints for operating the Pictures2Pages service.
+Exposes live statistics such as the state of the DB connection pools, the
+read replica and the response cache, and the metrics of the service in the
+Prometheus text format.
+
+The endpoints require the ``INTERNAL_TOKEN`` as a bearer token, e.g.
+``Authorization: Bearer <token>``, and are not found without one configured.
+"""
+
+import secrets
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from ..configs import get_settings
+from ..db.replica import PRIMARY_PINS, REPLICA_LAG_SECONDS
+from ..db.session import engine, async_engine, replica_engine, get_pool_status
+from ..schemas.base import (
+    PoolStatusResponse,
+    ReplicaStatusResponse,
+    ResponseCacheStatusResponse,
+)
+from ..utils.metrics import REGISTRY, Registry, generate_latest
+from ..utils.multiprocess import collect, write_snapshot
+from .cache import response_cache
+
+settings = get_settings()
+
+
+async def verify_internal_token(
+    authorization: Optional[str] = Header(None, include_in_schema=False)
+) -> None:
+    """Check the bearer token of a request to the internal endpoints.
+
+    Raises:
+        HTTPException, 404 without ``INTERNAL_TOKEN``, 401 if the token of
+        the request is missing or wrong.
+    """
+    if not settings.INTERNAL_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        token.encode(), settings.INTERNAL_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid internal token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+router = APIRouter(prefix="/internal", dependencies=[Depends(verify_internal_token)])
+
+
+@router.get("/db-pool", response_model=PoolStatusResponse)
+async def db_pool_status() -> Any:
+    """Provide live statistics of the DB connection pools of this worker."""
+    binds = [engine, async_engine.sync_engine]
+    if replica_engine is not None:
+        binds.append(replica_engine.sync_engine)
+    return PoolStatusResponse(pools=[get_pool_status(bind) for bind in binds])
+
+
+@router.get("/db-replica", response_model=ReplicaStatusResponse)
+async def db_replica_status() -> Any:
+    """Provide the replication lag and the number of writes which pinned their
+    user to the primary, in this worker."""
+    return ReplicaStatusResponse(
+        enabled=replica_engine is not None,
+        lag_seconds=REPLICA_LAG_SECONDS.value,
+        primary_pins=int(PRIMARY_PINS.value),
+    )
+
+
+@router.get("/response-cache", response_model=ResponseCacheStatusResponse)
+async def response_cache_status() -> Any:
+    """Provide the hit ratio and the memory use of the response cache of this
+    worker."""
+    return ResponseCacheStatusResponse(
+        enabled=settings.RESPONSE_CACHE_MAX_BYTES > 0,
+        shared=response_cache.shared is not None,
+        **response_cache.stats(),
+    )
+
+
+def _collect_workers(directory: str) -> Registry:
+    # the metrics of this worker are current, the others' up to the interval
+    write_snapshot(directory)
+    return collect(directory)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> Any:
+    """Provide the metrics in the Prometheus text format.
+
+    With ``METRICS_MULTIPROC_DIR``, the metrics of all the workers are
+    combined, whichever worker answers, see `app.utils.multiprocess`.
+    Otherwise, the metrics of this worker only.
+    """
+    registry = REGISTRY
+    if settings.METRICS_MULTIPROC_DIR:
+        registry = await run_in_threadpool(
+            _collect_workers, settings.METRICS_MULTIPROC_DIR
+        )
+    return PlainTextResponse(
+        generate_latest(registry), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -4,23 +4,27 @@
 import logging.config
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 from .api import api_router
 from .configs import get_settings
-from .db import Base, engine
 from .events import startup_handler, shutdown_handler
-from .middlewares import log_time
+from .middlewares import (
+    CompressionMiddleware,
+    LogTimeMiddleware,
+    MetricsMiddleware,
+    ProfilerMiddleware,
+    TracingMiddleware,
+)
+from .utils.profiling import get_profiler_factory
+from .utils.tracing import get_exporter
 from .version import __version__
 
 
-def create_db_tables():
-    """Create all tables in database."""
-    Base.metadata.create_all(engine)
-
-
 def create_application() -> FastAPI:
     """Create a FastAPI instance.
 
+    The database is not touched, the schema is managed by the migrations which
+    are applied before the service starts (``scripts/prestart.sh``).
+
     Returns:
         object of FastAPI: the fastapi application instance.
     """
@@ -53,10 +57,31 @@ def create_application() -> FastAPI:
     # load logging config
     logging.config.dictConfig(settings.LOGGING_CONFIG)
 
-    # add defined middleware functions
-    application.add_middleware(BaseHTTPMiddleware, dispatch=log_time)
-
-    # create tables in db
-    create_db_tables()
-
+    # add defined middlewares, the last one added is the outermost
+    if settings.COMPRESSION_LEVEL > 0:
+        application.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            media_types=settings.COMPRESSION_MEDIA_TYPES,
+            level=settings.COMPRESSION_LEVEL,
+            route_levels=settings.COMPRESSION_ROUTE_LEVELS,
+        )
+    if settings.PROFILER_ENABLED:
+        application.add_middleware(
+            ProfilerMiddleware,
+            directory=settings.PROFILER_DIR,
+            header=settings.PROFILER_HEADER,
+            sample_rate=settings.PROFILER_SAMPLE_RATE,
+            profiler_factory=get_profiler_factory(
+                settings.PROFILER_MODE, settings.PROFILER_INTERVAL
+            ),
+        )
+    exporter = get_exporter()
+    if settings.SERVER_TIMING or exporter is not None:
+        application.add_middleware(
+            TracingMiddleware, server_timing=settings.SERVER_TIMING, exporter=exporter
+        )
+    if settings.METRICS_ENABLED:
+        application.add_middleware(MetricsMiddleware)
+    application.add_middleware(LogTimeMiddleware)
     return application
@@ -4,7 +4,8 @@
 import ast
 import os
 import secrets
-from typing import List, Union, Dict, Optional, Any
+from pathlib import Path
+from typing import List, Union, Dict, Optional, Any, Literal
 from pydantic import BaseModel, AnyHttpUrl, BaseSettings, validator, PostgresDsn
 from ..utils.logging import StandardFormatter, ColorFormatter
 
@@ -34,6 +35,9 @@ class Settings(BaseSettings):
     # 60 minutes * 24 hours * 30 * 6  months = 6 months
     ACCESS_TOKEN_EXPIRE_MINUTES_ADMIN: int = 60 * 24 * 30 * 6
     JWT_ENCODE_ALGORITHM: str = "HS256"
+    """Bearer token of the internal endpoints, e.g. for the Prometheus scraper;
+    without a token, the internal endpoints answer 404 Not Found."""
+    INTERNAL_TOKEN: Optional[str] = None
 
     # ########################### CORS Configuration ###########################
     """CORS_ORIGINS is a JSON-formatted list of origins
@@ -111,6 +115,214 @@ class Settings(BaseSettings):
             path=f"/{values.get('POSTGRES_DB') or ''}",
         )
 
+    # URI used by the async engine, derived from SQLALCHEMY_DATABASE_URI by
+    # switching the driver to asyncpg if it is not given explicitly.
+    SQLALCHEMY_ASYNC_DATABASE_URI: Optional[PostgresDsn] = None
+
+    # noinspection PyMethodParameters
+    @validator("SQLALCHEMY_ASYNC_DATABASE_URI", pre=True)
+    def assemble_async_db_connection(
+        cls, v: Optional[str], values: Dict[str, Any]
+    ) -> Optional[str]:
+        """Assemble the asyncpg DB URI from SQLALCHEMY_DATABASE_URI.
+
+        Args:
+            v (Optional[str]): the value of defined SQLALCHEMY_ASYNC_DATABASE_URI.
+            values (Dict[str, Any]): a dictionary contains the requisite values.
+
+        Returns:
+            Optional[str]: the asyncpg DB URI, None if there is no sync URI.
+        """
+        if isinstance(v, str):
+            return v
+        sync_uri = values.get("SQLALCHEMY_DATABASE_URI")
+        if not sync_uri:
+            return None
+        _, rest = str(sync_uri).split("://", 1)
+        return f"postgresql+asyncpg://{rest}"
+
+    # ###################### Read Replica Configuration ########################
+    """URI of an optional read replica. Read-only endpoints are served by it
+    through the async engine, so the driver is always switched to asyncpg.
+    Without a replica, all the requests use the primary database."""
+    SQLALCHEMY_REPLICA_DATABASE_URI: Optional[PostgresDsn] = None
+    """Seconds a user reads from the primary after writing, such that they see
+    their own writes despite the replica lag. The pin is a cookie signed with
+    SECRET_KEY, which must be the same in all the workers."""
+    DB_READ_YOUR_WRITES_SECONDS: float = 5
+    """Seconds between two measurements of the replica lag."""
+    DB_REPLICA_LAG_INTERVAL: float = 10
+
+    # noinspection PyMethodParameters
+    @validator("SQLALCHEMY_REPLICA_DATABASE_URI", pre=True)
+    def assemble_replica_db_connection(cls, v: Optional[str]) -> Optional[str]:
+        """Switch the driver of the replica DB URI to asyncpg.
+
+        Args:
+            v (Optional[str]): the value of defined SQLALCHEMY_REPLICA_DATABASE_URI.
+
+        Returns:
+            Optional[str]: the asyncpg replica DB URI, None if there is no replica.
+        """
+        if not v:
+            return None
+        _, rest = str(v).split("://", 1)
+        return f"postgresql+asyncpg://{rest}"
+
+    # ########################## Server Configuration ##########################
+    # used by main.py and gunicorn_conf.py, see `app.server`
+    HOST: str = "0.0.0.0"  # nosec
+    PORT: int = 8080
+    """Number of worker processes, by default one per available CPU."""
+    WORKERS: Optional[int] = None
+    """Seconds an idle keep-alive connection is kept open. Keep it above the
+    idle timeout of the load balancer in front of the service."""
+    KEEP_ALIVE: int = 5
+    """Maximum number of pending connections."""
+    BACKLOG: int = 2048
+    """Requests after which a worker is replaced, which bounds the growth of
+    its memory, 0 disables it. A random jitter up to MAX_REQUESTS_JITTER is
+    added, such that the workers are not replaced at the same time."""
+    MAX_REQUESTS: int = 10000
+    MAX_REQUESTS_JITTER: int = 1000
+    """Seconds the workers have to finish the running requests on restart or
+    shutdown before they are killed."""
+    GRACEFUL_TIMEOUT: int = 30
+    """Seconds a gunicorn worker may be silent before it is killed and
+    replaced."""
+    WORKER_TIMEOUT: int = 60
+    """Import the application once in the gunicorn master before forking the
+    workers, which share its memory copy-on-write and start faster."""
+    PRELOAD_APP: bool = True
+
+    # ######################## DB Pool Configuration ###########################
+    # These apply to each engine of each worker process, so the maximum number
+    # of connections is workers * engines * (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    """Seconds to wait for a connection before giving up."""
+    DB_POOL_TIMEOUT: float = 30
+    """Seconds after which a connection is replaced, -1 means never."""
+    DB_POOL_RECYCLE: int = 1800
+    """Pessimistic disconnect handling, test each connection on checkout. If
+    disabled, stale connections are only replaced by DB_POOL_RECYCLE."""
+    DB_POOL_PRE_PING: bool = True
+    """Statement timeout in milliseconds, 0 means no timeout."""
+    DB_STATEMENT_TIMEOUT: int = 0
+    """Name of the connections shown in pg_stat_activity."""
+    DB_APPLICATION_NAME: str = "pictures2pages_v2"
+
+    # ###################### Partitioning Configuration ########################
+    # generated_content is partitioned by month of created_at, see
+    # `app.db.partitions`.
+    """Number of coming months whose partitions are created ahead of time."""
+    PARTITION_MONTHS_AHEAD: int = 3
+    """Months after which a partition is archived, the current month counts."""
+    ARCHIVE_AFTER_MONTHS: int = 12
+    """Where archived partitions are stored, an s3://bucket/prefix URL or a
+    local directory."""
+    ARCHIVE_STORAGE_URL: str = "s3://pictures-to-pages-bucket/archive"
+
+    # ########################## Deadline Configuration ########################
+    # see `app.api.deadline`
+    """Deadline in seconds of the requests by endpoint name. The upstream calls
+    of a request are given up on once it passed."""
+    REQUEST_TIMEOUTS: Dict[str, float] = {
+        "generate_content": 60.0,
+        "upload_image": 60.0,
+    }
+    """Header in which a client may send the seconds it waits for a response,
+    which shortens the deadline of the endpoint but does not extend it."""
+    REQUEST_TIMEOUT_HEADER: str = "X-Request-Timeout"
+    """Timeouts in seconds of the S3 and Rekognition clients, which bound the
+    calls given up on, since boto3 has no per call timeout."""
+    AWS_CONNECT_TIMEOUT: float = 5.0
+    AWS_READ_TIMEOUT: float = 30.0
+
+    # ####################### HTTP Caching Configuration #######################
+    """Cache-Control header of the listings supporting conditional requests,
+    by endpoint name, e.g. {"view_content": "private, max-age=30"}. The other
+    listings use "private, no-cache": clients revalidate them every time."""
+    CACHE_CONTROL: Dict[str, str] = {}
+    """Maximum memory in bytes of the cached public listings of each worker,
+    0 disables the response cache, see `app.api.cache`."""
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    """Seconds a cached listing is served at most. It bounds the staleness of
+    listings filled from a lagging read replica, the listings are keyed by the
+    version of the user otherwise."""
+    RESPONSE_CACHE_TTL: float = 30.0
+    """URL of a redis shared by the workers, e.g. redis://cache:6379/0, such
+    that a listing cached by a worker is served by all of them."""
+    RESPONSE_CACHE_REDIS_URL: Optional[str] = None
+
+    # ###################### Serialization Configuration #######################
+    """Serialize the pages of the listings from the rows directly, only
+    checking the fields which must not be None, and with orjson if it is
+    installed, see `app.utils.serialization`."""
+    FAST_JSON: bool = False
+
+    # ###################### Compression Configuration #########################
+    # the responses are compressed with brotli if the brotli package is
+    # installed and the client accepts it, with gzip otherwise
+    """Compression level from 1 (fastest) to 9 (smallest), used as the gzip level
+    and the brotli quality, 0 disables the compression."""
+    COMPRESSION_LEVEL: int = 6
+    """Compression level by endpoint name, e.g. {"view_content": 9}, to trade
+    CPU for bandwidth on some endpoints; 0 disables it for an endpoint."""
+    COMPRESSION_ROUTE_LEVELS: Dict[str, int] = {}
+    """Minimum size in bytes of a response body to compress. Smaller bodies
+    barely shrink, and fit in a packet anyway."""
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    """Media types of the compressed responses."""
+    COMPRESSION_MEDIA_TYPES: List[str] = [
+        "application/json",
+        "text/html",
+        "text/plain",
+        "text/css",
+        "application/javascript",
+    ]
+
+    # ######################### Metrics Configuration ##########################
+    """Collect the metrics of the http requests, the upstream calls and the DB
+    queries, exposed in the Prometheus format at ``/internal/metrics``."""
+    METRICS_ENABLED: bool = True
+    """Directory where each worker writes its metrics, such that
+    /internal/metrics combines the metrics of all the workers, see
+    `app.utils.multiprocess`. gunicorn_conf.py and main.py create a temporary
+    one if there are several workers and none is set."""
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    """Seconds between two writes of the metrics of a worker."""
+    METRICS_FLUSH_INTERVAL: float = 1.0
+
+    # ######################### Tracing Configuration ##########################
+    """Return the timing of the traced stages of a request, e.g. the calls of
+    ``/generate-content``, in the ``Server-Timing`` header."""
+    SERVER_TIMING: bool = True
+    """File the traces are appended to in the OTLP JSON encoding, e.g.
+    "data/traces.jsonl", None to not write them."""
+    TRACING_EXPORT_PATH: Optional[str] = None
+    """OTLP/HTTP endpoint of an OpenTelemetry collector the traces are sent to,
+    e.g. "http://localhost:4318/v1/traces", None to not send them."""
+    TRACING_OTLP_ENDPOINT: Optional[str] = None
+
+    # ######################### Profiler Configuration #########################
+    """Add the profiler middleware, for development and staging only, see
+    `app.middlewares.profiling`. Without it, the requests are not slowed down
+    at all."""
+    PROFILER_ENABLED: bool = False
+    """Header of the requests to profile, e.g. X-Profile: 1."""
+    PROFILER_HEADER: str = "X-Profile"
+    """Fraction of the requests profiled without the header."""
+    PROFILER_SAMPLE_RATE: float = 0.0
+    """"sampling" samples the stacks of the threads every PROFILER_INTERVAL
+    seconds into a flamegraph.pl folded file, "deterministic" records every
+    call of the event loop with cProfile into a pstats file, including the
+    concurrent requests but not the threadpool."""
+    PROFILER_MODE: Literal["sampling", "deterministic"] = "sampling"
+    PROFILER_INTERVAL: float = 0.001
+    """Directory the profiles are written to."""
+    PROFILER_DIR: str = str(Path(__file__).resolve().parents[2] / "data" / "profiles")
+
     # ######################## Logging Configuration ###########################
     # logging configuration for the project logger, uvicorn loggers
     LOGGING_CONFIG: LoggingConfig = {
@@ -6,3 +6,5 @@ from .base import Settings
 
 class SettingsDev(Settings):
     DEBUG = True
+    # requests are profiled with the PROFILER_HEADER
+    PROFILER_ENABLED = True
@@ -1 +1,8 @@
 """Module for defining constants centrally."""
+
+# page sizes of the cursor paginated listing endpoints
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# maximum number of ids changed by one request of the bulk endpoints
+MAX_BULK_SIZE = 500
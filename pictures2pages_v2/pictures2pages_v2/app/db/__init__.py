@@ -1,2 +1,2 @@
 from .base import Base
-from .session import engine, session_scope
+from .session import engine, session_scope, async_engine, async_session_scope
@@ -1,3 +1,7 @@
 # models/__init__.py
 from .user import User
 from .image import Image
+from .contents import GeneratedContent
+from .feed import PublicFeedItem
+from .labels import Label, ImageLabel, ContentLabel
+from .stats import UserStats
@@ -1,25 +1,78 @@
-# app/db/models/user.py
-from app.db.base import Base
+# app/db/models/contents.py
+from ..base import Base
 from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Computed, Index, event, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
+from ..partitions import create_initial_partitions
+
+# the searchable text, weighted by where a match counts most in the ranking
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(theme, '')), 'B') || "
+    "setweight(to_tsvector('english', "
+    "coalesce(caption_1, '') || ' ' || coalesce(caption_2, '') || ' ' || "
+    "coalesce(caption_3, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'C')"
+)
 
 
 class GeneratedContent(Base):
+    """A generated story or poem.
+
+    The table is partitioned by month of ``created_at``, see
+    `app.db.partitions`. The partition key has to be part of the primary key
+    of the table, the rows are still identified by their id alone.
+    """
+
     __tablename__ = "generated_content"
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     is_story = Column(Boolean, default=True)
     content = Column(Text, nullable=False)
     title = Column(Text, nullable=False)
     theme = Column(String, nullable=False)
     is_public = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
     image_url_1 = Column(String, nullable=False)
     image_url_2 = Column(String, nullable=False)
     image_url_3 = Column(String, nullable=False)
     caption_1 = Column(String, nullable=False)
     caption_2 = Column(String, nullable=False)
     caption_3 = Column(String, nullable=False)
+    # maintained by postgres on every insert and update, only used in queries
+    search_vector = deferred(
+        Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True))
+    )
 
     owner_id = Column(Integer, ForeignKey("users.id"))
     owner = relationship("User", back_populates="generated_contents")
+
+    __mapper_args__ = {"primary_key": [id]}
+    __table_args__ = (
+        # listing the content of a user, newest first, keyset paginated
+        Index(
+            "ix_generated_content_owner_id_created_at_id",
+            "owner_id",
+            "created_at",
+            "id",
+        ),
+        # listing the public content of a user (/view-content)
+        Index(
+            "ix_generated_content_public_owner_id_created_at_id",
+            "owner_id",
+            "created_at",
+            "id",
+            postgresql_where=text("is_public"),
+        ),
+        # full text search (/search)
+        Index(
+            "ix_generated_content_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+event.listen(GeneratedContent.__table__, "after_create", create_initial_partitions)
@@ -0,0 +1,27 @@
+# app/db/models/feed.py
+from ..base import Base
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text
+from sqlalchemy import Index
+
+
+class PublicFeedItem(Base):
+    """Denormalized copy of the listed columns of the public content, such that
+    the global feed is read without touching the generated_content table.
+    Kept up to date in the transactions which create, publish, hide or delete
+    content, see `app.db.queries.feed`. The id is the id of the content; it is
+    not a foreign key, since the partitioned content table has no unique
+    constraint on the id alone."""
+
+    __tablename__ = "public_feed"
+    id = Column(Integer, primary_key=True)
+    title = Column(Text, nullable=False)
+    is_story = Column(Boolean, nullable=False)
+    thumbnail = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    owner_username = Column(String, nullable=False)
+
+    __table_args__ = (
+        # the global feed (/feed), newest first, keyset paginated
+        Index("ix_public_feed_created_at_id", "created_at", "id"),
+    )
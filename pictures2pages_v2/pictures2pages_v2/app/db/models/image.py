@@ -1,6 +1,7 @@
 # app/db/models/user.py
-from app.db.base import Base
+from ..base import Base
 from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text
+from sqlalchemy import Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -11,7 +12,18 @@ class Image(Base):
     url = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     is_public = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # the keyset of the listings, hence never NULL
+    created_at = Column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        server_default=text("timezone('utc', now())"),
+    )
 
     owner_id = Column(Integer, ForeignKey("users.id"))
     owner = relationship("User", back_populates="images")
+
+    __table_args__ = (
+        # listing the images of a user (/images), keyset paginated
+        Index("ix_images_owner_id_created_at_id", "owner_id", "created_at", "id"),
+    )
@@ -0,0 +1,48 @@
+# app/db/models/labels.py
+from ..base import Base
+from sqlalchemy import Column, Integer, String, ForeignKey, Float
+from sqlalchemy import Index
+
+
+class Label(Base):
+    """A label detected in images, such as "Dog", stored once."""
+
+    __tablename__ = "labels"
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+
+class ImageLabel(Base):
+    """A label detected in an image, with the confidence of the detection.
+    The confidence is unknown for the labels migrated from the captions."""
+
+    __tablename__ = "image_labels"
+    image_id = Column(
+        Integer, ForeignKey("images.id", ondelete="CASCADE"), primary_key=True
+    )
+    label_id = Column(
+        Integer, ForeignKey("labels.id", ondelete="CASCADE"), primary_key=True
+    )
+    confidence = Column(Float, nullable=True)
+
+    __table_args__ = (
+        # finding the images with a label (/labels/{label}/images)
+        Index("ix_image_labels_label_id_image_id", "label_id", "image_id"),
+    )
+
+
+class ContentLabel(Base):
+    """A label of one of the images a story or poem was generated from. Like
+    the feed items, the labels are deleted together with the content, there
+    is no foreign key to the partitioned content table."""
+
+    __tablename__ = "content_labels"
+    content_id = Column(Integer, primary_key=True)
+    label_id = Column(
+        Integer, ForeignKey("labels.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    __table_args__ = (
+        # finding the content with a label (/labels/{label}/content)
+        Index("ix_content_labels_label_id_content_id", "label_id", "content_id"),
+    )
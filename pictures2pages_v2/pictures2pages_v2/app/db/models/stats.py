@@ -0,0 +1,21 @@
+# app/db/models/stats.py
+from ..base import Base
+from sqlalchemy import Column, Integer, ForeignKey
+
+
+class UserStats(Base):
+    """Counters of the images and the content of a user, kept up to date in the
+    transactions changing them, see `app.db.queries.stats`."""
+
+    __tablename__ = "user_stats"
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    images = Column(Integer, nullable=False, default=0, server_default="0")
+    public_images = Column(Integer, nullable=False, default=0, server_default="0")
+    stories = Column(Integer, nullable=False, default=0, server_default="0")
+    poems = Column(Integer, nullable=False, default=0, server_default="0")
+    public_contents = Column(Integer, nullable=False, default=0, server_default="0")
+    # incremented on every change of the counters, the ETags of the listings
+    # of the user are derived from it
+    version = Column(Integer, nullable=False, default=0, server_default="0")
@@ -1,7 +1,7 @@
 # app/db/models/user.py
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
-from app.db.base import Base
+from ..base import Base
 
 
 class User(Base):
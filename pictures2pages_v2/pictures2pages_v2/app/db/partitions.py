@@ -0,0 +1,493 @@
+"""Maintain the monthly partitions of the ``generated_content`` table.
+
+``generated_content`` is partitioned by range of ``created_at``, with one
+partition per month, e.g. ``generated_content_y2026m10``, and a default
+partition which catches the rows of months without a partition, such that an
+insert never fails. The hot queries only touch the recent partitions, and the
+index maintenance and vacuum of old months stop once they are not written
+anymore.
+
+The partitions of the coming ``PARTITION_MONTHS_AHEAD`` months are created
+ahead of time, by ``prestart.sh`` on every deploy and periodically, e.g. daily
+from cron::
+
+    $ python -m app.db.partitions create
+
+The partitions older than ``ARCHIVE_AFTER_MONTHS`` are archived: exported as
+gzip compressed CSV to ``ARCHIVE_STORAGE_URL``, detached and dropped. An
+archived month is restored on demand::
+
+    $ python -m app.db.partitions archive
+    $ python -m app.db.partitions restore 2025-01
+    $ python -m app.db.partitions list
+
+The feed items and content labels of an archived month are removed with it,
+and rebuilt from the restored rows. The counters of the users are reconciled
+after archiving and restoring.
+"""
+
+# mypy: ignore-errors
+import csv
+import gzip
+import re
+import shutil
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from ..configs import get_settings
+
+settings = get_settings()
+
+PARENT_TABLE = "generated_content"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+PARTITION_NAME_RE = re.compile(rf"^{PARENT_TABLE}_(y(\d{{4}})m(\d{{2}})|default)$")
+
+# the public content of a restored partition, back into the feed
+RESTORE_FEED_SQL = """
+    INSERT INTO public_feed (id, title, is_story, thumbnail, created_at, owner_id,
+                             owner_username)
+    SELECT c.id, c.title, coalesce(c.is_story, true), c.image_url_1, c.created_at,
+           c.owner_id, u.username
+    FROM {partition} c JOIN users u ON u.id = c.owner_id
+    WHERE c.is_public
+    ON CONFLICT (id) DO NOTHING
+"""
+# the label names in the captions of a restored partition, which are stored as
+# the string of a python list, e.g. "['Dog', 'Pet']"
+CAPTION_LABELS_SQL = """
+    SELECT c.id AS content_id, coalesce(m[1], m[2]) AS name
+    FROM {partition} c,
+    LATERAL unnest(ARRAY[c.caption_1, c.caption_2, c.caption_3]) AS caption,
+    LATERAL regexp_matches(caption, '''([^'']+)''|"([^"]+)"', 'g') AS m
+"""
+RESTORE_LABELS_SQL = f"""
+    WITH caption_labels AS ({CAPTION_LABELS_SQL}),
+    new_labels AS (
+        INSERT INTO labels (name) SELECT DISTINCT name FROM caption_labels
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id, name
+    ),
+    all_labels AS (
+        SELECT id, name FROM new_labels
+        UNION ALL
+        SELECT labels.id, labels.name FROM labels
+        WHERE labels.name IN (SELECT name FROM caption_labels)
+    )
+    INSERT INTO content_labels (content_id, label_id)
+    SELECT DISTINCT l.content_id, all_labels.id
+    FROM caption_labels l JOIN all_labels ON all_labels.name = l.name
+    ON CONFLICT DO NOTHING
+"""
+
+
+def month_start(value: date) -> date:
+    """Get the first day of the month of the given date."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """Get the first day of the month `months` after the month of `month`,
+    before it if `months` is negative."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def current_month() -> date:
+    """Get the first day of the current month, in UTC like ``created_at``."""
+    return month_start(datetime.utcnow().date())
+
+
+def partition_name(month: date) -> str:
+    """Get the name of the partition of the given month."""
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Get the month of a partition from its name.
+
+    Args:
+        name (str): name of a partition.
+
+    Returns:
+        Optional[date]: the first day of the month, None for the default
+        partition.
+
+    Raises:
+        ValueError, if the name is not the name of a partition.
+    """
+    match = PARTITION_NAME_RE.match(name)
+    if match is None:
+        raise ValueError(f"{name} is not a partition of {PARENT_TABLE}.")
+    if match.group(1) == "default":
+        return None
+    return date(int(match.group(2)), int(match.group(3)), 1)
+
+
+def parse_month(value: str) -> date:
+    """Parse a month given as YYYY-MM.
+
+    Raises:
+        ValueError, if the value is not a month.
+    """
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def include_name(name: Optional[str], type_: str, parent_names: dict) -> bool:
+    """Hide the partitions from the autogenerate comparison of alembic, they
+    are not part of the models."""
+    if type_ == "table":
+        return PARTITION_NAME_RE.match(name or "") is None
+    return True
+
+
+def _bounds(month: date) -> str:
+    # the bounds are rendered from dates, which is safe in DDL
+    return f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+
+
+def list_partitions(connection: Connection) -> List[str]:
+    """Get the names of the attached partitions, oldest month first and the
+    default partition last.
+
+    Args:
+        connection (Connection): a sync connection.
+
+    Returns:
+        List[str]: names of the partitions.
+    """
+    names = connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:parent AS regclass)"
+        ),
+        {"parent": PARENT_TABLE},
+    ).scalars()
+    return sorted(names, key=lambda name: partition_month(name) or date.max)
+
+
+def _copied_columns(connection: Connection) -> List[str]:
+    # the stored columns, without the generated ones which postgres computes
+    return (
+        connection.execute(
+            text(
+                "SELECT attname FROM pg_attribute "
+                "WHERE attrelid = CAST(:parent AS regclass) AND attnum > 0 "
+                "AND NOT attisdropped AND attgenerated = '' ORDER BY attnum"
+            ),
+            {"parent": PARENT_TABLE},
+        )
+        .scalars()
+        .all()
+    )
+
+
+def create_partition(connection: Connection, month: date) -> bool:
+    """Create the partition of a month, if it does not exist.
+
+    Rows of the month which landed in the default partition are moved into the
+    new partition.
+
+    Args:
+        connection (Connection): a sync connection.
+        month (date): the first day of the month.
+
+    Returns:
+        bool: whether the partition was created.
+    """
+    name = partition_name(month)
+    partitions = list_partitions(connection)
+    if name in partitions:
+        return False
+    in_default = False
+    if DEFAULT_PARTITION in partitions:
+        in_default = connection.execute(
+            text(
+                f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+                "WHERE created_at >= :start AND created_at < :end)"
+            ),
+            {"start": month, "end": add_months(month, 1)},
+        ).scalar()
+    if not in_default:
+        connection.execute(
+            text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} {_bounds(month)}")
+        )
+        return True
+    # a partition can not be created while the default partition holds rows
+    # of its range, so they are moved into the new table before attaching it
+    columns = ", ".join(_copied_columns(connection))
+    connection.execute(
+        text(
+            f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS "
+            "INCLUDING GENERATED INCLUDING CONSTRAINTS)"
+        )
+    )
+    connection.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE created_at >= :start AND created_at < :end "
+            f"RETURNING {columns}) "
+            f"INSERT INTO {name} ({columns}) SELECT {columns} FROM moved"
+        ),
+        {"start": month, "end": add_months(month, 1)},
+    )
+    connection.execute(
+        text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} {_bounds(month)}")
+    )
+    return True
+
+
+def ensure_partitions(
+    connection: Connection, months_ahead: int = settings.PARTITION_MONTHS_AHEAD
+) -> List[str]:
+    """Create the default partition, and the partitions of the current and the
+    coming months, if they do not exist.
+
+    Args:
+        connection (Connection): a sync connection.
+        months_ahead (int): number of coming months.
+
+    Returns:
+        List[str]: names of the created partitions.
+    """
+    created = []
+    if DEFAULT_PARTITION not in list_partitions(connection):
+        connection.execute(
+            text(
+                f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"
+            )
+        )
+        created.append(DEFAULT_PARTITION)
+    month = current_month()
+    for i in range(months_ahead + 1):
+        if create_partition(connection, add_months(month, i)):
+            created.append(partition_name(add_months(month, i)))
+    return created
+
+
+def create_initial_partitions(target, connection: Connection, **kw) -> None:
+    """Create the partitions of a freshly created ``generated_content`` table,
+    called by ``Base.metadata.create_all``."""
+    ensure_partitions(connection)
+
+
+class LocalArchiveStorage:
+    """Store the archives in a local directory."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def upload(self, path: Path, key: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, self.directory / key)
+
+    def download(self, key: str, path: Path) -> None:
+        shutil.copyfile(self.directory / key, path)
+
+
+class S3ArchiveStorage:
+    """Store the archives in a S3 bucket, under a key prefix."""
+
+    def __init__(self, bucket: str, prefix: str = ""):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def upload(self, path: Path, key: str) -> None:
+        from ..services.clients import get_s3_client
+
+        get_s3_client().upload_file(str(path), self.bucket, self._key(key))
+
+    def download(self, key: str, path: Path) -> None:
+        from ..services.clients import get_s3_client
+
+        get_s3_client().download_file(self.bucket, self._key(key), str(path))
+
+
+def get_archive_storage(url: str = settings.ARCHIVE_STORAGE_URL):
+    """Get the storage of the archives.
+
+    Args:
+        url (str): an s3://bucket/prefix URL, or a local directory.
+
+    Returns:
+        LocalArchiveStorage | S3ArchiveStorage: the storage.
+    """
+    if url.startswith("s3://"):
+        bucket, _, prefix = url.split("://", 1)[1].partition("/")
+        return S3ArchiveStorage(bucket, prefix)
+    return LocalArchiveStorage(url)
+
+
+def archive_key(month: date) -> str:
+    """Get the key of the archive of a month in the storage."""
+    return f"{partition_name(month)}.csv.gz"
+
+
+def archive_partition(connection: Connection, month: date, storage) -> int:
+    """Export the partition of a month to the storage, then remove its feed
+    items and content labels, detach and drop it, in one transaction.
+
+    The partition is locked against writes during the export, and nothing is
+    removed if the export or the upload fails.
+
+    Args:
+        connection (Connection): a sync psycopg2 connection, committed.
+        month (date): the first day of the month.
+        storage (LocalArchiveStorage | S3ArchiveStorage): the archive storage.
+
+    Returns:
+        int: number of archived rows.
+
+    Raises:
+        ValueError, if the month has no partition.
+    """
+    name = partition_name(month)
+    if name not in list_partitions(connection):
+        raise ValueError(f"There is no partition {name}.")
+    connection.execute(text("SET LOCAL statement_timeout = 0"))
+    connection.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+    columns = ", ".join(_copied_columns(connection))
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / archive_key(month)
+        with gzip.open(path, "wb") as file:
+            cursor = connection.connection.cursor()
+            cursor.copy_expert(
+                f"COPY (SELECT {columns} FROM {name} ORDER BY id) "
+                "TO STDOUT WITH (FORMAT csv, HEADER)",
+                file,
+            )
+            rows = cursor.rowcount
+        storage.upload(path, archive_key(month))
+    connection.execute(
+        text(f"DELETE FROM public_feed WHERE id IN (SELECT id FROM {name})")
+    )
+    connection.execute(
+        text(f"DELETE FROM content_labels WHERE content_id IN (SELECT id FROM {name})")
+    )
+    connection.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    connection.execute(text(f"DROP TABLE {name}"))
+    connection.commit()
+    return rows
+
+
+def archive_partitions(
+    connection: Connection,
+    storage,
+    after_months: int = settings.ARCHIVE_AFTER_MONTHS,
+) -> List[str]:
+    """Archive the partitions of the months older than `after_months`, each
+    in its own transaction.
+
+    Args:
+        connection (Connection): a sync psycopg2 connection.
+        storage (LocalArchiveStorage | S3ArchiveStorage): the archive storage.
+        after_months (int): number of kept months, the current month counts.
+
+    Returns:
+        List[str]: names of the archived partitions.
+    """
+    oldest_kept = add_months(current_month(), 1 - after_months)
+    archived = []
+    for name in list_partitions(connection):
+        month = partition_month(name)
+        if month is not None and month < oldest_kept:
+            archive_partition(connection, month, storage)
+            archived.append(name)
+    connection.commit()
+    return archived
+
+
+def restore_partition(connection: Connection, month: date, storage) -> int:
+    """Restore the archived partition of a month from the storage, with its
+    feed items and content labels, in one transaction.
+
+    Args:
+        connection (Connection): a sync psycopg2 connection, committed.
+        month (date): the first day of the month.
+        storage (LocalArchiveStorage | S3ArchiveStorage): the archive storage.
+
+    Returns:
+        int: number of restored rows.
+
+    Raises:
+        ValueError, if the partition of the month exists, or the archive has
+        unknown columns.
+    """
+    name = partition_name(month)
+    if name in list_partitions(connection):
+        raise ValueError(f"The partition {name} exists already.")
+    connection.execute(text("SET LOCAL statement_timeout = 0"))
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / archive_key(month)
+        storage.download(archive_key(month), path)
+        create_partition(connection, month)
+        with gzip.open(path, "rb") as file:
+            # the archive may predate columns added since, so its own columns
+            # are copied, the others get their default
+            header = next(csv.reader([file.readline().decode()]))
+            unknown = set(header) - set(_copied_columns(connection))
+            if unknown:
+                raise ValueError(f"The archive has unknown columns {sorted(unknown)}.")
+            cursor = connection.connection.cursor()
+            cursor.copy_expert(
+                f"COPY {name} ({', '.join(header)}) FROM STDIN WITH (FORMAT csv)",
+                file,
+            )
+            rows = cursor.rowcount
+    connection.execute(text(RESTORE_FEED_SQL.format(partition=name)))
+    connection.execute(text(RESTORE_LABELS_SQL.format(partition=name)))
+    connection.commit()
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+    from .queries.stats import reconcile_user_stats
+    from .session import engine, session_scope
+
+    parser = argparse.ArgumentParser(
+        prog="python -m app.db.partitions",
+        description=f"Maintain the monthly partitions of {PARENT_TABLE}.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="create the coming partitions")
+    create.add_argument(
+        "--months-ahead", type=int, default=settings.PARTITION_MONTHS_AHEAD
+    )
+    commands.add_parser("list", help="list the attached partitions")
+    archive = commands.add_parser("archive", help="archive the old partitions")
+    archive.add_argument(
+        "--after-months", type=int, default=settings.ARCHIVE_AFTER_MONTHS
+    )
+    restore = commands.add_parser("restore", help="restore an archived month")
+    restore.add_argument("month", type=parse_month, help="the month, as YYYY-MM")
+    args = parser.parse_args(argv)
+
+    with engine.connect() as connection:
+        if args.command == "create":
+            created = ensure_partitions(connection, args.months_ahead)
+            connection.commit()
+            print(f"Created {len(created)} partitions: {', '.join(created)}")
+        elif args.command == "list":
+            print("\n".join(list_partitions(connection)))
+        elif args.command == "archive":
+            archived = archive_partitions(
+                connection, get_archive_storage(), args.after_months
+            )
+            print(f"Archived {len(archived)} partitions: {', '.join(archived)}")
+        else:
+            rows = restore_partition(connection, args.month, get_archive_storage())
+            print(f"Restored {rows} rows of {partition_name(args.month)}.")
+    if args.command in ("archive", "restore"):
+        with session_scope() as session:
+            reconcile_user_stats(session)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Change many generated contents of a user with one statement each.
+
+The ownership check is part of the statement, and ``RETURNING`` reports which
+ids were changed, so a bulk change is a single round trip.
+"""
+
+# mypy: ignore-errors
+from typing import List, Sequence
+from sqlalchemy import Integer, any_, delete, func, literal, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import GeneratedContent, User
+from .feed import publish_to_feed_cte, remove_from_feed_cte
+from .labels import remove_content_labels_cte
+from .stats import update_user_stats
+
+
+def _owned(ids: Sequence[int], owner_id: int) -> tuple:
+    return (
+        GeneratedContent.id == any_(literal(list(ids), ARRAY(Integer))),
+        GeneratedContent.owner_id == owner_id,
+    )
+
+
+async def set_contents_visibility(
+    db: AsyncSession, ids: Sequence[int], is_public: bool, owner: User
+) -> List[int]:
+    """Set the visibility of the given contents of a user, and add them to or
+    remove them from the public feed in the same statement. The counters of the
+    user are updated with the number of changed visibilities.
+
+    Args:
+        db (AsyncSession): the session of the current transaction.
+        ids (Sequence[int]): ids of the contents.
+        is_public (bool): the new visibility.
+        owner (User): the user, other users' contents are not changed.
+
+    Returns:
+        List[int]: the ids of the contents whose visibility changed.
+    """
+    if is_public:
+        feed_cte = publish_to_feed_cte(ids, owner)
+    else:
+        feed_cte = remove_from_feed_cte(ids, owner.id)
+    # only the rows whose visibility changes are updated and counted, a
+    # concurrent change of the same rows is waited for and then skipped
+    statement = (
+        update(GeneratedContent)
+        .where(
+            *_owned(ids, owner.id),
+            GeneratedContent.is_public.is_distinct_from(is_public),
+        )
+        .values(is_public=is_public)
+        .returning(GeneratedContent.id)
+        .add_cte(feed_cte)
+        .execution_options(synchronize_session=False)
+    )
+    changed = (await db.execute(statement)).scalars().all()
+    await update_user_stats(
+        db, owner.id, public_contents=len(changed) if is_public else -len(changed)
+    )
+    return changed
+
+
+async def delete_contents(
+    db: AsyncSession, ids: Sequence[int], owner_id: int
+) -> List[int]:
+    """Delete the given contents of a user, with their feed items and labels
+    in the same statement, and update the counters of the user.
+
+    Args:
+        db (AsyncSession): the session of the current transaction.
+        ids (Sequence[int]): ids of the contents.
+        owner_id (int): id of the user, other users' contents are not deleted.
+
+    Returns:
+        List[int]: the ids of the deleted contents.
+    """
+    statement = (
+        delete(GeneratedContent)
+        .where(*_owned(ids, owner_id))
+        .returning(
+            GeneratedContent.id,
+            func.coalesce(GeneratedContent.is_story, True),
+            func.coalesce(GeneratedContent.is_public, False),
+        )
+        .add_cte(remove_from_feed_cte(ids, owner_id))
+        .add_cte(remove_content_labels_cte(ids, owner_id))
+        .execution_options(synchronize_session=False)
+    )
+    rows = (await db.execute(statement)).all()
+    await update_user_stats(
+        db,
+        owner_id,
+        stories=-sum(is_story for _, is_story, _ in rows),
+        poems=-sum(not is_story for _, is_story, _ in rows),
+        public_contents=-sum(is_public for _, _, is_public in rows),
+    )
+    return [id for id, _, _ in rows]
@@ -0,0 +1,107 @@
+"""Keep the denormalized ``public_feed`` table in sync with the public content.
+
+The helpers only stage the change in the given session, such that the feed is
+updated in the same transaction as the content itself.
+"""
+
+# mypy: ignore-errors
+from typing import Sequence
+from sqlalchemy import CTE, Integer, any_, delete, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import GeneratedContent, PublicFeedItem, User
+
+
+async def publish_to_feed(
+    db: AsyncSession, content: GeneratedContent, owner: User
+) -> None:
+    """Add a content to the public feed, if it is not in the feed yet.
+
+    Args:
+        db (AsyncSession): the session of the transaction changing the content.
+        content (GeneratedContent): the public content, already flushed.
+        owner (User): the owner of the content.
+    """
+    statement = insert(PublicFeedItem).values(
+        id=content.id,
+        title=content.title,
+        is_story=content.is_story,
+        thumbnail=content.image_url_1,
+        created_at=content.created_at,
+        owner_id=owner.id,
+        owner_username=owner.username,
+    )
+    await db.execute(statement.on_conflict_do_nothing(index_elements=["id"]))
+
+
+async def remove_from_feed(db: AsyncSession, content_id: int) -> None:
+    """Remove a content from the public feed, if it is in the feed.
+
+    Args:
+        db (AsyncSession): the session of the transaction changing the content.
+        content_id (int): id of the content.
+    """
+    await db.execute(delete(PublicFeedItem).where(PublicFeedItem.id == content_id))
+
+
+async def sync_feed(db: AsyncSession, content: GeneratedContent, owner: User) -> None:
+    """Add a content to the public feed or remove it, following its visibility.
+
+    Args:
+        db (AsyncSession): the session of the transaction changing the content.
+        content (GeneratedContent): the content, already flushed.
+        owner (User): the owner of the content.
+    """
+    if content.is_public:
+        await publish_to_feed(db, content, owner)
+    else:
+        await remove_from_feed(db, content.id)
+
+
+def publish_to_feed_cte(ids: Sequence[int], owner: User) -> CTE:
+    """Build a CTE adding the content with the given ids and owner to the feed,
+    to be attached to the statement publishing them with `add_cte`.
+
+    Args:
+        ids (Sequence[int]): ids of the content.
+        owner (User): the owner of the content.
+
+    Returns:
+        CTE: the insert statement as CTE.
+    """
+    content = (
+        select(
+            GeneratedContent.id,
+            GeneratedContent.title,
+            func.coalesce(GeneratedContent.is_story, True),
+            GeneratedContent.image_url_1,
+            GeneratedContent.created_at,
+            GeneratedContent.owner_id,
+            literal(owner.username),
+        )
+        .where(GeneratedContent.id == any_(literal(list(ids), ARRAY(Integer))))
+        .where(GeneratedContent.owner_id == owner.id)
+    )
+    columns = ["id", "title", "is_story", "thumbnail", "created_at", "owner_id"]
+    statement = insert(PublicFeedItem).from_select(
+        [*columns, "owner_username"], content
+    )
+    return statement.on_conflict_do_nothing(index_elements=["id"]).cte("published")
+
+
+def remove_from_feed_cte(ids: Sequence[int], owner_id: int) -> CTE:
+    """Build a CTE removing the content with the given ids and owner from the
+    feed, to be attached to the statement hiding them with `add_cte`.
+
+    Args:
+        ids (Sequence[int]): ids of the content.
+        owner_id (int): id of the owner of the content.
+
+    Returns:
+        CTE: the delete statement as CTE.
+    """
+    statement = delete(PublicFeedItem).where(
+        PublicFeedItem.id == any_(literal(list(ids), ARRAY(Integer))),
+        PublicFeedItem.owner_id == owner_id,
+    )
+    return statement.cte("removed")
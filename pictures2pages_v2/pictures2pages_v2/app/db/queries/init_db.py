@@ -1,18 +1,16 @@
 # app/db/queries/init_db.py
-from app.db.base import Base
+from pathlib import Path
 
-from app.db.models.user import User
-from app.db.models.image import Image
-from app.db.models.story import Story
-from app.db.models.poem import Poem
-from app.db.models.contents import GeneratedContent
-from app.db.session import engine
+from alembic import command
+from alembic.config import Config
+
+ALEMBIC_INI = Path(__file__).resolve().parents[3] / "alembic.ini"
 
 
 def create_tables():
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("✅ Tables created successfully!")
+    print("Applying database migrations...")
+    command.upgrade(Config(str(ALEMBIC_INI)), "head")
+    print("✅ Database schema is up to date!")
 
 
 if __name__ == "__main__":
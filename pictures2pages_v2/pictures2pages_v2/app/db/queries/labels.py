@@ -0,0 +1,141 @@
+"""Store and look up the labels detected in the images.
+
+Each label name is stored once in ``labels``; the images and the generated
+content refer to it, such that they can be found by label through an index
+instead of scanning the caption strings.
+"""
+
+# mypy: ignore-errors
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import CTE, Integer, any_, delete, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import ContentLabel, GeneratedContent, Image, ImageLabel, Label
+
+
+async def get_label_ids(db: AsyncSession, names: Iterable[str]) -> Dict[str, int]:
+    """Get the ids of the labels with the given names, creating the missing
+    labels.
+
+    Args:
+        db (AsyncSession): the session of the current transaction.
+        names (Iterable[str]): the label names.
+
+    Returns:
+        Dict[str, int]: the label ids by name.
+    """
+    names = sorted(set(names))
+    if not names:
+        return {}
+    await db.execute(
+        insert(Label)
+        .values([{"name": name} for name in names])
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    result = await db.execute(select(Label.name, Label.id).where(Label.name.in_(names)))
+    return dict(result.all())
+
+
+async def get_stored_image_labels(
+    db: AsyncSession, url: str, owner_id: int
+) -> Optional[List[str]]:
+    """Get the labels stored for an uploaded image, most confident first.
+
+    Args:
+        db (AsyncSession): the session of the current transaction.
+        url (str): the url of the image.
+        owner_id (int): id of the owner of the image.
+
+    Returns:
+        Optional[List[str]]: the label names, None if the image is unknown or
+        was not labeled yet.
+    """
+    result = await db.execute(
+        select(Label.name)
+        .join(ImageLabel, ImageLabel.label_id == Label.id)
+        .join(Image, Image.id == ImageLabel.image_id)
+        .where(Image.url == url, Image.owner_id == owner_id)
+        .order_by(ImageLabel.confidence.desc().nulls_last(), Label.name)
+    )
+    names = result.scalars().all()
+    return names or None
+
+
+async def store_image_labels(
+    db: AsyncSession, url: str, owner_id: int, labels: Sequence[Tuple[str, float]]
+) -> None:
+    """Store the labels detected in an uploaded image. Nothing is stored if
+    the image was not uploaded by the owner.
+
+    Args:
+        db (AsyncSession): the session of the current transaction.
+        url (str): the url of the image.
+        owner_id (int): id of the owner of the image.
+        labels (Sequence[Tuple[str, float]]): the (name, confidence) pairs.
+    """
+    image_id = await db.scalar(
+        select(Image.id).where(Image.url == url, Image.owner_id == owner_id).limit(1)
+    )
+    if image_id is None or not labels:
+        return
+    label_ids = await get_label_ids(db, (name for name, _ in labels))
+    await db.execute(
+        insert(ImageLabel)
+        .values(
+            [
+                {
+                    "image_id": image_id,
+                    "label_id": label_ids[name],
+                    "confidence": confidence,
+                }
+                for name, confidence in dict(labels).items()
+            ]
+        )
+        .on_conflict_do_nothing()
+    )
+
+
+async def store_content_labels(
+    db: AsyncSession, content_id: int, names: Iterable[str]
+) -> None:
+    """Store the labels of the images a content was generated from.
+
+    Args:
+        db (AsyncSession): the session of the current transaction.
+        content_id (int): id of the content, already flushed.
+        names (Iterable[str]): the label names.
+    """
+    label_ids = await get_label_ids(db, names)
+    if not label_ids:
+        return
+    await db.execute(
+        insert(ContentLabel)
+        .values(
+            [
+                {"content_id": content_id, "label_id": label_id}
+                for label_id in label_ids.values()
+            ]
+        )
+        .on_conflict_do_nothing()
+    )
+
+
+def remove_content_labels_cte(ids: Sequence[int], owner_id: int) -> CTE:
+    """Build a CTE removing the labels of the content with the given ids and
+    owner, to be attached to the statement deleting them with `add_cte`.
+
+    Args:
+        ids (Sequence[int]): ids of the content.
+        owner_id (int): id of the owner of the content.
+
+    Returns:
+        CTE: the delete statement as CTE.
+    """
+    # the subquery sees the content as it was before the attached statement
+    owned = select(GeneratedContent.id).where(
+        GeneratedContent.id == any_(literal(list(ids), ARRAY(Integer))),
+        GeneratedContent.owner_id == owner_id,
+    )
+    statement = delete(ContentLabel).where(ContentLabel.content_id.in_(owned))
+    return statement.cte("removed_labels")
@@ -0,0 +1,94 @@
+"""Keyset (cursor based) pagination over ``(created_at, id)``, newest first.
+
+The cursor is an opaque url-safe string encoding the sort key of the last item
+of a page. The next page continues strictly after it, so the cost of a page
+does not depend on how deep a client pages, unlike ``OFFSET``.
+"""
+
+# mypy: ignore-errors
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlalchemy import Select, tuple_
+from ...utils.errors import InvalidCursorError
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """Encode the sort key of an item into an opaque cursor.
+
+    Args:
+        created_at (datetime): creation time of the item.
+        id (int): id of the item.
+
+    Returns:
+        str: the cursor.
+    """
+    raw = f"{created_at.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor created by `encode_cursor`.
+
+    Args:
+        cursor (str): the cursor.
+
+    Returns:
+        Tuple[datetime, int]: creation time and id of the item.
+
+    Raises:
+        InvalidCursorError, if the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursorError(cursor) from e
+
+
+def paginate(
+    statement: Select, model: Any, cursor: Optional[str], limit: int
+) -> Select:
+    """Restrict a select statement to the page following the cursor.
+
+    One more row than ``limit`` is selected, which tells `build_page` whether
+    there is a next page.
+
+    Args:
+        statement (Select): the select statement of the listing.
+        model (Any): the model or aliased table with `created_at` and `id`.
+        cursor (Optional[str]): cursor of the last item of the previous page.
+        limit (int): the page size.
+
+    Returns:
+        Select: the paginated select statement.
+
+    Raises:
+        InvalidCursorError, if the cursor is malformed.
+    """
+    if cursor:
+        statement = statement.where(
+            tuple_(model.created_at, model.id) < tuple_(*decode_cursor(cursor))
+        )
+    return statement.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def build_page(rows: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Split the rows selected by a `paginate` statement into the page and the
+    cursor of the next page.
+
+    Args:
+        rows (Sequence[Any]): selected rows, having `created_at` and `id`.
+        limit (int): the page size.
+
+    Returns:
+        Tuple[List[Any], Optional[str]]: the items of the page and the cursor
+        of the next page, None if this is the last page.
+    """
+    items = list(rows[:limit])
+    if len(rows) <= limit:
+        return items, None
+    last = items[-1]
+    return items, encode_cursor(last.created_at, last.id)
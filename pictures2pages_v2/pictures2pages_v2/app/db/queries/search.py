@@ -0,0 +1,113 @@
+"""Ranked full text search over the generated content.
+
+The results are ordered by rank, then id, both descending, and paginated with
+a keyset cursor over ``(rank, id)``, like the listings in `pagination`.
+"""
+
+# mypy: ignore-errors
+import base64
+import binascii
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlalchemy import Select, func, literal_column, or_, select, tuple_
+from ...utils.errors import InvalidCursorError
+from ..models import GeneratedContent
+
+# the text search configuration, the same as in the search_vector column
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+
+
+def encode_search_cursor(rank: float, id: int) -> str:
+    """Encode the sort key of a search result into an opaque cursor.
+
+    Args:
+        rank (float): rank of the result.
+        id (int): id of the result.
+
+    Returns:
+        str: the cursor.
+    """
+    raw = f"{rank!r}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    """Decode a cursor created by `encode_search_cursor`.
+
+    Args:
+        cursor (str): the cursor.
+
+    Returns:
+        Tuple[float, int]: rank and id of the result.
+
+    Raises:
+        InvalidCursorError, if the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        rank, id = raw.split("|")
+        return float(rank), int(id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursorError(cursor) from e
+
+
+def search_content(
+    query: str, user_id: int, cursor: Optional[str], limit: int
+) -> Select:
+    """Build the statement searching the content visible to a user.
+
+    The public content of all users and the own private content are searched.
+    One more row than ``limit`` is selected, which tells `build_search_page`
+    whether there is a next page.
+
+    Args:
+        query (str): the search terms, in web search syntax ("quoted phrases",
+            or, -excluded).
+        user_id (int): id of the searching user.
+        cursor (Optional[str]): cursor of the last result of the previous page.
+        limit (int): the page size.
+
+    Returns:
+        Select: the statement selecting the summary columns and the rank.
+
+    Raises:
+        InvalidCursorError, if the cursor is malformed.
+    """
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    rank = func.ts_rank_cd(GeneratedContent.search_vector, ts_query)
+    statement = select(
+        GeneratedContent.id,
+        GeneratedContent.title,
+        GeneratedContent.created_at,
+        GeneratedContent.is_story,
+        GeneratedContent.image_url_1.label("thumbnail"),
+        rank.label("rank"),
+    ).where(
+        GeneratedContent.search_vector.op("@@")(ts_query),
+        or_(GeneratedContent.is_public.is_(True), GeneratedContent.owner_id == user_id),
+    )
+    if cursor:
+        statement = statement.where(
+            tuple_(rank, GeneratedContent.id) < tuple_(*decode_search_cursor(cursor))
+        )
+    return statement.order_by(rank.desc(), GeneratedContent.id.desc()).limit(limit + 1)
+
+
+def build_search_page(
+    rows: Sequence[Any], limit: int
+) -> Tuple[List[Any], Optional[str]]:
+    """Split the rows selected by a `search_content` statement into the page
+    and the cursor of the next page.
+
+    Args:
+        rows (Sequence[Any]): selected rows, having `rank` and `id`.
+        limit (int): the page size.
+
+    Returns:
+        Tuple[List[Any], Optional[str]]: the results of the page and the
+        cursor of the next page, None if this is the last page.
+    """
+    items = list(rows[:limit])
+    if len(rows) <= limit:
+        return items, None
+    last = items[-1]
+    return items, encode_search_cursor(last.rank, last.id)
@@ -0,0 +1,156 @@
+"""Keep the per user counters of ``user_stats`` up to date.
+
+The counters are changed with `update_user_stats` in the transactions which
+change the counted rows, after the rows were written. Each change increments
+the version of the user, which identifies the state of the user's images and
+content for conditional requests, see `get_user_version`, and the users whose
+public content changed are noted in the session, see `PUBLIC_CHANGES_KEY`.
+`reconcile_user_stats` recomputes them from the counted tables and repairs any
+drift; run it periodically with::
+
+    $ python -m app.db.queries.stats
+"""
+
+# mypy: ignore-errors
+from typing import List
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..models import UserStats
+
+# key of the ids of the users whose public content was changed, in the info of
+# the session, used to invalidate their cached listings after the commit
+PUBLIC_CHANGES_KEY = "public_changes"
+
+# the counters of a batch of users, recomputed from the rows of these users
+# only, through the owner indexes of the counted tables
+RECONCILE_SQL = text("""
+    INSERT INTO user_stats (user_id, images, public_images, stories, poems,
+                            public_contents, version)
+    SELECT u.id, coalesce(i.images, 0), coalesce(i.public_images, 0),
+           coalesce(c.stories, 0), coalesce(c.poems, 0),
+           coalesce(c.public_contents, 0), 1
+    FROM users u
+    LEFT JOIN (
+        SELECT owner_id, count(*) AS images,
+               count(*) FILTER (WHERE is_public) AS public_images
+        FROM images
+        WHERE owner_id > :after AND owner_id <= :until
+        GROUP BY owner_id
+    ) i ON i.owner_id = u.id
+    LEFT JOIN (
+        SELECT owner_id,
+               count(*) FILTER (WHERE coalesce(is_story, true)) AS stories,
+               count(*) FILTER (WHERE NOT coalesce(is_story, true)) AS poems,
+               count(*) FILTER (WHERE is_public) AS public_contents
+        FROM generated_content
+        WHERE owner_id > :after AND owner_id <= :until
+        GROUP BY owner_id
+    ) c ON c.owner_id = u.id
+    WHERE u.id > :after AND u.id <= :until
+    ON CONFLICT (user_id) DO UPDATE SET
+        images = EXCLUDED.images,
+        public_images = EXCLUDED.public_images,
+        stories = EXCLUDED.stories,
+        poems = EXCLUDED.poems,
+        public_contents = EXCLUDED.public_contents,
+        version = user_stats.version + 1
+    WHERE (user_stats.images, user_stats.public_images, user_stats.stories,
+           user_stats.poems, user_stats.public_contents)
+        IS DISTINCT FROM (EXCLUDED.images, EXCLUDED.public_images,
+                          EXCLUDED.stories, EXCLUDED.poems, EXCLUDED.public_contents)
+    RETURNING user_id
+    """)
+
+
+async def update_user_stats(db: AsyncSession, user_id: int, **deltas: int) -> None:
+    """Change the counters of a user, creating the row of the user if needed.
+
+    Args:
+        db (AsyncSession): the session of the transaction changing the rows.
+        user_id (int): id of the user.
+        **deltas (int): the change of each counter, e.g. ``images=1``.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    if "public_contents" in deltas:
+        db.info.setdefault(PUBLIC_CHANGES_KEY, set()).add(user_id)
+    statement = insert(UserStats).values(user_id=user_id, version=1, **deltas)
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={
+            **{
+                name: getattr(UserStats, name) + statement.excluded[name]
+                for name in deltas
+            },
+            "version": UserStats.version + 1,
+        },
+    )
+    await db.execute(statement)
+
+
+async def get_user_version(db: AsyncSession, user_id: int) -> int:
+    """Get the version of the images and content of a user, which changes
+    whenever they change.
+
+    Args:
+        db (AsyncSession): the session of the current transaction.
+        user_id (int): id of the user.
+
+    Returns:
+        int: the version, 0 for a user without changes.
+    """
+    version = await db.scalar(
+        select(UserStats.version).where(UserStats.user_id == user_id)
+    )
+    return version or 0
+
+
+def reconcile_user_stats(session: Session, batch_size: int = 1000) -> List[int]:
+    """Recompute the counters of all users and repair the ones which drifted.
+
+    Each batch of users is reconciled in its own transaction. Their counter
+    rows are locked first, such that writers which changed rows of these users
+    but did not commit yet finish first, and are counted.
+
+    Args:
+        session (Session): a sync session, committed after each batch.
+        batch_size (int): number of users per batch.
+
+    Returns:
+        List[int]: ids of the users whose counters were repaired.
+    """
+    repaired = []
+    after = 0
+    while True:
+        until = session.execute(
+            text(
+                "SELECT max(id) FROM (SELECT id FROM users WHERE id > :after "
+                "ORDER BY id LIMIT :limit) AS batch"
+            ),
+            {"after": after, "limit": batch_size},
+        ).scalar()
+        if until is None:
+            break
+        session.execute(
+            text(
+                "SELECT user_id FROM user_stats "
+                "WHERE user_id > :after AND user_id <= :until FOR UPDATE"
+            ),
+            {"after": after, "until": until},
+        )
+        result = session.execute(RECONCILE_SQL, {"after": after, "until": until})
+        repaired += result.scalars().all()
+        session.commit()
+        after = until
+    return repaired
+
+
+if __name__ == "__main__":
+    from ..session import session_scope
+
+    with session_scope() as session:
+        repaired_ids = reconcile_user_stats(session)
+    print(f"Repaired the counters of {len(repaired_ids)} users.")
@@ -0,0 +1,156 @@
+"""Define the helpers for routing read-only requests to the read replica.
+
+Writes always go to the primary. A user who just wrote is pinned to the
+primary for ``DB_READ_YOUR_WRITES_SECONDS``, such that their following reads
+see their own writes even if the replica lags behind. The pin is carried by the
+client, in the signed ``primary_pin`` cookie, so it is honoured by whichever
+worker serves the next read.
+"""
+
+# mypy: ignore-errors
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+from typing import Optional
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from ..configs import get_settings
+from ..utils.metrics import Counter, Gauge
+
+settings = get_settings()
+logger = logging.getLogger(settings.PROJECT_SLUG)
+
+REPLICA_LAG_SECONDS = Gauge(
+    "db_replica_lag_seconds", "Replication lag of the read replica in seconds."
+)
+PRIMARY_PINS = Counter(
+    "db_primary_pins_total", "Writes which pinned their user to the primary."
+)
+# cookie carrying the pin of the user
+PIN_COOKIE = "primary_pin"
+
+# the lag is 0 if the replica replayed everything it received, otherwise the
+# time since the last replayed transaction.
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "END"
+)
+
+
+class PrimaryPins:
+    """Issue and check the pins of the users to the primary.
+
+    A pin is the expiry time of the pin, signed together with the username, so
+    it is checked without any state shared by the workers.
+
+    Args:
+        window (float): the seconds a user is pinned after a write.
+        secret (str): the key signing the pins, the same in all the workers.
+    """
+
+    def __init__(self, window: float, secret: str):
+        self.window = window
+        self._secret = secret.encode()
+
+    def _sign(self, key: str, expiry: str) -> str:
+        message = f"{key}\n{expiry}".encode()
+        return hmac.new(self._secret, message, hashlib.sha256).hexdigest()
+
+    def pin(self, key: str) -> str:
+        """Pin the given user to the primary for the configured window.
+
+        Args:
+            key (str): the username.
+
+        Returns:
+            str: the pin, for the `PIN_COOKIE` cookie.
+        """
+        expiry = f"{time.time() + self.window:.3f}"
+        PRIMARY_PINS.inc()
+        return f"{expiry}.{self._sign(key, expiry)}"
+
+    def is_pinned(self, key: Optional[str], pin: Optional[str]) -> bool:
+        """Check whether the given user has to read from the primary.
+
+        Args:
+            key (Optional[str]): the username, None if not authenticated.
+            pin (Optional[str]): the pin sent by the client, if any.
+
+        Returns:
+            bool: whether the pin is valid for the user and not expired.
+        """
+        if key is None or not pin:
+            return False
+        expiry, _, signature = pin.rpartition(".")
+        if not hmac.compare_digest(signature, self._sign(key, expiry)):
+            return False
+        try:
+            return float(expiry) > time.time()
+        except ValueError:
+            return False
+
+
+pins = PrimaryPins(settings.DB_READ_YOUR_WRITES_SECONDS, settings.SECRET_KEY)
+
+
+class PrimarySession(Session):
+    """Session of the primary database, which pins the authenticated user
+    (``info["username"]``) to the primary after committing a write, passing
+    the pin to ``info["on_pin"]``, e.g. to set the cookie of the response."""
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def _mark_flush(session, flush_context):
+    session.info["has_writes"] = True
+
+
+@event.listens_for(PrimarySession, "do_orm_execute")
+def _mark_dml(orm_execute_state):
+    state = orm_execute_state
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["has_writes"] = True
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _pin_writer(session):
+    on_pin = session.info.get("on_pin")
+    if session.info.pop("has_writes", False) and on_pin is not None:
+        on_pin(pins.pin(session.info["username"]))
+
+
+@event.listens_for(PrimarySession, "after_soft_rollback")
+def _forget_writes(session, previous_transaction):
+    session.info.pop("has_writes", None)
+
+
+async def measure_replica_lag(bind) -> float:
+    """Measure the replication lag of the replica.
+
+    Args:
+        bind (AsyncEngine): the engine of the replica.
+
+    Returns:
+        float: the lag in seconds.
+    """
+    async with bind.connect() as connection:
+        result = await connection.execute(REPLICA_LAG_QUERY)
+        return float(result.scalar() or 0)
+
+
+async def monitor_replica_lag(bind, interval: float) -> None:
+    """Measure the replication lag every `interval` seconds and keep it in the
+    `REPLICA_LAG_SECONDS` gauge, until cancelled.
+
+    Args:
+        bind (AsyncEngine): the engine of the replica.
+        interval (float): seconds between two measurements.
+    """
+    while True:
+        try:
+            REPLICA_LAG_SECONDS.set(await measure_replica_lag(bind))
+        except Exception:
+            logger.exception("Measuring the replica lag failed.")
+        await asyncio.sleep(interval)
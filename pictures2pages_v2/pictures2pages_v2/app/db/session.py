@@ -1,16 +1,202 @@
 """Define a session instance for doing all database related operations inside
-the app."""
+the app.
+
+Two engines are provided: the synchronous ``engine``/``SessionLocal`` pair for
+scripts and sync code paths, and the asyncpg based ``async_engine``/
+``AsyncSessionLocal`` pair used by the ``async def`` endpoints, so that DB I/O
+does not block the event loop. ``ReplicaSessionLocal`` is used for read-only
+requests and is bound to the read replica, when one is configured.
+
+The time spent executing the statements of each engine is recorded in
+``QUERY_DURATION_SECONDS``, and the failed statements are counted in
+``QUERY_ERRORS``, by pool and statement type."""
 
 # mypy: ignore-errors
-from sqlalchemy import create_engine
+import time
+from typing import Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
-from contextlib import contextmanager
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from contextlib import asynccontextmanager, contextmanager
 from ..configs import get_settings
+from ..utils.metrics import Counter, Histogram
+from .replica import PrimarySession
 
 settings = get_settings()
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a connection from the pool.",
+    labelnames=("pool",),
+)
+QUERY_DURATION_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "Time spent executing DB statements, by pool and statement type, e.g. SELECT.",
+    labelnames=("pool", "statement"),
+)
+QUERY_ERRORS = Counter(
+    "db_query_errors_total",
+    "DB statements which failed, by pool and statement type.",
+    labelnames=("pool", "statement"),
+)
+# the statement types labelled as such, the others are labelled OTHER
+STATEMENT_TYPES = frozenset(("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"))
+
+
+class _TimedCheckoutMixin:
+    """Record how long each checkout waits for a connection in
+    ``POOL_WAIT_SECONDS``, labeled with the pool logging name."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT_SECONDS.labels(self.logging_name).observe(
+                time.perf_counter() - start
+            )
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    # keep the pool log records in the sqlalchemy logger namespace
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.QueuePool"
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+
+def _statement_type(statement: str) -> str:
+    verb = statement.lstrip()[:6].upper()
+    if verb.startswith("WITH"):
+        return "WITH"
+    return verb if verb in STATEMENT_TYPES else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    QUERY_DURATION_SECONDS.labels(
+        conn.engine.pool.logging_name, _statement_type(statement)
+    ).observe(elapsed)
+
+
+def _handle_error(context):
+    # after_cursor_execute is not called for a failed statement
+    conn = context.connection
+    if conn is None or not conn.info.get("query_start_time"):
+        return
+    conn.info["query_start_time"].pop()
+    QUERY_ERRORS.labels(
+        conn.engine.pool.logging_name, _statement_type(context.statement or "")
+    ).inc()
+
+
+def instrument_queries(bind: Engine) -> None:
+    """Record the execution time and the failures of the statements of an
+    engine.
+
+    Args:
+        bind (Engine): the engine, for an async engine its sync_engine.
+    """
+    event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+    event.listen(bind, "after_cursor_execute", _after_cursor_execute)
+    event.listen(bind, "handle_error", _handle_error)
+
+
+def get_engine_options(
+    settings, is_async: bool = False, pool_name: Optional[str] = None
+) -> dict:
+    """Build the keyword arguments for creating an engine from the settings.
+
+    Args:
+        settings (Settings): the used settings instance.
+        is_async (bool): whether the options are for the asyncpg engine.
+        pool_name (Optional[str]): the pool logging name, by default "async"
+            or "sync".
+
+    Returns:
+        dict: keyword arguments for `create_engine` or `create_async_engine`.
+    """
+    server_settings = {"application_name": settings.DB_APPLICATION_NAME}
+    if settings.DB_STATEMENT_TIMEOUT:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT)
+    if is_async:
+        connect_args = {"server_settings": server_settings}
+    else:
+        connect_args = {
+            "options": " ".join(f"-c {k}={v}" for k, v in server_settings.items())
+        }
+    return dict(
+        poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        pool_logging_name=pool_name or ("async" if is_async else "sync"),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, **get_engine_options(settings))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    settings.SQLALCHEMY_ASYNC_DATABASE_URI,
+    **get_engine_options(settings, is_async=True),
+)
+# objects are not expired on commit, since lazy refreshing an attribute is not
+# possible with an AsyncSession outside of an awaitable call.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+    sync_session_class=PrimarySession,
+)
+
+# read-only sessions use the replica if configured, otherwise the primary.
+replica_engine = None
+if settings.SQLALCHEMY_REPLICA_DATABASE_URI:
+    replica_engine = create_async_engine(
+        settings.SQLALCHEMY_REPLICA_DATABASE_URI,
+        **get_engine_options(settings, is_async=True, pool_name="replica"),
+    )
+if settings.METRICS_ENABLED:
+    instrument_queries(engine)
+    instrument_queries(async_engine.sync_engine)
+    if replica_engine is not None:
+        instrument_queries(replica_engine.sync_engine)
+ReplicaSessionLocal = async_sessionmaker(
+    bind=replica_engine or async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+def get_pool_status(bind: Engine) -> dict:
+    """Get the live statistics of the connection pool of an engine.
+
+    Args:
+        bind (Engine): the engine, for an async engine its sync_engine.
+
+    Returns:
+        dict: pool size, checked in/out connections, overflow and wait times.
+    """
+    pool = bind.pool
+    return {
+        "name": pool.logging_name,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "wait_seconds": POOL_WAIT_SECONDS.labels(pool.logging_name).snapshot(),
+    }
+
 
 @contextmanager
 def session_scope():
@@ -34,3 +220,26 @@ def session_scope():
         raise e
     finally:
         session.close()
+
+
+@asynccontextmanager
+async def async_session_scope():
+    """Provide an async transactional scope around a series of operations.
+
+    Yields:
+        sqlalchemy.ext.asyncio.AsyncSession: A local async SQLAlchemy session.
+
+    Examples:
+
+        >>> async with async_session_scope() as session:
+        ...    session.add(Table1(url="https://www.example.com"))
+    """
+    session = AsyncSessionLocal()
+    try:
+        yield session
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        raise e
+    finally:
+        await session.close()
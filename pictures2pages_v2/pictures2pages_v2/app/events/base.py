@@ -4,8 +4,14 @@ Please be aware that you can define multiple events and add them to the FastAPI
 instance, and the adding order decides the executing order.
 """
 
+import asyncio
 import logging
+from .. import globals
 from ..configs import get_settings
+from ..db.replica import monitor_replica_lag
+from ..db.session import replica_engine
+from ..utils.multiprocess import MetricsWriter
+from ..utils.tracing import get_exporter
 
 settings = get_settings()
 logger = logging.getLogger(settings.PROJECT_SLUG)
@@ -15,9 +21,28 @@ async def startup_handler() -> None:
     """Dummy startup event, it will be executed before the app is ready, such
     as loading ml model, creating superuser in DB etc."""
     logger.info("Starting up ...")
+    if replica_engine is not None:
+        globals.replica_lag_task = asyncio.create_task(
+            monitor_replica_lag(replica_engine, settings.DB_REPLICA_LAG_INTERVAL)
+        )
+    if settings.METRICS_MULTIPROC_DIR:
+        globals.metrics_writer = MetricsWriter(
+            settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_INTERVAL
+        )
+        globals.metrics_writer.start()
 
 
 async def shutdown_handler() -> None:
     """Dummy shutdown event, it will be executed before the app is shutting
     down, such as removing temporary files, close DB connection etc."""
     logger.info("Shutting down ...")
+    if globals.replica_lag_task is not None:
+        globals.replica_lag_task.cancel()
+        globals.replica_lag_task = None
+    if globals.metrics_writer is not None:
+        await asyncio.to_thread(globals.metrics_writer.stop)
+        globals.metrics_writer = None
+    exporter = get_exporter()
+    if exporter is not None:
+        # export the queued traces
+        await asyncio.to_thread(exporter.shutdown)
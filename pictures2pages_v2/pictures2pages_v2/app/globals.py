@@ -3,3 +3,8 @@
 When you need to change the global variable's value in some functions, please
 remember to use `global your_global_var` before assigning new values.
 """
+
+# background task measuring the lag of the read replica, if one is configured
+replica_lag_task = None
+# writer of the metrics of the worker, with several workers
+metrics_writer = None
@@ -1 +1,5 @@
-from .logging import log_time
+from .compression import CompressionMiddleware
+from .logging import LogTimeMiddleware
+from .metrics import MetricsMiddleware
+from .profiling import ProfilerMiddleware
+from .tracing import TracingMiddleware
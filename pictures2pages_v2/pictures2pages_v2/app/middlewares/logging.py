@@ -1,9 +1,9 @@
-"""Define logging related middleware functions."""
+"""Define logging related middlewares."""
 
 import logging
 import time
-from fastapi import Request, Response
-from typing import Callable
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from ..configs import get_settings
 from ..utils.logging import request_msg_format, get_request_msg_args
 
@@ -11,25 +11,51 @@ settings = get_settings()
 logger = logging.getLogger(settings.PROJECT_SLUG)
 
 
-async def log_time(request: Request, call_next: Callable) -> Response:
-    """Middleware function for logging the processing time of the request.
+class LogTimeMiddleware:
+    """ASGI middleware logging the processing time of each http request.
 
-    It's used as an example for showing people how to define middleware
-    functions and add them to the FastAPI instance.
-
-    Args:
-        request (Request): incoming request to API service.
-        call_next (Callable): the corresponding endpoint function
-
-    Returns:
-        Response: a json response returned by the endpoint function.
+    The time is measured with a monotonic clock, from receiving the request to
+    sending the last chunk of the response body. The messages of the response
+    are passed on as they come, so streamed responses are neither buffered nor
+    delayed, and no extra task is spawned per request, unlike with a
+    ``BaseHTTPMiddleware``. A request failing with an exception is logged as
+    500 Internal Server Error.
     """
-    start_time = time.time()
-
-    response = await call_next(request)
-
-    process_time = (time.time() - start_time) * 1000
-    args = get_request_msg_args(request, response, process_time)
-    logger.info(request_msg_format, *args)
 
-    return response
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+        logged = False
+
+        def log() -> None:
+            nonlocal logged
+            logged = True
+            process_time = (time.perf_counter() - start_time) * 1000
+            args = get_request_msg_args(Request(scope), status_code, process_time)
+            logger.info(request_msg_format, *args)
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                log()
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            if not logged:
+                log()
@@ -0,0 +1,68 @@
+"""Define the middleware collecting the metrics of the http requests."""
+
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..utils.metrics import DEFAULT_BUCKETS, Counter, Gauge, Histogram
+
+# route label of the requests not matching any route, e.g. 404 Not Found
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being processed by this worker.",
+)
+HTTP_REQUESTS_TOTAL = Counter(
+    "http_requests_total",
+    "Requests processed, by method, route template and status code.",
+    labelnames=("method", "route", "status"),
+)
+HTTP_REQUEST_DURATION_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the end of its response, by "
+    "method, route template and status code.",
+    labelnames=("method", "route", "status"),
+    buckets=(*DEFAULT_BUCKETS, 30.0, 60.0),
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting and timing the http requests.
+
+    The requests are labelled with the path template of their route, e.g.
+    ``/api/v1/content/{content_id}``, such that the number of label values is
+    bounded whatever the paths requested. The route is known once the request
+    was routed, so the labels are read after the response. A request failing
+    with an exception is recorded as 500 Internal Server Error.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            labels = (scope["method"], route, str(status_code))
+            HTTP_REQUESTS_TOTAL.labels(*labels).inc()
+            HTTP_REQUEST_DURATION_SECONDS.labels(*labels).observe(
+                time.perf_counter() - start_time
+            )
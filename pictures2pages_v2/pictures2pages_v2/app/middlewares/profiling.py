@@ -0,0 +1,111 @@
+"""Define the middleware profiling single requests, for development."""
+
+import logging
+import random
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..configs import get_settings
+from ..utils.profiling import SamplingProfiler
+from ..utils.tracing import current_trace
+
+settings = get_settings()
+logger = logging.getLogger(settings.PROJECT_SLUG)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# header of the response naming the written profile
+PROFILE_FILE_HEADER = "X-Profile-File"
+_UNSAFE_RE = re.compile(r"[^A-Za-z0-9_-]+")
+
+
+def _slug(value: str) -> str:
+    return _UNSAFE_RE.sub("_", value).strip("_")[:64]
+
+
+class ProfilerMiddleware:
+    """ASGI middleware profiling the requests with the ``header`` set to a
+    non-empty value, e.g. ``X-Profile: 1``, and a ``sample_rate`` fraction of
+    the other requests.
+
+    The profile is written to ``directory`` after the response was sent, named
+    after the time, the route template and the id of the request, i.e. its
+    ``X-Request-ID`` header, or else the id of its trace. The response tells
+    the file name in the ``X-Profile-File`` header. The middleware is only
+    added with ``PROFILER_ENABLED``, so it costs nothing otherwise.
+
+    Args:
+        app (ASGIApp): the wrapped application.
+        directory (str): the directory of the profiles.
+        header (str): the header of the requests to profile.
+        sample_rate (float): the fraction of the requests profiled without the
+            header.
+        profiler_factory (Callable[[], Any]): builds the profiler of a
+            request, see `app.utils.profiling`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        directory: str,
+        header: str = "X-Profile",
+        sample_rate: float = 0.0,
+        profiler_factory: Callable[[], Any] = SamplingProfiler,
+    ):
+        self.app = app
+        self.directory = Path(directory)
+        self.header = header
+        self.sample_rate = sample_rate
+        self.profiler_factory = profiler_factory
+
+    def should_profile(self, scope: Scope) -> bool:
+        """Whether to profile a request, from its header or by sampling."""
+        if Headers(scope=scope).get(self.header):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def profile_name(self, scope: Scope, suffix: str) -> str:
+        """Build the file name of the profile of a routed request."""
+        request_id = _slug(Headers(scope=scope).get(REQUEST_ID_HEADER, ""))
+        trace = current_trace.get()
+        if not request_id:
+            request_id = trace.trace_id if trace is not None else uuid.uuid4().hex
+        route = getattr(scope.get("route"), "path", None)
+        route = _slug(route) if route else "unmatched"
+        timestamp = time.strftime("%Y%m%dT%H%M%S")
+        return f"{timestamp}-{scope['method']}-{route}-{request_id}{suffix}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = self.profiler_factory()
+        if not profiler.start():
+            logger.warning("Request not profiled, another profile is running")
+            await self.app(scope, receive, send)
+            return
+
+        name: Optional[str] = None
+
+        async def send_with_profile(message: Message) -> None:
+            nonlocal name
+            if message["type"] == "http.response.start":
+                name = self.profile_name(scope, profiler.suffix)
+                MutableHeaders(scope=message).append(PROFILE_FILE_HEADER, name)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profiler.stop()
+            if name is None:
+                name = self.profile_name(scope, profiler.suffix)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / name
+            await run_in_threadpool(profiler.write, str(path))
+            logger.info("Profile written to %s", path)
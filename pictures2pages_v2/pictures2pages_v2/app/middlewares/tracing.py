@@ -0,0 +1,71 @@
+"""Define the middleware tracing the stages of the http requests."""
+
+import time
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..utils.tracing import BatchExporter, Trace, current_trace
+
+
+class TracingMiddleware:
+    """ASGI middleware starting a trace for each http request.
+
+    The stages timed with `app.utils.tracing.span` while handling the request
+    are returned in the ``Server-Timing`` header, e.g.
+    ``caption_1;dur=812.4, generate;dur=2310.7``, and the finished trace is
+    queued for export. The response body is passed on as it comes.
+
+    Args:
+        app (ASGIApp): the wrapped application.
+        server_timing (bool): whether to add the ``Server-Timing`` header.
+        exporter (Optional[BatchExporter]): the exporter of the traces, None
+            if the traces are not exported.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        server_timing: bool = True,
+        exporter: Optional[BatchExporter] = None,
+    ):
+        self.app = app
+        self.server_timing = server_timing
+        self.exporter = exporter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(scope["method"], Headers(scope=scope).get("traceparent"))
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing and trace.spans:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        token = current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            current_trace.reset(token)
+            root = trace.root
+            root.end = time.perf_counter()
+            root.error = status_code >= 500
+            route = getattr(scope.get("route"), "path", None)
+            if route is not None:
+                root.name = f"{scope['method']} {route}"
+                root.set_attribute("http.route", route)
+            root.set_attribute("http.request.method", scope["method"])
+            root.set_attribute("url.path", scope["path"])
+            root.set_attribute("http.response.status_code", status_code)
+            if self.exporter is not None:
+                self.exporter.submit(trace)
@@ -1,8 +1,9 @@
 """Define response model for the endpoint version."""
 
-from pydantic import BaseModel, Field, EmailStr  # type: ignore
-from typing import Optional
+from pydantic import BaseModel, Field, EmailStr, conlist  # type: ignore
+from typing import List, Optional
 from datetime import datetime
+from ..constants import MAX_BULK_SIZE
 
 
 # 🎯 Version endpoint
@@ -68,6 +69,130 @@ class GeneratedContentResponse(BaseModel):
         orm_mode = True
 
 
+class GeneratedContentSummary(BaseModel):
+    """
+    Slim response model for listing stories or poems, without the text body,
+    the captions and the other image URLs.
+    The full item is fetched from /content/{content_id}.
+    Feature: Browsing poems and stories.
+    """
+
+    id: int
+    title: str
+    created_at: datetime
+    is_story: bool
+    thumbnail: str
+
+    class Config:
+        orm_mode = True
+
+
+class FeedItem(GeneratedContentSummary):
+    """
+    Response model for an item of the global feed of public content.
+    Feature: Browsing poems and stories.
+    """
+
+    owner_id: int
+    owner_username: str
+
+
+class SearchResult(GeneratedContentSummary):
+    """
+    Response model for a full text search result, with its relevance.
+    Feature: Searching poems and stories.
+    """
+
+    rank: float
+
+
+# 📄 Page schemas for the cursor paginated listings
+class ImagePage(BaseModel):
+    """
+    Response model for a page of images.
+    `next_cursor` is passed as `cursor` to get the next page, it is None on
+    the last page.
+    Feature: Browsing images.
+    """
+
+    items: List[ImageResponse]
+    next_cursor: Optional[str] = None
+
+
+class GeneratedContentPage(BaseModel):
+    """
+    Response model for a page of stories or poems.
+    `next_cursor` is passed as `cursor` to get the next page, it is None on
+    the last page.
+    Feature: Browsing poems and stories.
+    """
+
+    items: List[GeneratedContentResponse]
+    next_cursor: Optional[str] = None
+
+
+class GeneratedContentSummaryPage(BaseModel):
+    """
+    Response model for a page of story or poem summaries.
+    Feature: Browsing poems and stories.
+    """
+
+    items: List[GeneratedContentSummary]
+    next_cursor: Optional[str] = None
+
+
+class SearchPage(BaseModel):
+    """
+    Response model for a page of search results, most relevant first.
+    Feature: Searching poems and stories.
+    """
+
+    items: List[SearchResult]
+    next_cursor: Optional[str] = None
+
+
+class FeedPage(BaseModel):
+    """
+    Response model for a page of the global feed.
+    Feature: Browsing poems and stories.
+    """
+
+    items: List[FeedItem]
+    next_cursor: Optional[str] = None
+
+
+# 📦 Bulk schemas for changing many stories or poems at once
+class BulkVisibilityRequest(BaseModel):
+    """
+    Request model for setting the visibility of many items.
+    Feature: Curating a library of poems and stories.
+    """
+
+    ids: conlist(int, min_items=1, max_items=MAX_BULK_SIZE)  # type: ignore
+    is_public: bool
+
+
+class BulkDeleteRequest(BaseModel):
+    """
+    Request model for deleting many items.
+    Feature: Curating a library of poems and stories.
+    """
+
+    ids: conlist(int, min_items=1, max_items=MAX_BULK_SIZE)  # type: ignore
+
+
+class BulkResponse(BaseModel):
+    """
+    Response model of the bulk endpoints.
+    `affected` are the changed ids, `not_affected` the ids which do not exist,
+    are not owned by the user or already have the requested visibility.
+    Feature: Curating a library of poems and stories.
+    """
+
+    affected: List[int]
+    not_affected: List[int]
+
+
 # 👤 User schemas for registration and profile responses
 class UserBase(BaseModel):
     """
@@ -80,6 +205,22 @@ class UserBase(BaseModel):
     email: str
 
 
+class UserStatsResponse(BaseModel):
+    """
+    Response model for the numbers of images and content of a user.
+    Feature: User profile information.
+    """
+
+    images: int = 0
+    public_images: int = 0
+    stories: int = 0
+    poems: int = 0
+    public_contents: int = 0
+
+    class Config:
+        orm_mode = True
+
+
 class UserCreate(UserBase):
     """
     Attributes required to create a new user.
@@ -92,6 +233,78 @@ class UserCreate(UserBase):
     password: str
 
 
+# 🩺 Internal schemas for operating the service
+class HistogramBucket(BaseModel):
+    """
+    Cumulative count of observations less than or equal to the bound `le`.
+    """
+
+    le: float
+    count: int
+
+
+class HistogramSnapshot(BaseModel):
+    """
+    Snapshot of a histogram metric.
+    Feature: Service observability.
+    """
+
+    buckets: List[HistogramBucket]
+    count: int
+    sum: float
+
+
+class PoolStatus(BaseModel):
+    """
+    Live statistics of one DB connection pool.
+    Feature: Service observability.
+    """
+
+    name: str
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    max_overflow: int
+    wait_seconds: HistogramSnapshot
+
+
+class PoolStatusResponse(BaseModel):
+    """
+    Response model for the /internal/db-pool endpoint.
+    Feature: Service observability.
+    """
+
+    pools: List[PoolStatus]
+
+
+class ReplicaStatusResponse(BaseModel):
+    """
+    Response model for the /internal/db-replica endpoint.
+    Feature: Service observability.
+    """
+
+    enabled: bool
+    lag_seconds: float
+    primary_pins: int
+
+
+class ResponseCacheStatusResponse(BaseModel):
+    """
+    Response model for the /internal/response-cache endpoint.
+    Feature: Service observability.
+    """
+
+    enabled: bool
+    shared: bool
+    hits: int
+    misses: int
+    hit_ratio: float
+    entries: int
+    bytes: int
+    max_bytes: int
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -0,0 +1,128 @@
+"""Run the API service with several worker processes.
+
+In production, the service runs with gunicorn managing uvicorn workers,
+configured by ``gunicorn_conf.py`` from the settings (the docker image picks it
+up)::
+
+    $ gunicorn -c gunicorn_conf.py main:app
+
+With ``PRELOAD_APP`` the application is imported once in the gunicorn master,
+and the forked workers share its memory copy-on-write. The application does
+not connect to the database on import, and `reset_db_pools` drops any
+connection a worker inherited, such that no connection is shared between
+processes. ``python main.py`` runs the workers with uvicorn instead, without
+preloading.
+
+The database migrations are not applied by the workers, ``scripts/prestart.sh``
+applies them once before the service starts.
+"""
+
+import os
+import tempfile
+from typing import Any, Dict, Optional
+from .configs import Settings
+from .utils.multiprocess import clear
+
+UVICORN_WORKER_CLASS = "uvicorn.workers.UvicornWorker"
+
+
+def get_workers(settings: Settings) -> int:
+    """Get the number of worker processes, by default the number of CPUs the
+    process may run on.
+
+    Args:
+        settings (Settings): the settings.
+
+    Returns:
+        int: the number of workers.
+    """
+    if settings.WORKERS:
+        return settings.WORKERS
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def gunicorn_options(settings: Settings) -> Dict[str, Any]:
+    """Build the gunicorn settings from the settings of the service.
+
+    Args:
+        settings (Settings): the settings.
+
+    Returns:
+        Dict[str, Any]: gunicorn settings by name, as in a config file.
+    """
+    return {
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": get_workers(settings),
+        "worker_class": UVICORN_WORKER_CLASS,
+        "keepalive": settings.KEEP_ALIVE,
+        "backlog": settings.BACKLOG,
+        "max_requests": settings.MAX_REQUESTS,
+        "max_requests_jitter": settings.MAX_REQUESTS_JITTER,
+        "graceful_timeout": settings.GRACEFUL_TIMEOUT,
+        "timeout": settings.WORKER_TIMEOUT,
+        "preload_app": settings.PRELOAD_APP,
+    }
+
+
+def uvicorn_options(settings: Settings) -> Dict[str, Any]:
+    """Build the keyword arguments of `uvicorn.run` from the settings.
+
+    uvicorn has no jitter for ``limit_max_requests`` and does not preload the
+    application.
+
+    Args:
+        settings (Settings): the settings.
+
+    Returns:
+        Dict[str, Any]: keyword arguments for `uvicorn.run`.
+    """
+    return {
+        "host": settings.HOST,
+        "port": settings.PORT,
+        "workers": get_workers(settings),
+        "timeout_keep_alive": settings.KEEP_ALIVE,
+        "backlog": settings.BACKLOG,
+        "limit_max_requests": settings.MAX_REQUESTS or None,
+        "timeout_graceful_shutdown": settings.GRACEFUL_TIMEOUT,
+        "reload": False,
+    }
+
+
+def reset_db_pools() -> None:
+    """Forget the DB connections inherited from the parent process, without
+    closing them, such that a forked worker opens its own connections."""
+    from .db.session import async_engine, engine, replica_engine
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    if replica_engine is not None:
+        replica_engine.sync_engine.dispose(close=False)
+
+
+def prepare_metrics_dir(settings: Settings, workers: int) -> Optional[str]:
+    """Prepare the directory the workers write their metrics to, such that the
+    metrics of all the workers are exposed, see `app.utils.multiprocess`.
+
+    With several workers and no ``METRICS_MULTIPROC_DIR``, a temporary one is
+    created and passed to the workers through the settings and the
+    environment. The snapshots of a previous run are removed.
+
+    Args:
+        settings (Settings): the settings, of the process forking the workers.
+        workers (int): the number of workers.
+
+    Returns:
+        Optional[str]: the directory, None with a single worker.
+    """
+    directory = settings.METRICS_MULTIPROC_DIR
+    if directory is None:
+        if workers <= 1:
+            return None
+        directory = tempfile.mkdtemp(prefix="metrics-")
+        settings.METRICS_MULTIPROC_DIR = directory
+        os.environ["METRICS_MULTIPROC_DIR"] = directory
+    os.makedirs(directory, exist_ok=True)
+    clear(directory)
+    return directory
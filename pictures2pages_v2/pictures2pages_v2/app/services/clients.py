@@ -0,0 +1,94 @@
+"""Provide the clients of the external services.
+
+The SDKs are slow to import and the clients slow to construct, so both happen
+on first use instead of at import time, which keeps the start of a worker
+fast. Each client is constructed once and reused, the boto3 and OpenAI clients
+are thread safe.
+
+boto3 has no per call timeout, the AWS clients time out after
+``AWS_CONNECT_TIMEOUT`` and ``AWS_READ_TIMEOUT``. The OpenAI calls get the time
+remaining before the deadline of their request, see `app.api.deadline`.
+
+The calls are timed with `observe_call`, by service, operation and outcome, in
+``EXTERNAL_CALL_DURATION_SECONDS``.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator
+from ..configs import get_settings
+from ..utils.metrics import DEFAULT_BUCKETS, Histogram
+
+settings = get_settings()
+
+S3_REGION = "eu-west-2"  # e.g., us-east-1
+
+EXTERNAL_CALL_DURATION_SECONDS = Histogram(
+    "external_call_duration_seconds",
+    "Time spent in the calls to the external services, by service, operation "
+    "and outcome, ok or error.",
+    labelnames=("service", "operation", "outcome"),
+    buckets=(*DEFAULT_BUCKETS, 30.0, 60.0),
+)
+
+
+@contextmanager
+def observe_call(service: str, operation: str) -> Iterator[None]:
+    """Time a call to an external service, e.g.
+    ``with observe_call("s3", "upload_fileobj"): ...``.
+
+    The call is recorded as an error if it raises, the exception propagates.
+
+    Args:
+        service (str): the service, e.g. "rekognition".
+        operation (str): the operation, e.g. "detect_labels".
+    """
+    start_time = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        EXTERNAL_CALL_DURATION_SECONDS.labels(service, operation, outcome).observe(
+            time.perf_counter() - start_time
+        )
+
+
+def _aws_options() -> dict:
+    from botocore.config import Config
+
+    return dict(
+        aws_access_key_id=os.getenv("AWS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        region_name=S3_REGION,
+        config=Config(
+            connect_timeout=settings.AWS_CONNECT_TIMEOUT,
+            read_timeout=settings.AWS_READ_TIMEOUT,
+        ),
+    )
+
+
+@lru_cache()
+def get_s3_client():
+    """Get the S3 client, constructed on the first call."""
+    import boto3
+
+    return boto3.client("s3", **_aws_options())
+
+
+@lru_cache()
+def get_rekognition_client():
+    """Get the Rekognition client, constructed on the first call."""
+    import boto3
+
+    return boto3.client("rekognition", **_aws_options())
+
+
+@lru_cache()
+def get_openai_client():
+    """Get the OpenAI client, constructed on the first call."""
+    from openai import OpenAI
+
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -0,0 +1,210 @@
+"""Define the caches of serialized responses.
+
+`LRUCache` is the bounded in-process cache of each worker: the least recently
+used entries are evicted once the entries take more than ``max_bytes``, and an
+entry expires ``ttl`` seconds after it was stored. `ResponseCache` puts it in
+front of an optional shared backend, such as `RedisBackend`, which is shared by
+all the workers; `LocalBackend` stands in for it in a single process.
+
+Entries are invalidated by group, e.g. all the cached listings of one user:
+each group has a generation which is part of the keys of its entries, and
+invalidating the group increments the generation, so its old entries are not
+found anymore and age out. An entry computed from data read before the
+invalidation is stored under the old generation, so it is never served after
+the invalidation.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# approximate memory of an entry besides its key and value
+ENTRY_OVERHEAD = 100
+
+
+class LRUCache:
+    """Least recently used cache of bytes, bounded by the size of the entries
+    in bytes, whose entries expire after `ttl` seconds."""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.size = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+
+    @staticmethod
+    def _entry_size(key: str, value: bytes) -> int:
+        return len(key) + len(value) + ENTRY_OVERHEAD
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get the value of a key, None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expiry = entry
+        if expiry <= self.clock():
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entries if needed.
+        A value larger than the whole cache is not stored."""
+        self.delete(key)
+        size = self._entry_size(key, value)
+        if size > self.max_bytes:
+            return
+        while self.size + size > self.max_bytes:
+            oldest_key, (oldest, _) = self._entries.popitem(last=False)
+            self.size -= self._entry_size(oldest_key, oldest)
+        expiry = self.clock() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (value, expiry)
+        self.size += size
+
+    def delete(self, key: str) -> None:
+        """Remove a key, if it is cached."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= self._entry_size(key, entry[0])
+
+    def clear(self) -> None:
+        """Remove all the entries."""
+        self._entries.clear()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LocalBackend:
+    """In-process stand-in of a shared backend, e.g. for a single worker or
+    the tests."""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.cache = LRUCache(max_bytes, ttl)
+        self.counters: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.cache.set(key, value, ttl)
+
+    async def get_counter(self, key: str) -> int:
+        return self.counters.get(key, 0)
+
+    async def incr(self, key: str) -> int:
+        self.counters[key] = self.counters.get(key, 0) + 1
+        return self.counters[key]
+
+
+class RedisBackend:
+    """Shared backend in redis, requires the redis package
+    (``pip install redis``)."""
+
+    def __init__(self, url: str):
+        import redis.asyncio
+
+        self.client = redis.asyncio.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(key, value, px=int(ttl * 1000))
+
+    async def get_counter(self, key: str) -> int:
+        return int(await self.client.get(key) or 0)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+
+class ResponseCache:
+    """Cache of serialized responses in the in-process `LRUCache`, in front of
+    an optional shared backend. Without a shared backend, the generations of
+    the groups are kept in the worker."""
+
+    def __init__(self, local: LRUCache, shared=None, prefix: str = "responses"):
+        self.local = local
+        self.shared = shared
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self._generations: Dict[str, int] = {}
+
+    def _generation_key(self, group: str) -> str:
+        return f"{self.prefix}:generation:{group}"
+
+    async def key(self, group: str, name: str) -> str:
+        """Get the key of an entry of a group, under the current generation of
+        the group.
+
+        Args:
+            group (str): the group, which is invalidated as a whole.
+            name (str): the name of the entry within the group.
+
+        Returns:
+            str: the key.
+        """
+        if self.shared is not None:
+            generation = await self.shared.get_counter(self._generation_key(group))
+        else:
+            generation = self._generations.get(group, 0)
+        return f"{self.prefix}:{group}:{generation}:{name}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get a cached value, from the local cache or the shared backend."""
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value = await self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        """Store a value in the local cache and the shared backend."""
+        self.local.set(key, value)
+        if self.shared is not None:
+            await self.shared.set(key, value, self.local.ttl)
+
+    async def invalidate(self, group: str) -> None:
+        """Invalidate all the entries of a group, in all the workers if there
+        is a shared backend."""
+        if self.shared is not None:
+            await self.shared.incr(self._generation_key(group))
+        else:
+            self._generations[group] = self._generations.get(group, 0) + 1
+
+    def clear(self) -> None:
+        """Remove the entries of the local cache and reset the statistics."""
+        self.local.clear()
+        self._generations.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        """Get the hit ratio and the memory use of the local cache.
+
+        Returns:
+            dict: hits, misses, hit ratio, entries, bytes and max bytes.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.local),
+            "bytes": self.local.size,
+            "max_bytes": self.local.max_bytes,
+        }
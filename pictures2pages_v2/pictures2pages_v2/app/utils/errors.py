@@ -1 +1,5 @@
 """Define customized Exception classes"""
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
@@ -3,7 +3,7 @@
 import logging
 import click
 from http import HTTPStatus
-from fastapi import Request, Response
+from fastapi import Request
 
 status_code_colors = {
     1: lambda code: click.style(str(code), fg="bright_white"),
@@ -16,23 +16,23 @@ request_msg_format = '%s:%d - "%s" %s - %.2fms'
 
 
 def get_request_msg_args(
-    request: Request, response: Response, process_time: float
+    request: Request, status_code: int, process_time: float
 ) -> tuple:
     """Format the message for processing a http request.
 
     Args:
         request (Request): http request.
-        response (Response): the corresponding response to the request.
+        status_code (int): the status code of the response to the request.
         process_time (float): process time for the http request.
 
     Returns:
         tuple: the requisite args to format the message
     """
     try:
-        response_status = HTTPStatus(response.status_code)
+        response_status = HTTPStatus(status_code)
         status = f"{response_status.value} {response_status.phrase}"
     except ValueError:
-        status = f"{response.status_code} Unknown Error"
+        status = f"{status_code} Unknown Error"
     method_path = (
         f"{request.method} {request.url.path} HTTP/{request.scope['http_version']}"
     )
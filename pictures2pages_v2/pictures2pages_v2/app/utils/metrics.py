@@ -0,0 +1,243 @@
+"""Define lightweight in-process metric types.
+
+The metrics are kept in memory of the running worker and registered in the
+module level ``REGISTRY``, such that they can be exposed through the API, e.g.
+in the Prometheus text format by `generate_latest`.
+"""
+
+import bisect
+import math
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# default histogram buckets in seconds
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Registry:
+    """Collection of all the defined metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, "Metric"] = {}
+
+    def register(self, metric: "Metric") -> None:
+        """Register a metric under its name.
+
+        Args:
+            metric (Metric): the metric to register.
+
+        Raises:
+            ValueError, if another metric with the same name exists.
+        """
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered.")
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional["Metric"]:
+        """Get a registered metric by its name."""
+        return self._metrics.get(name)
+
+    def collect(self) -> List["Metric"]:
+        """Get all the registered metrics."""
+        return list(self._metrics.values())
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    """Base class of the metrics, handling the label values.
+
+    A metric without label names is used directly, a metric with label names
+    has to be used through ``labels(*values)``, which returns the child metric
+    for the given label values.
+    """
+
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], "Metric"] = {}
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self) -> "Metric":
+        return self.__class__(self.name, self.documentation, registry=None)
+
+    def labels(self, *values) -> "Metric":
+        """Get the child metric for the given label values.
+
+        Args:
+            *values: label values, in the same order as the label names.
+
+        Returns:
+            Metric: the child metric.
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"Expected label values for {self.labelnames}.")
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self) -> List[Tuple[Tuple[str, ...], "Metric"]]:
+        """Get the (label values, metric) pairs holding the actual values."""
+        if self.labelnames:
+            return list(self._children.items())
+        return [((), self)]
+
+
+class Counter(Metric):
+    """A monotonically increasing value."""
+
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        """Increase the counter by the given amount."""
+        with self._lock:
+            self.value += amount
+
+
+class Gauge(Metric):
+    """A value which can go up and down."""
+
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        """Set the gauge to the given value."""
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        """Increase the gauge by the given amount."""
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        """Decrease the gauge by the given amount."""
+        with self._lock:
+            self.value -= amount
+
+
+class Histogram(Metric):
+    """Count observed values in buckets, each bucket counts the values less
+    than or equal to its upper bound."""
+
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def _new_child(self) -> "Histogram":
+        return Histogram(
+            self.name, self.documentation, buckets=self.buckets, registry=None
+        )
+
+    def observe(self, value: float) -> None:
+        """Observe the given value."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.bucket_counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> dict:
+        """Get the cumulative bucket counts, the count and the sum.
+
+        Returns:
+            dict: the current state of the histogram.
+        """
+        cumulative = []
+        total = 0
+        for upper_bound, count in zip(self.buckets, self.bucket_counts):
+            total += count
+            cumulative.append({"le": upper_bound, "count": total})
+        return {"buckets": cumulative, "count": self.count, "sum": self.sum}
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = (
+        '{}="{}"'.format(
+            name, value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+def generate_latest(registry: Registry = REGISTRY) -> str:
+    """Render the metrics of a registry in the Prometheus text format.
+
+    Args:
+        registry (Registry): the registry, by default the module one.
+
+    Returns:
+        str: the exposition, version 0.0.4 of the format.
+    """
+    lines = []
+    for metric in registry.collect():
+        documentation = metric.documentation.replace("\\", r"\\").replace("\n", r"\n")
+        lines.append(f"# HELP {metric.name} {documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for values, child in metric.samples():
+            if not isinstance(child, Histogram):
+                labels = _format_labels(metric.labelnames, values)
+                lines.append(f"{metric.name}{labels} {_format_value(child.value)}")
+                continue
+            with child._lock:
+                bucket_counts = list(child.bucket_counts)
+                count, total = child.count, child.sum
+            names = (*metric.labelnames, "le")
+            cumulative = 0
+            for bound, bucket_count in zip((*child.buckets, math.inf), bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(names, (*values, _format_value(bound)))
+                lines.append(f"{metric.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(metric.labelnames, values)
+            lines.append(f"{metric.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{metric.name}_count{labels} {count}")
+    return "\n".join(lines) + "\n"
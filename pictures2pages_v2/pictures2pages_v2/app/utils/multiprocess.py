@@ -0,0 +1,216 @@
+"""Combine the metrics of the worker processes of the service.
+
+Each worker keeps its metrics in its own memory, see `app.utils.metrics`, so a
+scrape answered by one worker would only see a part of the traffic. With
+``METRICS_MULTIPROC_DIR``, every worker writes a snapshot of its metrics to
+``<pid>.json`` in the directory every ``METRICS_FLUSH_INTERVAL`` seconds, see
+`MetricsWriter`, and ``/internal/metrics`` combines the snapshots of all the
+workers, see `collect`: the counters and the histograms are summed, and the
+gauges get a ``pid`` label. The series of the other workers are up to the
+interval old.
+
+When a worker exits, the gunicorn master calls `mark_process_dead`, which adds
+its counters and histograms to ``archive.json`` and drops its gauges, such
+that the counters do not go back when a worker is replaced.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+from ..configs import get_settings
+from .metrics import REGISTRY, Counter, Gauge, Histogram, Registry
+
+settings = get_settings()
+logger = logging.getLogger(settings.PROJECT_SLUG)
+
+ARCHIVE = "archive"
+
+
+def snapshot(registry: Registry = REGISTRY) -> dict:
+    """Get the state of the metrics of a registry, as JSON compatible values.
+
+    Args:
+        registry (Registry): the registry, by default the module one.
+
+    Returns:
+        dict: the type, documentation, label names and samples of each metric
+        by name, and the buckets of the histograms.
+    """
+    metrics = {}
+    for metric in registry.collect():
+        samples = []
+        for values, child in metric.samples():
+            if isinstance(child, Histogram):
+                with child._lock:
+                    value = [list(child.bucket_counts), child.count, child.sum]
+            else:
+                value = child.value
+            samples.append([list(values), value])
+        metrics[metric.name] = {
+            "type": metric.type,
+            "documentation": metric.documentation,
+            "labelnames": list(metric.labelnames),
+            "samples": samples,
+        }
+        if isinstance(metric, Histogram):
+            metrics[metric.name]["buckets"] = list(metric.buckets)
+    return metrics
+
+
+def _new_metric(name: str, data: dict, registry: Registry):
+    labelnames = data["labelnames"]
+    if data["type"] == "counter":
+        return Counter(name, data["documentation"], labelnames, registry=registry)
+    if data["type"] == "gauge":
+        return Gauge(
+            name, data["documentation"], (*labelnames, "pid"), registry=registry
+        )
+    return Histogram(
+        name,
+        data["documentation"],
+        labelnames,
+        buckets=data["buckets"],
+        registry=registry,
+    )
+
+
+def merge(snapshots: Iterable[Tuple[str, dict]]) -> Registry:
+    """Combine the snapshots of several processes into a new registry.
+
+    Args:
+        snapshots (Iterable[Tuple[str, dict]]): the pid and the `snapshot` of
+            each process.
+
+    Returns:
+        Registry: the registry of the combined metrics.
+    """
+    registry = Registry()
+    for pid, metrics in snapshots:
+        for name, data in metrics.items():
+            metric = registry.get(name) or _new_metric(name, data, registry)
+            for values, value in data["samples"]:
+                if data["type"] == "gauge":
+                    values = [*values, pid]
+                child = metric.labels(*values) if metric.labelnames else metric
+                if data["type"] == "gauge":
+                    child.set(value)
+                elif data["type"] == "counter":
+                    child.inc(value)
+                else:
+                    bucket_counts, count, total = value
+                    with child._lock:
+                        for index, bucket_count in enumerate(bucket_counts):
+                            child.bucket_counts[index] += bucket_count
+                        child.count += count
+                        child.sum += total
+    return registry
+
+
+def _write(path: Path, metrics: dict) -> None:
+    # replaced at once, such that a reader never sees a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+        json.dump(metrics, tmp_file)
+    os.replace(tmp_path, path)
+
+
+def _read(path: Path) -> dict:
+    with path.open(encoding="utf-8") as metrics_file:
+        return json.load(metrics_file)
+
+
+def write_snapshot(
+    directory: str, registry: Registry = REGISTRY, pid: Optional[int] = None
+) -> None:
+    """Write the snapshot of the metrics of this process to the directory.
+
+    Args:
+        directory (str): the directory of the snapshots.
+        registry (Registry): the registry, by default the module one.
+        pid (Optional[int]): the pid naming the file, by default this one.
+    """
+    _write(Path(directory) / f"{pid or os.getpid()}.json", snapshot(registry))
+
+
+def collect(directory: str) -> Registry:
+    """Combine the snapshots of the directory, i.e. of the running workers and
+    of the archive of the exited ones.
+
+    Args:
+        directory (str): the directory of the snapshots.
+
+    Returns:
+        Registry: the registry of the combined metrics.
+    """
+    paths = sorted(Path(directory).glob("*.json"))
+    return merge((path.stem, _read(path)) for path in paths)
+
+
+def mark_process_dead(directory: str, pid: int) -> None:
+    """Add the counters and histograms of an exited worker to the archive, and
+    drop its snapshot.
+
+    Args:
+        directory (str): the directory of the snapshots.
+        pid (int): the pid of the worker.
+    """
+    path = Path(directory) / f"{pid}.json"
+    if not path.exists():
+        return
+    dead = {name: data for name, data in _read(path).items() if data["type"] != "gauge"}
+    archive_path = Path(directory) / f"{ARCHIVE}.json"
+    archive = _read(archive_path) if archive_path.exists() else {}
+    _write(archive_path, snapshot(merge([(ARCHIVE, archive), (str(pid), dead)])))
+    path.unlink()
+
+
+def clear(directory: str) -> None:
+    """Remove the snapshots of a previous run of the service."""
+    for path in Path(directory).glob("*.json"):
+        path.unlink()
+
+
+class MetricsWriter:
+    """Write the snapshot of the metrics of this worker from a background
+    thread, every ``interval`` seconds and once more when stopped.
+
+    Args:
+        directory (str): the directory of the snapshots.
+        interval (float): the seconds between two snapshots.
+    """
+
+    def __init__(self, directory: str, interval: float):
+        self.directory = directory
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Write a first snapshot and start the thread."""
+        self._write()
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread and write the last snapshot."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._write()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._write()
+
+    def _write(self) -> None:
+        try:
+            write_snapshot(self.directory)
+        except OSError as e:
+            logger.warning("Failed to write the metrics to %s: %s", self.directory, e)
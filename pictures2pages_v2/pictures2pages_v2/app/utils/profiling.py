@@ -0,0 +1,150 @@
+"""Profile single requests, for development and staging.
+
+Two profilers are provided, with the same ``start``/``stop``/``write``
+interface:
+
+* `SamplingProfiler` samples the Python stacks of all the threads every
+  ``interval`` seconds, i.e. the event loop and the threadpool running the
+  blocking calls, and writes them in the folded format of ``flamegraph.pl``,
+  which speedscope and inferno read as well::
+
+      $ flamegraph.pl data/profiles/<profile>.folded > profile.svg
+
+  The overhead does not depend on the code profiled, and the idle threads of
+  the threadpool are left out. Other requests handled at the same time are
+  sampled too.
+* `DeterministicProfiler` records every call of the event loop thread with
+  cProfile and writes them in the pstats format, e.g. for snakeviz or
+  flameprof. It profiles the whole event loop while the request runs: the
+  coroutines of the other requests handled at the same time are recorded too,
+  and the blocking calls run in the threadpool are not, only the wait for
+  them. It slows all these requests down. cProfile profiles one thread once,
+  so the requests arriving during a profile are not profiled themselves.
+"""
+
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+from functools import partial
+from typing import Any, Callable, Optional
+
+# cProfile cannot run twice on the event loop thread
+_deterministic_lock = threading.Lock()
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+def _is_idle(frame) -> bool:
+    """Whether a thread waits for work, e.g. a worker of the threadpool."""
+    caller = frame.f_back
+    if caller is None or frame.f_code.co_name != "wait":
+        return False
+    if not frame.f_code.co_filename.endswith("threading.py"):
+        return False
+    if caller.f_code.co_name != "get":
+        return False
+    return caller.f_code.co_filename.endswith("queue.py")
+
+
+def fold_stack(frame, thread_name: str) -> str:
+    """Fold the stack of a frame, from the outermost call, e.g.
+    ``MainThread;run (main.py:1);handler (base.py:10)``."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """Sample the stacks of the threads from a background thread.
+
+    Args:
+        interval (float): the seconds between two samples.
+    """
+
+    suffix = ".folded"
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        """Start sampling, returns whether the profiler started."""
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or _is_idle(frame):
+                    continue
+                self.stacks[fold_stack(frame, names.get(ident, str(ident)))] += 1
+
+    def write(self, path: str) -> None:
+        """Write the sampled stacks, one ``<stack> <samples>`` line each."""
+        with open(path, "w", encoding="utf-8") as profile_file:
+            for stack, samples in self.stacks.most_common():
+                profile_file.write(f"{stack} {samples}\n")
+
+
+class DeterministicProfiler:
+    """Record the calls of the current thread with cProfile, i.e. of all the
+    coroutines run by the event loop during the profile."""
+
+    suffix = ".prof"
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self) -> bool:
+        """Start profiling, returns False if a profile is already running."""
+        if not _deterministic_lock.acquire(blocking=False):
+            return False
+        self.profile.enable()
+        return True
+
+    def stop(self) -> None:
+        """Stop profiling."""
+        self.profile.disable()
+        _deterministic_lock.release()
+
+    def write(self, path: str) -> None:
+        """Write the profile in the pstats format."""
+        self.profile.dump_stats(path)
+
+
+def get_profiler_factory(mode: str, interval: float) -> Callable[[], Any]:
+    """Get the factory of the profilers of the requests.
+
+    Args:
+        mode (str): "sampling" or "deterministic".
+        interval (float): the seconds between two samples of the sampling
+            profiler.
+
+    Returns:
+        Callable[[], Any]: builds a new profiler.
+    """
+    if mode == "deterministic":
+        return DeterministicProfiler
+    return partial(SamplingProfiler, interval=interval)
@@ -0,0 +1,108 @@
+"""Serialize the pages of the listings without validating the rows again.
+
+By default a listing endpoint returns a page model: pydantic builds an item
+from each row with ``from_orm``, FastAPI validates the page once more against
+the response model, and encodes it with `jsonable_encoder` and the stdlib json.
+With ``FAST_JSON`` the rows, which come from the database and are trusted to
+match the schema, are read into dicts with the fields of the item schema, and
+the page is encoded with orjson, or the stdlib json if orjson is not installed
+(``pip install orjson``), into a response which FastAPI sends as is. The one
+check kept is that the fields which do not allow None are set: a page with a
+NULL in such a column is built as the page model, which rejects it, so both
+paths answer the same.
+"""
+
+import json
+from functools import lru_cache
+from typing import Any, Optional, Sequence, Tuple, Type
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.responses import JSONResponse, Response
+from ..configs import get_settings
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib json is used without it
+    orjson = None
+
+settings = get_settings()
+
+
+def dumps(content: Any) -> bytes:
+    """Encode trusted content into compact JSON, like `JSONResponse`.
+
+    Args:
+        content (Any): dicts, lists and scalars, including datetimes.
+
+    Returns:
+        bytes: the UTF-8 encoded JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with `dumps`."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache()
+def item_fields(page_model: Type[BaseModel]) -> Tuple[str, ...]:
+    """Get the names of the fields of the items of a page model."""
+    return tuple(page_model.__fields__["items"].type_.__fields__)
+
+
+@lru_cache()
+def required_item_fields(page_model: Type[BaseModel]) -> Tuple[str, ...]:
+    """Get the names of the fields of the items of a page model which do not
+    allow None."""
+    item_model = page_model.__fields__["items"].type_
+    return tuple(
+        name for name, field in item_model.__fields__.items() if not field.allow_none
+    )
+
+
+def row_to_dict(row: Any, fields: Sequence[str]) -> dict:
+    """Read the given fields of an ORM object or a result row into a dict."""
+    return {name: getattr(row, name) for name in fields}
+
+
+def page_response(
+    page_model: Type[BaseModel],
+    rows: Sequence[Any],
+    next_cursor: Optional[str],
+    response: Optional[Response] = None,
+) -> Any:
+    """Build the response of a page of a listing.
+
+    Args:
+        page_model (Type[BaseModel]): the page model, e.g. `ImagePage`.
+        rows (Sequence[Any]): the rows of the page.
+        next_cursor (Optional[str]): the cursor of the next page.
+        response (Optional[Response]): the response of the endpoint, whose
+            headers, e.g. the ETag, are copied to the rendered response.
+
+    Returns:
+        Any: the page model, or the rendered response with ``FAST_JSON``.
+    """
+    if not settings.FAST_JSON:
+        return page_model(items=rows, next_cursor=next_cursor)
+    fields = item_fields(page_model)
+    items = [row_to_dict(row, fields) for row in rows]
+    required = required_item_fields(page_model)
+    if any(item[name] is None for item in items for name in required):
+        # fails the validation, like without FAST_JSON
+        return page_model(items=rows, next_cursor=next_cursor)
+    rendered = FastJSONResponse({"items": items, "next_cursor": next_cursor})
+    if response is not None:
+        rendered.headers.raw.extend(response.headers.raw)
+    return rendered
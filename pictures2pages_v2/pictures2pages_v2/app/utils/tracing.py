@@ -0,0 +1,358 @@
+"""Trace the stages of a request, for the ``Server-Timing`` header and for
+OpenTelemetry collectors.
+
+`TracingMiddleware` starts a `Trace` for each request, and `span` times a stage
+of the current trace, e.g. ``with span("persist"): ...``. Nested spans are
+named after their parents, e.g. ``caption_1.detect_labels``, and outside of a
+trace `span` does nothing. The trace is kept in a context variable, which is
+copied to the threadpool, so the blocking calls run with `Deadline.run` record
+their spans too.
+
+The finished traces are exported in the OTLP JSON encoding by a background
+thread, off the request path, see `get_exporter`: appended to a file, which
+the OpenTelemetry collector reads with its ``otlpjsonfile`` receiver, and/or
+sent to the OTLP/HTTP endpoint of a collector, e.g.
+``http://localhost:4318/v1/traces``. No OpenTelemetry SDK is needed. A trace
+continues the trace of the client if the request has a W3C ``traceparent``
+header.
+"""
+
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from ..configs import get_settings
+from .metrics import Counter
+
+settings = get_settings()
+logger = logging.getLogger(settings.PROJECT_SLUG)
+
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+
+TRACES_DROPPED = Counter(
+    "traces_dropped_total",
+    "Traces not exported since the export queue was full.",
+)
+
+current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def _new_id(size: int) -> str:
+    return os.urandom(size).hex()
+
+
+class Span:
+    """Timed stage of a trace, times from `time.perf_counter`."""
+
+    __slots__ = (
+        "name",
+        "path",
+        "span_id",
+        "parent_id",
+        "start",
+        "end",
+        "attributes",
+        "error",
+    )
+
+    def __init__(self, name: str, path: str, parent_id: Optional[str]):
+        self.name = name
+        self.path = path
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes: Dict[str, Any] = {}
+        self.error = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute of the span, e.g. "gen_ai.usage.input_tokens"."""
+        self.attributes[key] = value
+
+    @property
+    def duration(self) -> float:
+        """Get the duration in seconds of the finished span."""
+        return self.end - self.start
+
+
+class Trace:
+    """Trace of a request, with a root span and its stages in start order.
+
+    Args:
+        name (str): the name of the root span.
+        traceparent (Optional[str]): the ``traceparent`` header of the request,
+            whose trace is continued.
+    """
+
+    def __init__(self, name: str, traceparent: Optional[str] = None):
+        match = TRACEPARENT_RE.match(traceparent or "")
+        if match and set(match[1]) != {"0"} and set(match[2]) != {"0"}:
+            self.trace_id, parent_id = match[1], match[2]
+        else:
+            self.trace_id, parent_id = _new_id(16), None
+        # the spans are timed with perf_counter, the wall clock anchors them
+        self.start_ns = time.time_ns()
+        self.root = Span(name, "", parent_id)
+        self.spans: List[Span] = []
+
+    def start_span(self, name: str, parent: Optional[Span] = None) -> Span:
+        """Start a span, by default a stage of the root span."""
+        parent = parent or self.root
+        path = f"{parent.path}.{name}" if parent.path else name
+        child = Span(name, path, parent.span_id)
+        self.spans.append(child)
+        return child
+
+    def server_timing(self) -> str:
+        """Get the finished stages as a ``Server-Timing`` header value."""
+        return ", ".join(
+            f"{child.path};dur={child.duration * 1000:.1f}"
+            for child in self.spans
+            if child.end is not None
+        )
+
+    def to_otlp(self, service_name: str) -> dict:
+        """Encode the finished spans as an OTLP JSON ``ExportTraceServiceRequest``.
+
+        Args:
+            service_name (str): the ``service.name`` of the resource.
+
+        Returns:
+            dict: the JSON payload.
+        """
+
+        def unix_nano(perf_time: float) -> str:
+            return str(self.start_ns + int((perf_time - self.root.start) * 1e9))
+
+        spans = []
+        for kind, child in [(SPAN_KIND_SERVER, self.root)] + [
+            (SPAN_KIND_INTERNAL, child) for child in self.spans
+        ]:
+            if child.end is None:
+                continue
+            encoded = {
+                "traceId": self.trace_id,
+                "spanId": child.span_id,
+                "name": child.name,
+                "kind": kind,
+                "startTimeUnixNano": unix_nano(child.start),
+                "endTimeUnixNano": unix_nano(child.end),
+                "attributes": _otlp_attributes(child.attributes),
+                # unset or error
+                "status": {"code": 2 if child.error else 0},
+            }
+            if child.parent_id is not None:
+                encoded["parentSpanId"] = child.parent_id
+            spans.append(encoded)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _otlp_attributes({"service.name": service_name})
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": settings.PROJECT_SLUG}, "spans": spans}
+                    ],
+                }
+            ]
+        }
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[dict]:
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            encoded_value = {"boolValue": value}
+        elif isinstance(value, int):
+            encoded_value = {"intValue": str(value)}
+        elif isinstance(value, float):
+            encoded_value = {"doubleValue": value}
+        else:
+            encoded_value = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": encoded_value})
+    return encoded
+
+
+@contextmanager
+def span(name: str) -> Iterator[Optional[Span]]:
+    """Time a stage of the current trace, nested in the current span.
+
+    Args:
+        name (str): the name of the stage, a ``Server-Timing`` token, e.g.
+            "detect_labels".
+
+    Yields:
+        Optional[Span]: the span, None outside of a trace.
+    """
+    trace = current_trace.get()
+    if trace is None:
+        yield None
+        return
+    child = trace.start_span(name, _current_span.get())
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException:
+        child.error = True
+        raise
+    finally:
+        child.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def set_span_attribute(key: str, value: Any) -> None:
+    """Set an attribute of the current span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.set_attribute(key, value)
+
+
+class FileExporter:
+    """Append the traces to a file, one OTLP JSON payload per line."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def export(self, payloads: Sequence[dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as export_file:
+            for payload in payloads:
+                export_file.write(json.dumps(payload) + "\n")
+
+
+class OTLPExporter:
+    """Send the traces to the OTLP/HTTP endpoint of a collector, as JSON."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, payloads: Sequence[dict]) -> None:
+        import urllib.request
+
+        body = {
+            "resourceSpans": [
+                resource
+                for payload in payloads
+                for resource in payload["resourceSpans"]
+            ]
+        }
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        urllib.request.urlopen(request, timeout=self.timeout).close()
+
+
+class BatchExporter:
+    """Export the finished traces in batches from a background thread.
+
+    The thread is started on the first trace, i.e. in the worker process and
+    not in the gunicorn master which preloads the application. The traces
+    beyond ``max_queue_size`` are dropped, rather than slowing the requests
+    down, and counted in ``TRACES_DROPPED``.
+
+    Args:
+        exporters (Sequence[Any]): the exporters, with an ``export`` method
+            taking a list of OTLP JSON payloads.
+        service_name (str): the ``service.name`` of the traces.
+        max_queue_size (int): the maximum number of traces waiting for export.
+        batch_size (int): the maximum number of traces per export.
+        interval (float): the seconds between two exports.
+    """
+
+    def __init__(
+        self,
+        exporters: Sequence[Any],
+        service_name: str,
+        max_queue_size: int = 2048,
+        batch_size: int = 512,
+        interval: float = 1.0,
+    ):
+        self.exporters = list(exporters)
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: "queue.Queue[Optional[Trace]]" = queue.Queue(max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, trace: Trace) -> None:
+        """Queue a finished trace for export."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="trace-exporter", daemon=True
+                    )
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            TRACES_DROPPED.inc()
+
+    def _run(self) -> None:
+        stopped = False
+        while not stopped:
+            batch = []
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                try:
+                    trace = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if trace is None:
+                    stopped = True
+                    break
+                batch.append(trace)
+            if batch:
+                self._export(batch)
+
+    def _export(self, batch: List[Trace]) -> None:
+        payloads = [trace.to_otlp(self.service_name) for trace in batch]
+        for exporter in self.exporters:
+            try:
+                exporter.export(payloads)
+            except Exception as e:
+                logger.warning(
+                    "Failed to export %d traces with %s: %s",
+                    len(payloads),
+                    type(exporter).__name__,
+                    e,
+                )
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Export the queued traces and stop the thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+
+@lru_cache()
+def get_exporter() -> Optional[BatchExporter]:
+    """Get the exporter of the traces configured in the settings, None if the
+    traces are not exported."""
+    exporters: List[Any] = []
+    if settings.TRACING_EXPORT_PATH:
+        exporters.append(FileExporter(settings.TRACING_EXPORT_PATH))
+    if settings.TRACING_OTLP_ENDPOINT:
+        exporters.append(OTLPExporter(settings.TRACING_OTLP_ENDPOINT))
+    if not exporters:
+        return None
+    return BatchExporter(exporters, service_name=settings.PROJECT_SLUG)
@@ -0,0 +1,36 @@
+"""gunicorn configuration of the API service, built from the settings.
+
+Run the service with::
+
+    $ gunicorn -c gunicorn_conf.py main:app
+"""
+
+# mypy: ignore-errors
+from app.configs import get_settings
+from app.server import gunicorn_options, prepare_metrics_dir, reset_db_pools
+from app.utils.multiprocess import mark_process_dead
+
+options = gunicorn_options(get_settings())
+
+bind = options["bind"]
+workers = options["workers"]
+worker_class = options["worker_class"]
+keepalive = options["keepalive"]
+backlog = options["backlog"]
+max_requests = options["max_requests"]
+max_requests_jitter = options["max_requests_jitter"]
+graceful_timeout = options["graceful_timeout"]
+timeout = options["timeout"]
+preload_app = options["preload_app"]
+
+metrics_dir = prepare_metrics_dir(get_settings(), workers)
+
+
+def post_fork(server, worker):
+    reset_db_pools()
+
+
+def child_exit(server, worker):
+    # keep the counters of the exited worker in the combined metrics
+    if metrics_dir is not None:
+        mark_process_dead(metrics_dir, worker.pid)
@@ -1,12 +1,19 @@
-"""Main function for running the API service."""
+"""Main function for running the API service.
+
+``python main.py`` runs the configured number of uvicorn workers; in production
+use gunicorn with ``gunicorn_conf.py``, see `app.server`.
+"""
 
 # mypy: ignore-errors
 import uvicorn
 from app import create_application
 from app.configs import get_settings
+from app.server import prepare_metrics_dir, uvicorn_options
 
 app = create_application()
 settings = get_settings()
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8080, reload=False)  # nosec
+    options = uvicorn_options(settings)
+    prepare_metrics_dir(settings, options["workers"])
+    uvicorn.run("main:app", **options)
@@ -0,0 +1,73 @@
+"""Alembic environment, running the migrations against the database of the
+configured settings (see `app.configs.get_settings`)."""
+
+# mypy: ignore-errors
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from app.configs import get_settings
+from app.db.base import Base
+from app.db import models  # noqa: F401, register all the tables
+from app.db.partitions import include_name
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get(
+    "configure_logger", True
+):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Run migrations in 'offline' mode, emitting the SQL to the output."""
+    context.configure(
+        url=str(get_settings().SQLALCHEMY_DATABASE_URI),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode.
+
+    An existing connection can be passed through `config.attributes`, which
+    is used by the tests.
+    """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
+            transaction_per_migration=True,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    connectable = create_engine(str(get_settings().SQLALCHEMY_DATABASE_URI))
+    with connectable.connect() as connection:
+        # migrations creating indexes concurrently commit the preceding
+        # transaction, so each migration gets its own
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
+            transaction_per_migration=True,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
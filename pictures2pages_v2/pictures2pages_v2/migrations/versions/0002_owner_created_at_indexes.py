@@ -0,0 +1,50 @@
+"""indexes for listing images and content by owner
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:30:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # build the indexes without blocking writes to the existing tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_images_owner_id_created_at",
+            "images",
+            ["owner_id", "created_at"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_generated_content_owner_id_created_at",
+            "generated_content",
+            ["owner_id", "created_at"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_generated_content_public_owner_id_created_at",
+            "generated_content",
+            ["owner_id", "created_at"],
+            postgresql_where=sa.text("is_public"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_generated_content_public_owner_id_created_at",
+        table_name="generated_content",
+    )
+    op.drop_index(
+        "ix_generated_content_owner_id_created_at", table_name="generated_content"
+    )
+    op.drop_index("ix_images_owner_id_created_at", table_name="images")
@@ -0,0 +1,67 @@
+"""add id to the owner/created_at indexes for keyset pagination
+
+The listings are ordered by (created_at, id), with id as tie breaker. With id
+in the indexes, the order and the cursor condition are served by the index
+without an extra sort.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 11:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# (old name, new name, table, postgresql_where)
+INDEXES = [
+    (
+        "ix_images_owner_id_created_at",
+        "ix_images_owner_id_created_at_id",
+        "images",
+        None,
+    ),
+    (
+        "ix_generated_content_owner_id_created_at",
+        "ix_generated_content_owner_id_created_at_id",
+        "generated_content",
+        None,
+    ),
+    (
+        "ix_generated_content_public_owner_id_created_at",
+        "ix_generated_content_public_owner_id_created_at_id",
+        "generated_content",
+        "is_public",
+    ),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for old_name, new_name, table, where in INDEXES:
+            op.create_index(
+                new_name,
+                table,
+                ["owner_id", "created_at", "id"],
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+            )
+            op.drop_index(old_name, table_name=table, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for old_name, new_name, table, where in INDEXES:
+            op.create_index(
+                old_name,
+                table,
+                ["owner_id", "created_at"],
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+            )
+            op.drop_index(new_name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,49 @@
+"""add the public_feed table backing the global feed
+
+The table holds a denormalized copy of the listed columns of the public
+content, such that /feed is read without touching generated_content. It is
+backfilled from the current public content.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 12:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "public_feed",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.Text(), nullable=False),
+        sa.Column("is_story", sa.Boolean(), nullable=False),
+        sa.Column("thumbnail", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=True),
+        sa.Column("owner_username", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["id"], ["generated_content.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(
+        "INSERT INTO public_feed "
+        "(id, title, is_story, thumbnail, created_at, owner_id, owner_username) "
+        "SELECT c.id, c.title, COALESCE(c.is_story, true), c.image_url_1, "
+        "COALESCE(c.created_at, now() AT TIME ZONE 'utc'), c.owner_id, u.username "
+        "FROM generated_content c JOIN users u ON u.id = c.owner_id "
+        "WHERE c.is_public"
+    )
+    op.create_index("ix_public_feed_created_at_id", "public_feed", ["created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_public_feed_created_at_id", table_name="public_feed")
+    op.drop_table("public_feed")
@@ -0,0 +1,60 @@
+"""add the full text search vector of the generated content
+
+The tsvector is a stored generated column, so postgres keeps it up to date on
+every insert and update. Adding it rewrites the table once.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 13:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# copied from app.db.models.contents, such that the migration does not change
+# with the model
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(theme, '')), 'B') || "
+    "setweight(to_tsvector('english', "
+    "coalesce(caption_1, '') || ' ' || coalesce(caption_2, '') || ' ' || "
+    "coalesce(caption_3, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        "generated_content",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR_SQL, persisted=True),
+            nullable=True,
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_generated_content_search_vector",
+            "generated_content",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_generated_content_search_vector",
+            table_name="generated_content",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("generated_content", "search_vector")
@@ -0,0 +1,96 @@
+"""add the normalized labels of the images and the generated content
+
+The labels were only stored in the caption columns of generated_content, as
+the string of a python list, e.g. "['Dog', 'Pet']". They are parsed into the
+labels table and linked to the content, and to the uploaded images the
+content was generated from. The confidence of these labels is unknown.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 14:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# the caption of each image of a content, with the image url
+CAPTIONS = """
+    SELECT c.id AS content_id, c.owner_id, cap.url, cap.caption
+    FROM generated_content c,
+    LATERAL (VALUES (c.image_url_1, c.caption_1), (c.image_url_2, c.caption_2),
+                    (c.image_url_3, c.caption_3)) AS cap(url, caption)
+"""
+# the label names of each caption, quoted with ' or " as in a python list
+CAPTION_LABELS = f"""
+    SELECT captions.*, coalesce(m[1], m[2]) AS name
+    FROM ({CAPTIONS}) AS captions,
+    LATERAL regexp_matches(captions.caption, '''([^'']+)''|"([^"]+)"', 'g') AS m
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "labels",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.create_table(
+        "image_labels",
+        sa.Column("image_id", sa.Integer(), nullable=False),
+        sa.Column("label_id", sa.Integer(), nullable=False),
+        sa.Column("confidence", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(["image_id"], ["images.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["label_id"], ["labels.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("image_id", "label_id"),
+    )
+    op.create_table(
+        "content_labels",
+        sa.Column("content_id", sa.Integer(), nullable=False),
+        sa.Column("label_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["content_id"], ["generated_content.id"], ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(["label_id"], ["labels.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("content_id", "label_id"),
+    )
+
+    op.execute(
+        f"INSERT INTO labels (name) SELECT DISTINCT name FROM ({CAPTION_LABELS}) AS l "
+        "ORDER BY name"
+    )
+    op.execute(
+        "INSERT INTO content_labels (content_id, label_id) "
+        f"SELECT DISTINCT l.content_id, labels.id FROM ({CAPTION_LABELS}) AS l "
+        "JOIN labels ON labels.name = l.name"
+    )
+    op.execute(
+        "INSERT INTO image_labels (image_id, label_id) "
+        f"SELECT DISTINCT images.id, labels.id FROM ({CAPTION_LABELS}) AS l "
+        "JOIN labels ON labels.name = l.name "
+        "JOIN images ON images.url = l.url AND images.owner_id = l.owner_id"
+    )
+
+    op.create_index(
+        "ix_image_labels_label_id_image_id", "image_labels", ["label_id", "image_id"]
+    )
+    op.create_index(
+        "ix_content_labels_label_id_content_id",
+        "content_labels",
+        ["label_id", "content_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_content_labels_label_id_content_id", table_name="content_labels")
+    op.drop_index("ix_image_labels_label_id_image_id", table_name="image_labels")
+    op.drop_table("content_labels")
+    op.drop_table("image_labels")
+    op.drop_table("labels")
@@ -0,0 +1,51 @@
+"""add the per user counters of images and content
+
+The counters are filled from the current images and content.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 15:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+COUNTERS = ("images", "public_images", "stories", "poems", "public_contents")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        *(
+            sa.Column(name, sa.Integer(), server_default="0", nullable=False)
+            for name in COUNTERS
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.execute("""
+        INSERT INTO user_stats (user_id, images, public_images, stories, poems,
+                                public_contents)
+        SELECT u.id,
+               (SELECT count(*) FROM images i WHERE i.owner_id = u.id),
+               (SELECT count(*) FROM images i
+                WHERE i.owner_id = u.id AND i.is_public),
+               (SELECT count(*) FROM generated_content c
+                WHERE c.owner_id = u.id AND coalesce(c.is_story, true)),
+               (SELECT count(*) FROM generated_content c
+                WHERE c.owner_id = u.id AND NOT coalesce(c.is_story, true)),
+               (SELECT count(*) FROM generated_content c
+                WHERE c.owner_id = u.id AND c.is_public)
+        FROM users u
+        """)
+
+
+def downgrade() -> None:
+    op.drop_table("user_stats")
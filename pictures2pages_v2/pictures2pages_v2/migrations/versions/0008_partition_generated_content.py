@@ -0,0 +1,197 @@
+"""partition the generated content by month of created_at
+
+A table can not be partitioned in place, so the rows are copied into a new
+partitioned table, which locks generated_content for the duration of the copy;
+run it in a maintenance window on large tables. The partitions of the months
+with content and of the coming months are created, plus a default partition.
+
+The primary key of a partitioned table has to contain the partition key, so it
+becomes (id, created_at), and the foreign keys of public_feed and
+content_labels to generated_content.id are dropped. created_at becomes NOT
+NULL, rows without it get the time of the migration.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 16:00:00.000000
+"""
+
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+# copied from app.db.models.contents and app.db.partitions, such that the
+# migration does not change with them
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(theme, '')), 'B') || "
+    "setweight(to_tsvector('english', "
+    "coalesce(caption_1, '') || ' ' || coalesce(caption_2, '') || ' ' || "
+    "coalesce(caption_3, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'C')"
+)
+MONTHS_AHEAD = 3
+COLUMNS = (
+    "id, is_story, content, title, theme, is_public, created_at, image_url_1, "
+    "image_url_2, image_url_3, caption_1, caption_2, caption_3, owner_id"
+)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _columns(partitioned: bool) -> list:
+    return [
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('generated_content_id_seq'::regclass)"),
+            nullable=False,
+        ),
+        sa.Column("is_story", sa.Boolean(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("title", sa.Text(), nullable=False),
+        sa.Column("theme", sa.String(), nullable=False),
+        sa.Column("is_public", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=not partitioned),
+        sa.Column("image_url_1", sa.String(), nullable=False),
+        sa.Column("image_url_2", sa.String(), nullable=False),
+        sa.Column("image_url_3", sa.String(), nullable=False),
+        sa.Column("caption_1", sa.String(), nullable=False),
+        sa.Column("caption_2", sa.String(), nullable=False),
+        sa.Column("caption_3", sa.String(), nullable=False),
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR_SQL, persisted=True),
+            nullable=True,
+        ),
+        sa.Column("owner_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint(*(("id", "created_at") if partitioned else ("id",))),
+    ]
+
+
+def _create_indexes() -> None:
+    op.create_index("ix_generated_content_id", "generated_content", ["id"])
+    op.create_index(
+        "ix_generated_content_owner_id_created_at_id",
+        "generated_content",
+        ["owner_id", "created_at", "id"],
+    )
+    op.create_index(
+        "ix_generated_content_public_owner_id_created_at_id",
+        "generated_content",
+        ["owner_id", "created_at", "id"],
+        postgresql_where=sa.text("is_public"),
+    )
+    op.create_index(
+        "ix_generated_content_search_vector",
+        "generated_content",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+
+
+def _replace_table(partitioned: bool) -> None:
+    """Copy generated_content into a new, partitioned or plain, table."""
+    op.rename_table("generated_content", "generated_content_old")
+    op.execute(
+        "ALTER TABLE generated_content_old "
+        "RENAME CONSTRAINT generated_content_pkey TO generated_content_old_pkey"
+    )
+    for name in (
+        "ix_generated_content_id",
+        "ix_generated_content_owner_id_created_at_id",
+        "ix_generated_content_public_owner_id_created_at_id",
+        "ix_generated_content_search_vector",
+    ):
+        op.drop_index(name, table_name="generated_content_old")
+
+    if partitioned:
+        op.create_table(
+            "generated_content",
+            *_columns(partitioned),
+            postgresql_partition_by="RANGE (created_at)",
+        )
+        _create_partitions()
+    else:
+        op.create_table("generated_content", *_columns(partitioned))
+    created_at = (
+        "coalesce(created_at, now() AT TIME ZONE 'utc')"
+        if partitioned
+        else "created_at"
+    )
+    op.execute(
+        f"INSERT INTO generated_content ({COLUMNS}) "
+        f"SELECT {COLUMNS.replace('created_at', created_at)} FROM generated_content_old"
+    )
+    op.execute("ALTER SEQUENCE generated_content_id_seq OWNED BY generated_content.id")
+    op.drop_table("generated_content_old")
+    _create_indexes()
+
+
+def _create_partitions() -> None:
+    first = op.get_bind().scalar(
+        sa.text("SELECT min(created_at) FROM generated_content_old")
+    )
+    current = datetime.utcnow().date().replace(day=1)
+    month = current
+    if first is not None and first.date() < month:
+        month = first.date().replace(day=1)
+    last = _add_months(current, MONTHS_AHEAD)
+    op.execute(
+        "CREATE TABLE generated_content_default PARTITION OF generated_content DEFAULT"
+    )
+    while month <= last:
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE generated_content_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF generated_content FOR VALUES FROM ('{month}') TO ('{end}')"
+        )
+        month = end
+
+
+def upgrade() -> None:
+    op.drop_constraint("public_feed_id_fkey", "public_feed", type_="foreignkey")
+    op.drop_constraint(
+        "content_labels_content_id_fkey", "content_labels", type_="foreignkey"
+    )
+    _replace_table(partitioned=True)
+
+
+def downgrade() -> None:
+    # archived partitions are not restored, see app.db.partitions
+    _replace_table(partitioned=False)
+    op.execute(
+        "DELETE FROM public_feed WHERE id NOT IN (SELECT id FROM generated_content)"
+    )
+    op.execute(
+        "DELETE FROM content_labels "
+        "WHERE content_id NOT IN (SELECT id FROM generated_content)"
+    )
+    op.create_foreign_key(
+        "public_feed_id_fkey",
+        "public_feed",
+        "generated_content",
+        ["id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.create_foreign_key(
+        "content_labels_content_id_fkey",
+        "content_labels",
+        "generated_content",
+        ["content_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
@@ -0,0 +1,26 @@
+"""add the change version of the users, for the ETags of the listings
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 17:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "user_stats",
+        sa.Column("version", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("user_stats", "version")
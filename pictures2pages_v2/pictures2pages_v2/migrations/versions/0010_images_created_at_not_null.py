@@ -0,0 +1,43 @@
+"""make the creation time of the images NOT NULL, the key of their listing
+
+The images without a creation time are given the time of the migration.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 18:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+UTC_NOW = sa.text("timezone('utc', now())")
+
+
+def upgrade() -> None:
+    op.execute(
+        "UPDATE images SET created_at = timezone('utc', now()) "
+        "WHERE created_at IS NULL"
+    )
+    op.alter_column(
+        "images",
+        "created_at",
+        existing_type=sa.DateTime(),
+        nullable=False,
+        server_default=UTC_NOW,
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        "images",
+        "created_at",
+        existing_type=sa.DateTime(),
+        nullable=True,
+        server_default=None,
+    )
@@ -0,0 +1,83 @@
+"""Check that importing the application package stays within a time budget.
+
+The package is imported in fresh interpreters with ``python -X importtime``,
+the fastest of the runs is compared with the budget, to be robust against a
+busy machine. The heavy SDKs (boto3, openai, passlib) must not be imported at
+all, they are imported on first use.
+
+Usage::
+
+    $ python scripts/check_import_time.py --budget-ms 1000
+
+The budget defaults to the environment variable ``IMPORT_TIME_BUDGET_MS``.
+Exits with 1 if the budget is exceeded or a heavy SDK is imported, and prints
+the slowest imports.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+PACKAGE = "pictures2pages_v2.app"
+DEFAULT_BUDGET_MS = 1000
+LAZY_MODULES = ("boto3", "botocore", "openai", "passlib", "bcrypt")
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(package: str = PACKAGE) -> list:
+    """Import the package in a fresh interpreter.
+
+    Returns:
+        list: the (self us, cumulative us, depth, module) of each import.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {package}"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    imports = []
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((int(self_us), int(cumulative_us), len(indent), module))
+    return imports
+
+
+def total_ms(imports: list) -> float:
+    """Sum the cumulative time of the top level imports, in ms."""
+    return sum(cumulative for _, cumulative, depth, _ in imports if depth == 1) / 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.getenv("IMPORT_TIME_BUDGET_MS", DEFAULT_BUDGET_MS)),
+    )
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    imports = min(runs, key=total_ms)
+    elapsed_ms = total_ms(imports)
+    lazy = sorted({m for *_, m in imports if m.split(".")[0] in LAZY_MODULES})
+
+    print(f"import {PACKAGE}: {elapsed_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if lazy:
+        print(f"modules which have to be imported lazily: {', '.join(lazy)}")
+    if elapsed_ms <= args.budget_ms and not lazy:
+        return 0
+    print("slowest imports (self time):")
+    for self_us, _, _, module in sorted(imports, reverse=True)[: args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {module}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
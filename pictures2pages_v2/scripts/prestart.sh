@@ -0,0 +1,7 @@
+#! /usr/bin/env bash
+
+# Bring the database schema up to date before the service starts
+alembic upgrade head
+
+# Create the partitions of generated_content for the coming months
+python -m app.db.partitions create
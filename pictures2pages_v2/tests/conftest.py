@@ -1,15 +1,21 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from pictures2pages_v2.app.application import create_application
-from pictures2pages_v2.app.db.session import engine, SessionLocal
+from pictures2pages_v2.app.db.session import engine, SessionLocal, async_engine
 from pictures2pages_v2.app.db.base import Base
+from pictures2pages_v2.app.db.models import User
+from pictures2pages_v2.app.api import auth, cache
 
 
 @pytest.fixture
 def test_client():
     app = create_application()
-    test_client = TestClient(app)
-    return test_client
+    with TestClient(app) as test_client:
+        yield test_client
+        # the pooled asyncpg connections are bound to the event loop of the
+        # client, close them before the loop is gone
+        test_client.portal.call(async_engine.dispose)
 
 
 @pytest.fixture
@@ -20,3 +26,51 @@ def db_session():
     session.close()
     Base.metadata.drop_all(engine)
     engine.dispose()
+
+
+@pytest.fixture
+def user(db_session):
+    user = User(
+        username="johndoe", email="johndoe@example.com", hashed_password="dummy"
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(monkeypatch, user):
+    monkeypatch.setattr(auth, "SECRET_KEY", "dummy secret key")
+    token = auth.create_access_token(data={"sub": user.username})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(autouse=True)
+def response_cache():
+    # the ids restart in each test, so the cached listings must not outlive it
+    cache.response_cache.clear()
+    yield cache.response_cache
+    cache.response_cache.clear()
+
+
+@pytest.fixture
+def statements():
+    """Record the statements of the async engine containing any of the given
+    substrings, e.g. ``statements("FROM images")``."""
+    bind = async_engine.sync_engine
+    listeners = []
+
+    def record(*matches):
+        recorded = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            if any(match in statement for match in matches):
+                recorded.append(statement)
+
+        event.listen(bind, "before_cursor_execute", before_cursor_execute)
+        listeners.append(before_cursor_execute)
+        return recorded
+
+    yield record
+    for listener in listeners:
+        event.remove(bind, "before_cursor_execute", listener)
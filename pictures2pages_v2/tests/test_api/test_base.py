@@ -1,3 +1,16 @@
+import asyncio
+import unittest.mock as mock
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from pictures2pages_v2.app.db.models import ContentLabel, GeneratedContent, Image, User
+from pictures2pages_v2.app.db.queries.stats import PUBLIC_CHANGES_KEY
+from pictures2pages_v2.app.db.replica import PIN_COOKIE, pins
+from pictures2pages_v2.app.db.session import async_engine
+from pictures2pages_v2.app.api import auth, base, conditional
+from pictures2pages_v2.app.services.clients import EXTERNAL_CALL_DURATION_SECONDS
+from pictures2pages_v2.app.utils import serialization
 from pictures2pages_v2.app.version import __version__
 
 
@@ -5,3 +18,719 @@ def test_get_version(test_client):
     response = test_client.get("/api/v1/version")
     assert response.status_code == 200
     assert response.json() == {"version": __version__}
+
+
+def _add_images(db_session, user, count):
+    now = datetime.utcnow()
+    images = [
+        Image(url=f"u{i}", owner_id=user.id, created_at=now - timedelta(minutes=i))
+        for i in range(count)
+    ]
+    db_session.add_all(images)
+    db_session.commit()
+    return [image.id for image in images]
+
+
+def test_list_user_images_pages(test_client, db_session, user, auth_headers):
+    image_ids = _add_images(db_session, user, 5)
+    seen, cursor = [], None
+    for expected_size in (2, 2, 1):
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = test_client.get(
+            "/api/v1/images", params=params, headers=auth_headers
+        )
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) == expected_size
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+    assert cursor is None
+    assert seen == image_ids
+
+
+@pytest.mark.parametrize(
+    "params, status_code",
+    [({"cursor": "invalid"}, 400), ({"limit": 0}, 422), ({"limit": 101}, 422)],
+)
+def test_list_user_images_invalid_params(
+    test_client, user, auth_headers, params, status_code
+):
+    response = test_client.get("/api/v1/images", params=params, headers=auth_headers)
+    assert response.status_code == status_code
+
+
+def _add_contents(db_session, user, count, is_public=True):
+    now = datetime.utcnow()
+    contents = [
+        GeneratedContent(
+            content="once upon a time",
+            title=f"title {i}",
+            theme="theme",
+            is_public=is_public,
+            created_at=now - timedelta(minutes=i),
+            image_url_1=f"https://example.com/{i}-1.jpg",
+            image_url_2=f"https://example.com/{i}-2.jpg",
+            image_url_3=f"https://example.com/{i}-3.jpg",
+            caption_1="['Dog']",
+            caption_2="['Cat']",
+            caption_3="['Tree']",
+            owner_id=user.id,
+        )
+        for i in range(count)
+    ]
+    db_session.add_all(contents)
+    db_session.commit()
+    return [content.id for content in contents]
+
+
+def test_view_content_summary(test_client, db_session, user, auth_headers):
+    content_ids = _add_contents(db_session, user, 3)
+    _add_contents(db_session, user, 2, is_public=False)
+    response = test_client.get(
+        "/api/v1/view-content/summary",
+        params={"user_id": user.id, "limit": 2},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert [item["id"] for item in page["items"]] == content_ids[:2]
+    assert set(page["items"][0]) == {
+        "id",
+        "title",
+        "created_at",
+        "is_story",
+        "thumbnail",
+    }
+    assert page["items"][0]["thumbnail"] == "https://example.com/0-1.jpg"
+    response = test_client.get(
+        "/api/v1/view-content/summary",
+        params={"user_id": user.id, "cursor": page["next_cursor"]},
+        headers=auth_headers,
+    )
+    assert [item["id"] for item in response.json()["items"]] == content_ids[2:]
+    assert response.json()["next_cursor"] is None
+
+
+def test_get_content(test_client, db_session, user, auth_headers):
+    other = User(username="other", email="other@example.com", hashed_password="x")
+    db_session.add(other)
+    db_session.commit()
+    (public_id,) = _add_contents(db_session, other, 1)
+    (private_id,) = _add_contents(db_session, other, 1, is_public=False)
+    (own_private_id,) = _add_contents(db_session, user, 1, is_public=False)
+
+    for content_id in (public_id, own_private_id):
+        response = test_client.get(
+            f"/api/v1/content/{content_id}", headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert response.json()["content"] == "once upon a time"
+    for content_id in (private_id, 0):
+        response = test_client.get(
+            f"/api/v1/content/{content_id}", headers=auth_headers
+        )
+        assert response.status_code == 404
+
+
+def _feed_ids(test_client, auth_headers, **params):
+    response = test_client.get("/api/v1/feed", params=params, headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_write_pins_to_primary(test_client, db_session, user, auth_headers):
+    (content_id,) = _add_contents(db_session, user, 1, is_public=False)
+    response = test_client.get("/api/v1/images", headers=auth_headers)
+    assert PIN_COOKIE not in response.cookies
+
+    response = test_client.patch(
+        "/api/v1/set-visibility",
+        params={"content_id": content_id, "is_public": True},
+        headers=auth_headers,
+    )
+    assert pins.is_pinned(user.username, response.cookies[PIN_COOKIE])
+
+
+def test_public_feed(test_client, db_session, user, auth_headers):
+    content_ids = _add_contents(db_session, user, 3, is_public=False)
+    assert _feed_ids(test_client, auth_headers)["items"] == []
+
+    for content_id in (content_ids[0], content_ids[2], content_ids[2]):
+        response = test_client.patch(
+            "/api/v1/set-visibility",
+            params={"content_id": content_id, "is_public": True},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+    page = _feed_ids(test_client, auth_headers, limit=1)
+    assert [item["id"] for item in page["items"]] == [content_ids[0]]
+    assert page["items"][0]["owner_username"] == "johndoe"
+    assert page["items"][0]["thumbnail"] == "https://example.com/0-1.jpg"
+    page = _feed_ids(test_client, auth_headers, limit=1, cursor=page["next_cursor"])
+    assert [item["id"] for item in page["items"]] == [content_ids[2]]
+    assert page["next_cursor"] is None
+
+    test_client.patch(
+        "/api/v1/set-visibility",
+        params={"content_id": content_ids[0], "is_public": False},
+        headers=auth_headers,
+    )
+    page = _feed_ids(test_client, auth_headers)
+    assert [item["id"] for item in page["items"]] == [content_ids[2]]
+
+    response = test_client.delete(
+        "/api/v1/delete-content",
+        params={"content_id": content_ids[2]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert _feed_ids(test_client, auth_headers)["items"] == []
+
+
+def test_search(test_client, db_session, user, auth_headers):
+    other = User(username="other", email="other@example.com", hashed_password="x")
+    db_session.add(other)
+    db_session.commit()
+    public_ids = _add_contents(db_session, other, 3)
+    (private_id,) = _add_contents(db_session, other, 1, is_public=False)
+    (own_private_id,) = _add_contents(db_session, user, 1, is_public=False)
+    # a match in the title ranks higher than a match in the text
+    contents = db_session.query(GeneratedContent)
+    contents.filter(GeneratedContent.id == public_ids[1]).update(
+        {"title": "The dragon"}
+    )
+    contents.filter(GeneratedContent.id == public_ids[2]).update(
+        {"content": "a dragon slept"}
+    )
+    contents.filter(GeneratedContent.id.in_([private_id, own_private_id])).update(
+        {"theme": "dragons"}, synchronize_session=False
+    )
+    db_session.commit()
+
+    seen, cursor = [], None
+    for expected_size in (2, 1):
+        params = {"q": "dragon", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = test_client.get(
+            "/api/v1/search", params=params, headers=auth_headers
+        )
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) == expected_size
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+    assert cursor is None
+    assert seen[0] == public_ids[1]
+    assert set(seen) == {public_ids[1], public_ids[2], own_private_id}
+
+    response = test_client.get(
+        "/api/v1/search", params={"q": "dog"}, headers=auth_headers
+    )
+    assert len(response.json()["items"]) == 4
+
+
+@pytest.mark.parametrize(
+    "params, status_code",
+    [({"q": "dog", "cursor": "invalid"}, 400), ({"q": ""}, 422), ({}, 422)],
+)
+def test_search_invalid_params(test_client, user, auth_headers, params, status_code):
+    response = test_client.get("/api/v1/search", params=params, headers=auth_headers)
+    assert response.status_code == status_code
+
+
+@pytest.fixture
+def mocked_generation(monkeypatch):
+    detected = {
+        "u1.jpg": [("Dog", 99.1), ("Pet", 90.5)],
+        "u2.jpg": [("Cat", 98.0)],
+        "u3.jpg": [("Tree", 97.0)],
+    }
+    calls = []
+
+    def detect_labels(filename, bucket_name):
+        calls.append(filename)
+        return detected[filename]
+
+    def generate(
+        caption_1, caption_2, caption_3, theme=None, content_type="story", timeout=None
+    ):
+        return {"title": "A title", content_type: f"{caption_1} {caption_2}"}
+
+    monkeypatch.setattr(base, "detect_labels", detect_labels)
+    monkeypatch.setattr(base, "generate_content_from_image_labels", generate)
+    return calls
+
+
+def _generate(test_client, auth_headers):
+    response = test_client.post(
+        "/api/v1/generate-content",
+        data={
+            "image_url_1": "https://bucket.s3.amazonaws.com/u1.jpg",
+            "image_url_2": "https://bucket.s3.amazonaws.com/u2.jpg",
+            "image_url_3": "https://bucket.s3.amazonaws.com/u3.jpg",
+            "theme": "space",
+            "is_story": True,
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_generate_content_failure(
+    monkeypatch, test_client, db_session, user, auth_headers, mocked_generation
+):
+    monkeypatch.setattr(
+        base,
+        "generate_content_from_image_labels",
+        lambda *args, **kwargs: {"statusCode": 500, "error": "dummy"},
+    )
+    logger = mock.Mock()
+    monkeypatch.setattr(base, "logger", logger)
+    response = test_client.post(
+        "/api/v1/generate-content",
+        data={
+            "image_url_1": "https://bucket.s3.amazonaws.com/u1.jpg",
+            "image_url_2": "https://bucket.s3.amazonaws.com/u2.jpg",
+            "image_url_3": "https://bucket.s3.amazonaws.com/u3.jpg",
+            "is_story": True,
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 500
+    logger.exception.assert_called_once_with("Generating content failed")
+
+
+def test_generate_content_reuses_labels(
+    test_client, db_session, user, auth_headers, mocked_generation, statements
+):
+    content_statements = statements("generated_content")
+    db_session.add(
+        Image(url="https://bucket.s3.amazonaws.com/u1.jpg", owner_id=user.id)
+    )
+    db_session.commit()
+
+    content = _generate(test_client, auth_headers)
+    assert content["caption_1"] == "['Dog', 'Pet']"
+    assert content["content"] == "['Dog', 'Pet'] ['Cat']"
+    assert mocked_generation == ["u1.jpg", "u2.jpg", "u3.jpg"]
+    # the content is inserted and returned in one statement
+    assert len(content_statements) == 1
+
+    # the labels of the uploaded image are stored and reused
+    content = _generate(test_client, auth_headers)
+    assert content["caption_1"] == "['Dog', 'Pet']"
+    assert mocked_generation == ["u1.jpg", "u2.jpg", "u3.jpg", "u2.jpg", "u3.jpg"]
+
+
+def test_find_by_label(test_client, db_session, user, auth_headers, mocked_generation):
+    (image_id,) = _add_images(db_session, user, 1)
+    image = db_session.get(Image, image_id)
+    image.url = "https://bucket.s3.amazonaws.com/u1.jpg"
+    db_session.commit()
+    content = _generate(test_client, auth_headers)
+
+    response = test_client.get("/api/v1/labels/Dog/images", headers=auth_headers)
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == [image_id]
+    response = test_client.get("/api/v1/labels/Cat/images", headers=auth_headers)
+    assert response.json()["items"] == []
+
+    # only public content is listed
+    response = test_client.get("/api/v1/labels/Cat/content", headers=auth_headers)
+    assert response.json()["items"] == []
+    test_client.patch(
+        "/api/v1/set-visibility",
+        params={"content_id": content["id"], "is_public": True},
+        headers=auth_headers,
+    )
+    for label in ("Dog", "Cat", "Tree"):
+        response = test_client.get(
+            f"/api/v1/labels/{label}/content", headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert [item["id"] for item in response.json()["items"]] == [content["id"]]
+    response = test_client.get(
+        "/api/v1/labels/Dog/content", params={"cursor": "x"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+    # the labels are deleted with the content
+    response = test_client.delete(
+        "/api/v1/delete-content",
+        params={"content_id": content["id"]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert db_session.scalars(select(ContentLabel.content_id)).all() == []
+
+
+def test_set_visibility_bulk(test_client, db_session, user, auth_headers, statements):
+    content_statements = statements("generated_content")
+    other = User(username="other", email="other@example.com", hashed_password="x")
+    db_session.add(other)
+    db_session.commit()
+    content_ids = _add_contents(db_session, user, 3, is_public=False)
+    (other_id,) = _add_contents(db_session, other, 1, is_public=False)
+
+    response = test_client.patch(
+        "/api/v1/set-visibility/bulk",
+        json={"ids": [*content_ids, other_id, 0], "is_public": True},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "affected": sorted(content_ids),
+        "not_affected": sorted([other_id, 0]),
+    }
+    assert len(content_statements) == 1
+    page = _feed_ids(test_client, auth_headers)
+    assert [item["id"] for item in page["items"]] == content_ids
+
+    response = test_client.patch(
+        "/api/v1/set-visibility/bulk",
+        json={"ids": content_ids[:2], "is_public": False},
+        headers=auth_headers,
+    )
+    assert response.json()["affected"] == sorted(content_ids[:2])
+    page = _feed_ids(test_client, auth_headers)
+    assert [item["id"] for item in page["items"]] == content_ids[2:]
+    db_session.expire_all()
+    assert not db_session.get(GeneratedContent, content_ids[0]).is_public
+    assert not db_session.get(GeneratedContent, other_id).is_public
+
+
+def test_delete_content_bulk(test_client, db_session, user, auth_headers, statements):
+    content_statements = statements("generated_content")
+    other = User(username="other", email="other@example.com", hashed_password="x")
+    db_session.add(other)
+    db_session.commit()
+    content_ids = _add_contents(db_session, user, 2)
+    (other_id,) = _add_contents(db_session, other, 1)
+
+    response = test_client.post(
+        "/api/v1/delete-content/bulk",
+        json={"ids": [*content_ids, other_id]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "affected": sorted(content_ids),
+        "not_affected": [other_id],
+    }
+    assert len(content_statements) == 1
+    db_session.expire_all()
+    assert db_session.get(GeneratedContent, content_ids[0]) is None
+    assert db_session.get(GeneratedContent, other_id) is not None
+
+
+@pytest.mark.parametrize("ids", [[], list(range(501))])
+def test_bulk_invalid_size(test_client, user, auth_headers, ids):
+    response = test_client.post(
+        "/api/v1/delete-content/bulk", json={"ids": ids}, headers=auth_headers
+    )
+    assert response.status_code == 422
+
+
+def test_register(test_client, db_session, statements):
+    user_statements = statements("users")
+    payload = {"username": "jane", "email": "jane@example.com", "password": "pw"}
+    response = test_client.post("/api/v1/register", json=payload)
+    assert response.status_code == 200
+    assert len(user_statements) == 1
+    user = db_session.query(User).filter_by(username="jane").one()
+    assert user.email == "jane@example.com"
+    assert user.hashed_password != "pw"
+
+    response = test_client.post(
+        "/api/v1/register", json=dict(payload, email="other@example.com")
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Username already registered"}
+    response = test_client.post(
+        "/api/v1/register", json=dict(payload, username="other")
+    )
+    assert response.status_code == 409
+    assert response.json() == {"detail": "Email already registered"}
+    assert db_session.query(User).count() == 1
+
+
+def test_login(test_client, db_session, user, monkeypatch):
+    on_event_loop = []
+
+    def verify_password(plain_password, hashed_password):
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(True)
+        except RuntimeError:
+            on_event_loop.append(False)
+        return plain_password == "secret"
+
+    monkeypatch.setattr(auth, "verify_password", verify_password)
+    monkeypatch.setattr(auth, "SECRET_KEY", "dummy secret key")
+    for password, status_code in (("secret", 200), ("wrong", 401)):
+        response = test_client.post(
+            "/api/v1/login", data={"username": "johndoe", "password": password}
+        )
+        assert response.status_code == status_code
+    # bcrypt does not block the event loop
+    assert on_event_loop == [False, False]
+
+
+def test_upload_image(test_client, db_session, user, auth_headers, monkeypatch):
+    uploads = []
+    timed = EXTERNAL_CALL_DURATION_SECONDS.labels("s3", "upload_fileobj", "ok")
+    observed = timed.count
+    s3_client = mock.Mock()
+    s3_client.upload_fileobj.side_effect = lambda *args, **kwargs: uploads.append(
+        args[1:]
+    )
+    monkeypatch.setattr(base, "get_s3_client", lambda: s3_client)
+
+    response = test_client.post(
+        "/api/v1/upload-image",
+        files={"file": ("dog.jpg", b"jpeg", "image/jpeg")},
+        data={"description": "my dog", "is_public": True},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    image = response.json()
+    ((bucket, key),) = uploads
+    assert timed.count == observed + 1
+    assert image["url"].endswith(f"/{key}") and key.endswith(".jpg")
+    assert image["description"] == "my dog"
+    assert image["is_public"] is True
+    assert image["owner_id"] == user.id
+    assert image["created_at"]
+    assert db_session.get(Image, image["id"]).url == image["url"]
+
+
+def test_user_stats(test_client, db_session, user, auth_headers, mocked_generation):
+    def stats():
+        response = test_client.get("/api/v1/user/me/stats", headers=auth_headers)
+        assert response.status_code == 200
+        return response.json()
+
+    assert stats() == dict(
+        images=0, public_images=0, stories=0, poems=0, public_contents=0
+    )
+    s3_client = mock.Mock()
+    with mock.patch.object(base, "get_s3_client", lambda: s3_client):
+        test_client.post(
+            "/api/v1/upload-image",
+            files={"file": ("dog.jpg", b"jpeg", "image/jpeg")},
+            data={"is_public": True},
+            headers=auth_headers,
+        )
+    story_id = _generate(test_client, auth_headers)["id"]
+    other_id = _generate(test_client, auth_headers)["id"]
+    assert stats() == dict(
+        images=1, public_images=1, stories=2, poems=0, public_contents=0
+    )
+
+    for _ in range(2):
+        test_client.patch(
+            "/api/v1/set-visibility",
+            params={"content_id": story_id, "is_public": True},
+            headers=auth_headers,
+        )
+    test_client.patch(
+        "/api/v1/set-visibility/bulk",
+        json={"ids": [story_id, other_id], "is_public": True},
+        headers=auth_headers,
+    )
+    assert stats()["public_contents"] == 2
+    test_client.patch(
+        "/api/v1/set-visibility/bulk",
+        json={"ids": [other_id], "is_public": False},
+        headers=auth_headers,
+    )
+    assert stats()["public_contents"] == 1
+
+    test_client.delete(
+        "/api/v1/delete-content", params={"content_id": story_id}, headers=auth_headers
+    )
+    test_client.post(
+        "/api/v1/delete-content/bulk", json={"ids": [other_id]}, headers=auth_headers
+    )
+    assert stats() == dict(
+        images=1, public_images=1, stories=0, poems=0, public_contents=0
+    )
+
+
+@pytest.mark.parametrize(
+    "path", ["/api/v1/view-content", "/api/v1/view-content/summary"]
+)
+def test_view_content_conditional_get(
+    test_client, db_session, user, auth_headers, statements, path
+):
+    listing_statements = statements("FROM generated_content", "FROM images")
+    (content_id,) = _add_contents(db_session, user, 1, is_public=False)
+    params = {"user_id": user.id, "limit": 10}
+
+    response = test_client.get(path, params=params, headers=auth_headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"0-')
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert len(listing_statements) == 1
+
+    # the listing query does not run for a client holding the current version
+    headers = {**auth_headers, "If-None-Match": etag}
+    response = test_client.get(path, params=params, headers=headers)
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert len(listing_statements) == 1
+
+    # another page has another ETag
+    response = test_client.get(path, params={**params, "limit": 5}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    test_client.patch(
+        "/api/v1/set-visibility",
+        params={"content_id": content_id, "is_public": True},
+        headers=auth_headers,
+    )
+    response = test_client.get(path, params=params, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [item["id"] for item in response.json()["items"]] == [content_id]
+
+
+def test_list_user_images_conditional_get(
+    test_client, db_session, user, auth_headers, monkeypatch
+):
+    monkeypatch.setitem(
+        conditional.settings.CACHE_CONTROL, "list_user_images", "private, max-age=5"
+    )
+    response = test_client.get("/api/v1/images", headers=auth_headers)
+    assert response.headers["Cache-Control"] == "private, max-age=5"
+    headers = {**auth_headers, "If-None-Match": response.headers["ETag"]}
+    assert test_client.get("/api/v1/images", headers=headers).status_code == 304
+
+    monkeypatch.setattr(base, "get_s3_client", mock.Mock)
+    test_client.post(
+        "/api/v1/upload-image",
+        files={"file": ("dog.jpg", b"jpeg", "image/jpeg")},
+        data={"is_public": False},
+        headers=auth_headers,
+    )
+    response = test_client.get("/api/v1/images", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 1
+
+
+async def _not_invalidated(db):
+    db.info.pop(PUBLIC_CHANGES_KEY, None)
+
+
+def test_view_content_cache(
+    monkeypatch,
+    test_client,
+    db_session,
+    user,
+    auth_headers,
+    statements,
+    mocked_generation,
+    response_cache,
+):
+    listing_statements = statements("FROM generated_content", "FROM images")
+    content_ids = _add_contents(db_session, user, 2)
+    params = {"user_id": user.id}
+
+    response = test_client.get(
+        "/api/v1/view-content", params=params, headers=auth_headers
+    )
+    assert [item["id"] for item in response.json()["items"]] == content_ids
+    assert len(listing_statements) == 1
+
+    # served from the cache, with the same headers
+    cached = test_client.get(
+        "/api/v1/view-content", params=params, headers=auth_headers
+    )
+    assert cached.content == response.content
+    assert cached.headers["ETag"] == response.headers["ETag"]
+    assert cached.headers["Cache-Control"] == "private, no-cache"
+    # answered from the version, before the cache
+    headers = {**auth_headers, "If-None-Match": response.headers["ETag"]}
+    status = test_client.get(
+        "/api/v1/view-content", params=params, headers=headers
+    ).status_code
+    assert status == 304
+    assert response_cache.stats()["hits"] == 1
+
+    # a change of the user changes the version, thus the key
+    _generate(test_client, auth_headers)
+    test_client.get("/api/v1/view-content", params=params, headers=auth_headers)
+    assert response_cache.stats()["misses"] == 2
+
+    # the entries of another worker are not invalidated, the version is
+    # checked nonetheless
+    with monkeypatch.context() as patch:
+        patch.setattr(base, "invalidate_public_listings", _not_invalidated)
+        test_client.patch(
+            "/api/v1/set-visibility",
+            params={"content_id": content_ids[0], "is_public": False},
+            headers=auth_headers,
+        )
+        response = test_client.get(
+            "/api/v1/view-content", params=params, headers=auth_headers
+        )
+        assert [item["id"] for item in response.json()["items"]] == content_ids[1:]
+
+    test_client.delete(
+        "/api/v1/delete-content",
+        params={"content_id": content_ids[1]},
+        headers=auth_headers,
+    )
+    response = test_client.get(
+        "/api/v1/view-content", params=params, headers=auth_headers
+    )
+    assert response.json()["items"] == []
+    assert response_cache.stats()["misses"] == 4
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/api/v1/images",
+        "/api/v1/view-content",
+        "/api/v1/view-content/summary",
+        "/api/v1/feed",
+        "/api/v1/labels/Dog/images",
+        "/api/v1/labels/Dog/content",
+        "/api/v1/search",
+    ],
+)
+def test_fast_json(
+    test_client,
+    db_session,
+    user,
+    auth_headers,
+    mocked_generation,
+    response_cache,
+    monkeypatch,
+    path,
+):
+    (image_id,) = _add_images(db_session, user, 1)
+    image = db_session.get(Image, image_id)
+    image.url = "https://bucket.s3.amazonaws.com/u1.jpg"
+    db_session.commit()
+    for _ in range(2):
+        content = _generate(test_client, auth_headers)
+        test_client.patch(
+            "/api/v1/set-visibility",
+            params={"content_id": content["id"], "is_public": True},
+            headers=auth_headers,
+        )
+    params = {"user_id": user.id, "q": "dog", "limit": 1}
+
+    response = test_client.get(path, params=params, headers=auth_headers)
+    monkeypatch.setattr(serialization.settings, "FAST_JSON", True)
+    response_cache.clear()
+    fast = test_client.get(path, params=params, headers=auth_headers)
+    assert fast.status_code == 200
+    assert response.json()["items"]
+    assert fast.json() == response.json()
+    assert fast.headers.get("ETag") == response.headers.get("ETag")
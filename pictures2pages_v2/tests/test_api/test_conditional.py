@@ -0,0 +1,18 @@
+import pytest
+from pictures2pages_v2.app.api.conditional import etag_matches
+
+
+@pytest.mark.parametrize(
+    "if_none_match, expected",
+    [
+        (None, False),
+        ("", False),
+        ("*", True),
+        ('W/"1-ab"', True),
+        ('"1-ab"', True),
+        ('W/"0-ab"', False),
+        ('W/"0-ab", W/"1-ab"', True),
+    ],
+)
+def test_etag_matches(if_none_match, expected):
+    assert etag_matches(if_none_match, 'W/"1-ab"') is expected
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from pictures2pages_v2.app.api import base, deadline
+from pictures2pages_v2.app.db.models import GeneratedContent
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _request(disconnected=lambda: False, headers=None, route="generate_content"):
+    async def is_disconnected():
+        return disconnected()
+
+    return SimpleNamespace(
+        is_disconnected=is_disconnected,
+        headers=headers or {},
+        scope={"route": SimpleNamespace(name=route)},
+    )
+
+
+def _cancelled(reason):
+    return deadline.REQUESTS_CANCELLED.labels(reason).value
+
+
+def test_get_request_timeout():
+    assert deadline.get_request_timeout(_request()) == 60
+    assert deadline.get_request_timeout(_request(route="view_content")) is None
+    headers = {"X-Request-Timeout": "5"}
+    assert deadline.get_request_timeout(_request(headers=headers)) == 5
+    # the header does not extend the deadline of the endpoint
+    headers = {"X-Request-Timeout": "500"}
+    assert deadline.get_request_timeout(_request(headers=headers)) == 60
+    for value in ("0", "-1", "soon", "nan"):
+        with pytest.raises(HTTPException) as error:
+            deadline.get_request_timeout(_request(headers={"X-Request-Timeout": value}))
+        assert error.value.status_code == 400
+
+
+def test_remaining():
+    clock = Clock()
+    request_deadline = deadline.Deadline(_request(), 10, clock=clock)
+    assert request_deadline.remaining() == 10
+    clock.now = 10
+    cancelled = _cancelled("deadline")
+    with pytest.raises(HTTPException) as error:
+        request_deadline.remaining()
+    assert error.value.status_code == 504
+    assert _cancelled("deadline") == cancelled + 1
+    assert deadline.Deadline(_request(), None).remaining() is None
+
+
+@pytest.mark.asyncio
+async def test_run():
+    request_deadline = deadline.Deadline(_request(), None)
+    assert await request_deadline.run(sum, [1, 2], start=3) == 6
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "timeout, disconnected, status_code, reason",
+    [(0.05, False, 504, "deadline"), (None, True, 499, "disconnect")],
+)
+async def test_run_cancelled(timeout, disconnected, status_code, reason):
+    release = threading.Event()
+    polls = []
+
+    def is_disconnected():
+        # connected for the check before the call
+        polls.append(None)
+        return disconnected and len(polls) > 1
+
+    request_deadline = deadline.Deadline(_request(is_disconnected), timeout)
+    cancelled = _cancelled(reason)
+    try:
+        with pytest.raises(HTTPException) as error:
+            await asyncio.wait_for(request_deadline.run(release.wait, 5), 2)
+    finally:
+        release.set()
+    assert error.value.status_code == status_code
+    assert _cancelled(reason) == cancelled + 1
+
+
+def test_generate_content_deadline(
+    test_client, db_session, user, auth_headers, monkeypatch
+):
+    release = threading.Event()
+
+    def detect_labels(filename, bucket_name):
+        release.wait(5)
+        return [("Dog", 99.0)]
+
+    monkeypatch.setattr(base, "detect_labels", detect_labels)
+    try:
+        response = test_client.post(
+            "/api/v1/generate-content",
+            data={
+                "image_url_1": "https://bucket.s3.amazonaws.com/u1.jpg",
+                "image_url_2": "https://bucket.s3.amazonaws.com/u2.jpg",
+                "image_url_3": "https://bucket.s3.amazonaws.com/u3.jpg",
+                "is_story": True,
+            },
+            headers={**auth_headers, "X-Request-Timeout": "0.1"},
+        )
+    finally:
+        release.set()
+    assert response.status_code == 504
+    assert db_session.scalar(select(func.count()).select_from(GeneratedContent)) == 0
+
+
+def test_generate_content_timeout(
+    test_client, db_session, user, auth_headers, monkeypatch
+):
+    timeouts = []
+
+    def generate(
+        caption_1, caption_2, caption_3, theme=None, content_type="story", timeout=None
+    ):
+        timeouts.append(timeout)
+        return {"title": "A title", content_type: "text"}
+
+    monkeypatch.setattr(base, "detect_labels", lambda *args: [("Dog", 99.0)])
+    monkeypatch.setattr(base, "generate_content_from_image_labels", generate)
+    response = test_client.post(
+        "/api/v1/generate-content",
+        data={
+            "image_url_1": "https://bucket.s3.amazonaws.com/u1.jpg",
+            "image_url_2": "https://bucket.s3.amazonaws.com/u2.jpg",
+            "image_url_3": "https://bucket.s3.amazonaws.com/u3.jpg",
+            "theme": "space",
+            "is_story": True,
+        },
+        headers={**auth_headers, "X-Request-Timeout": "20"},
+    )
+    assert response.status_code == 200
+    # the OpenAI call gets the remaining time of the request
+    assert 0 < timeouts[0] <= 20
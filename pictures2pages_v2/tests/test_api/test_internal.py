@@ -0,0 +1,103 @@
+import os
+
+import pytest
+from pictures2pages_v2.app.api import internal
+from pictures2pages_v2.app.utils.metrics import Counter, Registry
+from pictures2pages_v2.app.utils.multiprocess import write_snapshot
+
+ENDPOINTS = ["db-pool", "db-replica", "response-cache", "metrics"]
+
+
+@pytest.fixture
+def internal_headers(monkeypatch):
+    monkeypatch.setattr(internal.settings, "INTERNAL_TOKEN", "dummy token")
+    return {"Authorization": "Bearer dummy token"}
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_internal_token(test_client, monkeypatch, endpoint):
+    url = f"/api/v1/internal/{endpoint}"
+    # not found without a token configured
+    assert test_client.get(url).status_code == 404
+    monkeypatch.setattr(internal.settings, "INTERNAL_TOKEN", "dummy token")
+    for headers in (
+        {},
+        {"Authorization": "Bearer wrong"},
+        {"Authorization": "dummy token"},
+    ):
+        response = test_client.get(url, headers=headers)
+        assert response.status_code == 401
+        assert response.headers["www-authenticate"] == "Bearer"
+    response = test_client.get(url, headers={"Authorization": "Bearer dummy token"})
+    assert response.status_code == 200
+
+
+def test_db_pool_status(test_client, internal_headers):
+    response = test_client.get("/api/v1/internal/db-pool", headers=internal_headers)
+    assert response.status_code == 200
+    pools = response.json()["pools"]
+    assert [p["name"] for p in pools] == ["sync", "async"]
+    for pool in pools:
+        assert pool["size"] == 5
+        assert pool["max_overflow"] == 10
+        assert set(pool["wait_seconds"]) == {"buckets", "count", "sum"}
+
+
+def test_db_replica_status(test_client, internal_headers):
+    response = test_client.get("/api/v1/internal/db-replica", headers=internal_headers)
+    assert response.status_code == 200
+    status = response.json()
+    assert status["enabled"] is False
+    assert status["lag_seconds"] == 0
+    assert status["primary_pins"] >= 0
+
+
+def test_response_cache_status(test_client, internal_headers, response_cache):
+    response = test_client.get(
+        "/api/v1/internal/response-cache", headers=internal_headers
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "enabled": True,
+        "shared": False,
+        "hits": 0,
+        "misses": 0,
+        "hit_ratio": 0.0,
+        "entries": 0,
+        "bytes": 0,
+        "max_bytes": 32 * 1024 * 1024,
+    }
+
+
+def test_metrics(test_client, internal_headers):
+    test_client.get("/api/v1/version")
+    response = test_client.get("/api/v1/internal/metrics", headers=internal_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert "# TYPE http_request_duration_seconds histogram" in lines
+    assert any(
+        line.startswith(
+            'http_requests_total{method="GET",route="/api/v1/version",status="200"}'
+        )
+        for line in lines
+    )
+    assert "# TYPE db_query_duration_seconds histogram" in lines
+    assert "# TYPE external_call_duration_seconds histogram" in lines
+
+
+def test_metrics_of_all_workers(test_client, internal_headers, monkeypatch, tmp_path):
+    monkeypatch.setattr(internal.settings, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    registry = Registry()
+    Counter("http_requests_total", "", ("method", "route", "status"), registry).labels(
+        "GET", "/api/v1/version", "200"
+    ).inc(1000)
+    write_snapshot(str(tmp_path), registry, pid=1)
+
+    test_client.get("/api/v1/version")
+    response = test_client.get("/api/v1/internal/metrics", headers=internal_headers)
+    assert response.status_code == 200
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+    series = 'http_requests_total{method="GET",route="/api/v1/version",status="200"} '
+    (line,) = [line for line in response.text.splitlines() if line.startswith(series)]
+    assert float(line.rsplit(" ", 1)[1]) > 1000
@@ -1,8 +1,11 @@
 import unittest.mock as mock
 from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
 from starlette.middleware.cors import CORSMiddleware
 from pictures2pages_v2.app.application import create_application
 from pictures2pages_v2.app.configs import Settings
+from pictures2pages_v2.app.db.session import async_engine, engine
 
 
 def test_create_application():
@@ -10,6 +13,24 @@ def test_create_application():
     assert isinstance(app, FastAPI)
 
 
+def test_application_starts_without_db():
+    checkouts = []
+
+    def on_checkout(*args):
+        checkouts.append(args)
+
+    binds = (engine, async_engine.sync_engine)
+    for bind in binds:
+        event.listen(bind, "checkout", on_checkout)
+    try:
+        with TestClient(create_application()) as client:
+            assert client.get("/api/v1/version").status_code == 200
+    finally:
+        for bind in binds:
+            event.remove(bind, "checkout", on_checkout)
+    assert checkouts == []
+
+
 @mock.patch("pictures2pages_v2.app.application.get_settings")
 def test_create_application_with_cors_origins(mocked_get_settings):
     mocked_get_settings.return_value = Settings(
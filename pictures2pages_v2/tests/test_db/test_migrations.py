@@ -0,0 +1,114 @@
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import MetaData, text
+
+import pictures2pages_v2
+from pictures2pages_v2.app.db.base import Base
+from pictures2pages_v2.app.db.partitions import include_name
+from pictures2pages_v2.app.db.session import engine
+
+ALEMBIC_INI = Path(pictures2pages_v2.__file__).parent / "alembic.ini"
+
+
+def _app_metadata():
+    """Metadata of the app models only, without tables defined by tests."""
+    metadata = MetaData()
+    for mapper in Base.registry.mappers:
+        if mapper.class_.__module__.startswith("pictures2pages_v2.app."):
+            mapper.local_table.to_metadata(metadata)
+    return metadata
+
+
+def _drop_all():
+    Base.metadata.drop_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+
+
+@pytest.fixture
+def alembic_config():
+    _drop_all()
+    # the migrations manage the transactions themselves, since the indexes are
+    # created concurrently outside of a transaction
+    with engine.connect() as connection:
+        config = Config(str(ALEMBIC_INI))
+        config.attributes["connection"] = connection
+        config.attributes["configure_logger"] = False
+        yield config
+        # end the transaction started by the test, like the reflection
+        connection.commit()
+        command.downgrade(config, "base")
+    _drop_all()
+
+
+def test_migrations_match_models(alembic_config):
+    command.upgrade(alembic_config, "head")
+    connection = alembic_config.attributes["connection"]
+    context = MigrationContext.configure(
+        connection, opts={"include_name": include_name}
+    )
+    diff = compare_metadata(context, _app_metadata())
+    assert diff == []
+
+
+def test_labels_are_parsed_from_captions(alembic_config):
+    command.upgrade(alembic_config, "0005")
+    connection = alembic_config.attributes["connection"]
+    connection.execute(
+        text(
+            "INSERT INTO users (id, username, email, hashed_password) "
+            "VALUES (1, 'johndoe', 'johndoe@example.com', 'x');"
+            "INSERT INTO images (id, url, owner_id) VALUES (1, 'u1', 1);"
+            "INSERT INTO generated_content (id, content, title, theme, image_url_1, "
+            "image_url_2, image_url_3, caption_1, caption_2, caption_3, owner_id) "
+            "VALUES (1, 'c', 't', 'th', 'u1', 'u2', 'u3', "
+            "'[''Dog'', ''Pet'']', '[\"Bob''s Toy\", ''Dog'']', '[]', 1)"
+        )
+    )
+    connection.commit()
+    command.upgrade(alembic_config, "head")
+
+    labels = connection.execute(text("SELECT id, name FROM labels")).all()
+    assert sorted(name for _, name in labels) == ["Bob's Toy", "Dog", "Pet"]
+    names = {id: name for id, name in labels}
+    content_labels = connection.execute(
+        text("SELECT label_id FROM content_labels WHERE content_id = 1")
+    ).scalars()
+    assert sorted(names[id] for id in content_labels) == ["Bob's Toy", "Dog", "Pet"]
+    image_labels = connection.execute(
+        text("SELECT label_id, confidence FROM image_labels WHERE image_id = 1")
+    ).all()
+    assert sorted((names[id], c) for id, c in image_labels) == [
+        ("Dog", None),
+        ("Pet", None),
+    ]
+    connection.commit()
+
+
+def test_images_created_at_is_filled(alembic_config):
+    command.upgrade(alembic_config, "0009")
+    connection = alembic_config.attributes["connection"]
+    connection.execute(
+        text(
+            "INSERT INTO users (id, username, email, hashed_password) "
+            "VALUES (1, 'johndoe', 'johndoe@example.com', 'x');"
+            "INSERT INTO images (id, url, owner_id, created_at) "
+            "VALUES (1, 'u1', 1, NULL)"
+        )
+    )
+    connection.commit()
+    command.upgrade(alembic_config, "head")
+
+    connection.execute(
+        text("INSERT INTO images (id, url, owner_id) VALUES (2, 'u2', 1)")
+    )
+    created_at = connection.execute(
+        text("SELECT created_at FROM images ORDER BY id")
+    ).scalars()
+    assert None not in list(created_at)
+    connection.commit()
@@ -0,0 +1,153 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import select, text
+
+from pictures2pages_v2.app.db.models import (
+    ContentLabel,
+    GeneratedContent,
+    Label,
+    PublicFeedItem,
+)
+from pictures2pages_v2.app.db.partitions import (
+    DEFAULT_PARTITION,
+    LocalArchiveStorage,
+    add_months,
+    archive_key,
+    archive_partitions,
+    create_partition,
+    current_month,
+    get_archive_storage,
+    list_partitions,
+    partition_month,
+    partition_name,
+    restore_partition,
+)
+from pictures2pages_v2.app.db.session import engine
+
+OLD_MONTH = add_months(current_month(), -24)
+
+
+def _content(user, created_at, is_public=True):
+    return GeneratedContent(
+        content="c",
+        title="t",
+        theme="th",
+        is_public=is_public,
+        created_at=created_at,
+        image_url_1="u1",
+        image_url_2="u2",
+        image_url_3="u3",
+        caption_1="['Dog', 'Pet']",
+        caption_2="['Cat']",
+        caption_3="[]",
+        owner_id=user.id,
+    )
+
+
+def _partition_of(db_session, content_id):
+    return db_session.execute(
+        text("SELECT tableoid::regclass::text FROM generated_content WHERE id = :id"),
+        {"id": content_id},
+    ).scalar()
+
+
+def test_month_helpers():
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partition_name(date(2026, 3, 1)) == "generated_content_y2026m03"
+    assert partition_month("generated_content_y2026m03") == date(2026, 3, 1)
+    assert partition_month(DEFAULT_PARTITION) is None
+    with pytest.raises(ValueError):
+        partition_month("generated_content")
+
+
+def test_get_archive_storage(tmp_path):
+    storage = get_archive_storage("s3://bucket/archive/")
+    assert (storage.bucket, storage._key("a.csv.gz")) == ("bucket", "archive/a.csv.gz")
+    assert get_archive_storage(str(tmp_path)).directory == tmp_path
+
+
+def test_partitions_are_created_with_the_table(db_session):
+    month = current_month()
+    assert list_partitions(db_session.connection()) == [
+        *(partition_name(add_months(month, i)) for i in range(4)),
+        DEFAULT_PARTITION,
+    ]
+
+
+def test_create_partition_moves_rows_from_default(db_session, user):
+    content = _content(user, datetime(OLD_MONTH.year, OLD_MONTH.month, 15))
+    db_session.add(content)
+    db_session.commit()
+    assert _partition_of(db_session, content.id) == DEFAULT_PARTITION
+
+    connection = db_session.connection()
+    assert create_partition(connection, OLD_MONTH)
+    assert not create_partition(connection, OLD_MONTH)
+    db_session.commit()
+    assert _partition_of(db_session, content.id) == partition_name(OLD_MONTH)
+    # the indexes of the table are created on the attached partition
+    assert db_session.get(GeneratedContent, content.id).owner_id == user.id
+
+
+def test_archive_and_restore(db_session, user, tmp_path):
+    connection = db_session.connection()
+    create_partition(connection, OLD_MONTH)
+    old = _content(user, datetime(OLD_MONTH.year, OLD_MONTH.month, 2))
+    recent = _content(user, datetime.utcnow())
+    db_session.add_all([old, recent])
+    db_session.flush()
+    db_session.add_all(
+        [
+            PublicFeedItem(
+                id=content.id,
+                title="t",
+                is_story=True,
+                thumbnail="u1",
+                created_at=content.created_at,
+                owner_id=user.id,
+                owner_username=user.username,
+            )
+            for content in (old, recent)
+        ]
+    )
+    label = Label(name="Dog")
+    db_session.add(label)
+    db_session.flush()
+    db_session.add(ContentLabel(content_id=old.id, label_id=label.id))
+    db_session.commit()
+    old_id, recent_id = old.id, recent.id
+    db_session.close()
+    storage = LocalArchiveStorage(str(tmp_path))
+
+    with engine.connect() as connection:
+        archived = archive_partitions(connection, storage, after_months=12)
+    assert archived == [partition_name(OLD_MONTH)]
+    assert (tmp_path / archive_key(OLD_MONTH)).exists()
+    assert partition_name(OLD_MONTH) not in list_partitions(db_session.connection())
+    db_session.expire_all()
+    assert db_session.get(GeneratedContent, old_id) is None
+    assert db_session.get(GeneratedContent, recent_id) is not None
+    assert db_session.scalars(select(PublicFeedItem.id)).all() == [recent_id]
+    assert db_session.scalars(select(ContentLabel.content_id)).all() == []
+    db_session.close()
+
+    with engine.connect() as connection:
+        assert restore_partition(connection, OLD_MONTH, storage) == 1
+    restored = db_session.get(GeneratedContent, old_id)
+    assert restored.caption_1 == "['Dog', 'Pet']"
+    assert restored.created_at == datetime(OLD_MONTH.year, OLD_MONTH.month, 2)
+    assert sorted(db_session.scalars(select(PublicFeedItem.id))) == sorted(
+        [old_id, recent_id]
+    )
+    labels = db_session.execute(
+        select(Label.name)
+        .join(ContentLabel, ContentLabel.label_id == Label.id)
+        .where(ContentLabel.content_id == old_id)
+    )
+    assert sorted(labels.scalars()) == ["Cat", "Dog", "Pet"]
+    db_session.close()
+
+    with engine.connect() as connection, pytest.raises(ValueError):
+        restore_partition(connection, OLD_MONTH, storage)
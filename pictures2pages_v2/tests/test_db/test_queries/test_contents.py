@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+from pictures2pages_v2.app.db.models import User, UserStats
+from pictures2pages_v2.app.db.queries.contents import set_contents_visibility
+from pictures2pages_v2.app.db.session import AsyncSessionLocal, async_engine
+from .test_stats import _content
+
+
+@pytest.mark.asyncio
+async def test_concurrent_set_contents_visibility(db_session, user):
+    content = _content(user, is_story=True, is_public=False)
+    db_session.add(content)
+    db_session.commit()
+
+    async with AsyncSessionLocal() as first, AsyncSessionLocal() as second:
+        owner = await first.get(User, user.id)
+        assert await set_contents_visibility(first, [content.id], True, owner) == [
+            content.id
+        ]
+        # the second change waits for the first one, then finds nothing to change
+        pending = asyncio.create_task(
+            set_contents_visibility(
+                second, [content.id], True, await second.get(User, user.id)
+            )
+        )
+        await asyncio.sleep(0.2)
+        assert not pending.done()
+        await first.commit()
+        assert await pending == []
+        await second.commit()
+    await async_engine.dispose()
+
+    stats = db_session.get(UserStats, user.id)
+    db_session.refresh(stats)
+    assert stats.public_contents == 1
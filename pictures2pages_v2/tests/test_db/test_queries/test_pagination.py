@@ -0,0 +1,34 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from pictures2pages_v2.app.db.queries.pagination import (
+    build_page,
+    decode_cursor,
+    encode_cursor,
+)
+from pictures2pages_v2.app.utils.errors import InvalidCursorError
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 17, 10, 30, 1, 123456)
+    cursor = encode_cursor(created_at, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "bm90fGE", "!!!"])
+def test_decode_cursor_fail(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_build_page():
+    created_at = datetime(2024, 5, 17)
+    rows = [SimpleNamespace(id=i, created_at=created_at) for i in (5, 4, 3)]
+    items, next_cursor = build_page(rows, 2)
+    assert items == rows[:2]
+    assert decode_cursor(next_cursor) == (created_at, 4)
+    items, next_cursor = build_page(rows, 3)
+    assert items == rows
+    assert next_cursor is None
@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+
+import pytest
+from pictures2pages_v2.app.db.queries.search import (
+    build_search_page,
+    decode_search_cursor,
+    encode_search_cursor,
+)
+from pictures2pages_v2.app.utils.errors import InvalidCursorError
+
+
+@pytest.mark.parametrize("rank", [0.0, 0.1, 0.30000001192092896, 1e-20])
+def test_search_cursor_round_trip(rank):
+    cursor = encode_search_cursor(rank, 42)
+    assert "=" not in cursor
+    assert decode_search_cursor(cursor) == (rank, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "bm90fGE", "!!!"])
+def test_decode_search_cursor_fail(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_search_cursor(cursor)
+
+
+def test_build_search_page():
+    rows = [SimpleNamespace(id=i, rank=i / 10) for i in (5, 4, 3)]
+    items, next_cursor = build_search_page(rows, 2)
+    assert items == rows[:2]
+    assert decode_search_cursor(next_cursor) == (0.4, 4)
+    items, next_cursor = build_search_page(rows, 3)
+    assert items == rows
+    assert next_cursor is None
@@ -0,0 +1,59 @@
+from pictures2pages_v2.app.db.models import GeneratedContent, Image, User, UserStats
+from pictures2pages_v2.app.db.queries.stats import reconcile_user_stats
+
+
+def _content(owner, is_story, is_public):
+    return GeneratedContent(
+        content="c",
+        title="t",
+        theme="th",
+        is_story=is_story,
+        is_public=is_public,
+        image_url_1="u1",
+        image_url_2="u2",
+        image_url_3="u3",
+        caption_1="c1",
+        caption_2="c2",
+        caption_3="c3",
+        owner_id=owner.id,
+    )
+
+
+def _stats(db_session, user):
+    stats = db_session.get(UserStats, user.id)
+    db_session.refresh(stats)
+    return (
+        stats.images,
+        stats.public_images,
+        stats.stories,
+        stats.poems,
+        stats.public_contents,
+    )
+
+
+def test_reconcile_user_stats(db_session, user):
+    other = User(username="other", email="other@example.com", hashed_password="x")
+    db_session.add(other)
+    db_session.commit()
+    db_session.add_all(
+        [
+            Image(url="u", owner_id=user.id, is_public=True),
+            Image(url="u", owner_id=user.id, is_public=False),
+            _content(user, is_story=True, is_public=True),
+            _content(user, is_story=False, is_public=False),
+            _content(user, is_story=False, is_public=True),
+        ]
+    )
+    db_session.commit()
+
+    assert sorted(reconcile_user_stats(db_session, batch_size=1)) == sorted(
+        [user.id, other.id]
+    )
+    assert _stats(db_session, user) == (2, 1, 1, 2, 2)
+    assert _stats(db_session, other) == (0, 0, 0, 0, 0)
+    assert reconcile_user_stats(db_session) == []
+
+    db_session.get(UserStats, user.id).poems = 7
+    db_session.commit()
+    assert reconcile_user_stats(db_session) == [user.id]
+    assert _stats(db_session, user) == (2, 1, 1, 2, 2)
@@ -0,0 +1,164 @@
+"""Make sure the hot queries of the listing endpoints are served by indexes."""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from pictures2pages_v2.app.db.models import (
+    GeneratedContent,
+    Image,
+    PublicFeedItem,
+    User,
+)
+from pictures2pages_v2.app.db.queries.pagination import encode_cursor, paginate
+from pictures2pages_v2.app.db.queries.stats import RECONCILE_SQL
+from pictures2pages_v2.app.db.queries.search import (
+    encode_search_cursor,
+    search_content,
+)
+
+
+def _index_names(plan: dict) -> set:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for sub_plan in plan.get("Plans", []):
+        names |= _index_names(sub_plan)
+    return names
+
+
+def _parent_index_names(session, names: set) -> set:
+    # the indexes of a partition are named after the partition, report the
+    # index of the partitioned table they belong to
+    parents = set()
+    for name in names:
+        parent = session.execute(
+            text("SELECT CAST(pg_partition_root(CAST(:name AS regclass)) AS text)"),
+            {"name": name},
+        ).scalar()
+        parents.add(parent or name)
+    return parents
+
+
+def _used_indexes(session, statement) -> set:
+    sql = statement.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    # with sequential scans disabled, the planner still falls back to them if
+    # there is no usable index, which is what the tests detect.
+    session.execute(text("SET LOCAL enable_seqscan = off"))
+    result = session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(result, str):
+        result = json.loads(result)
+    return _parent_index_names(session, _index_names(result[0]["Plan"]))
+
+
+@pytest.fixture
+def populated_session(db_session):
+    users = [
+        User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="x")
+        for i in range(10)
+    ]
+    db_session.add_all(users)
+    db_session.flush()
+    now = datetime.utcnow()
+    for user in users:
+        for i in range(20):
+            created_at = now - timedelta(minutes=i)
+            db_session.add(
+                Image(url="u", is_public=True, owner_id=user.id, created_at=created_at)
+            )
+            db_session.add(
+                GeneratedContent(
+                    content="c",
+                    title="t",
+                    theme="th",
+                    is_public=i % 2 == 0,
+                    created_at=created_at,
+                    image_url_1="u1",
+                    image_url_2="u2",
+                    image_url_3="u3",
+                    caption_1="c1",
+                    caption_2="c2",
+                    caption_3="c3",
+                    owner_id=user.id,
+                )
+            )
+    db_session.commit()
+    db_session.execute(text("ANALYZE"))
+    return db_session
+
+
+@pytest.mark.parametrize("cursor", [None, encode_cursor(datetime.utcnow(), 10)])
+def test_list_user_images_uses_index(populated_session, cursor):
+    statement = paginate(select(Image).where(Image.owner_id == 1), Image, cursor, 10)
+    assert "ix_images_owner_id_created_at_id" in _used_indexes(
+        populated_session, statement
+    )
+
+
+@pytest.mark.parametrize("cursor", [None, encode_cursor(datetime.utcnow(), 10)])
+def test_view_public_content_uses_partial_index(populated_session, cursor):
+    statement = select(GeneratedContent).where(
+        GeneratedContent.owner_id == 1, GeneratedContent.is_public
+    )
+    statement = paginate(statement, GeneratedContent, cursor, 10)
+    assert "ix_generated_content_public_owner_id_created_at_id" in _used_indexes(
+        populated_session, statement
+    )
+
+
+@pytest.mark.parametrize("cursor", [None, encode_cursor(datetime.utcnow(), 10)])
+def test_feed_uses_index(populated_session, cursor):
+    statement = paginate(select(PublicFeedItem), PublicFeedItem, cursor, 10)
+    assert _used_indexes(populated_session, statement) == {
+        "ix_public_feed_created_at_id"
+    }
+
+
+@pytest.fixture
+def searchable_session(populated_session):
+    # with few rows, scanning the visible content is cheaper than the GIN index
+    populated_session.execute(
+        text(
+            "INSERT INTO generated_content (content, title, theme, is_public, "
+            "created_at, image_url_1, image_url_2, image_url_3, caption_1, "
+            "caption_2, caption_3, owner_id) "
+            "SELECT 'story ' || i, 'title ' || i, 'theme', true, now(), "
+            "'u1', 'u2', 'u3', 'c1', 'c2', 'c3', 1 "
+            "FROM generate_series(1, 5000) AS i"
+        )
+    )
+    populated_session.commit()
+    populated_session.execute(text("ANALYZE"))
+    return populated_session
+
+
+@pytest.mark.parametrize("cursor", [None, encode_search_cursor(0.1, 10)])
+def test_search_uses_gin_index(searchable_session, cursor):
+    statement = search_content("dragon", 1, cursor, 10)
+    assert "ix_generated_content_search_vector" in _used_indexes(
+        searchable_session, statement
+    )
+
+
+def _index_conditions(plan: dict) -> list:
+    conditions = [plan["Index Cond"]] if "Index Cond" in plan else []
+    for sub_plan in plan.get("Plans", []):
+        conditions += _index_conditions(sub_plan)
+    return conditions
+
+
+def test_reconcile_counts_the_batch_only(populated_session):
+    # the counted rows are those of the users of the batch, not whole tables
+    populated_session.execute(text("SET LOCAL enable_seqscan = off"))
+    result = populated_session.execute(
+        text(f"EXPLAIN (FORMAT JSON) {RECONCILE_SQL.text}"), {"after": 2, "until": 4}
+    ).scalar()
+    if isinstance(result, str):
+        result = json.loads(result)
+    conditions = _index_conditions(result[0]["Plan"])
+    owner_conditions = [c for c in conditions if "owner_id >" in c]
+    # the images, and the generated content of each partition
+    assert len(owner_conditions) >= 2
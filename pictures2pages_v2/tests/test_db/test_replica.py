@@ -0,0 +1,98 @@
+import subprocess
+import sys
+
+import pytest
+import unittest.mock as mock
+from sqlalchemy import text, update
+from pictures2pages_v2.app.api import auth
+from pictures2pages_v2.app.db.models.user import User
+from pictures2pages_v2.app.db.replica import (
+    PrimaryPins,
+    PrimarySession,
+    measure_replica_lag,
+    pins,
+)
+from pictures2pages_v2.app.db.session import AsyncSessionLocal, async_engine
+
+
+@mock.patch("pictures2pages_v2.app.db.replica.time.time")
+def test_primary_pins(mocked_time):
+    mocked_time.return_value = 100.0
+    user_pins = PrimaryPins(window=5, secret="dummy secret")
+    assert not user_pins.is_pinned("johndoe", None)
+
+    pin = user_pins.pin("johndoe")
+    mocked_time.return_value = 104.9
+    assert user_pins.is_pinned("johndoe", pin)
+    assert not user_pins.is_pinned(None, pin)
+    assert not user_pins.is_pinned("other", pin)
+    assert not user_pins.is_pinned("johndoe", "999999." + pin.rpartition(".")[2])
+    assert not user_pins.is_pinned("johndoe", "invalid")
+    assert not PrimaryPins(window=5, secret="other").is_pinned("johndoe", pin)
+
+    mocked_time.return_value = 105.0
+    assert not user_pins.is_pinned("johndoe", pin)
+
+
+def test_primary_pins_across_processes():
+    # the pin is issued by another worker, with the same secret
+    code = (
+        "from pictures2pages_v2.app.db.replica import PrimaryPins;"
+        "print(PrimaryPins(window=60, secret='dummy secret').pin('johndoe'))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    pin = result.stdout.strip()
+    assert PrimaryPins(window=60, secret="dummy secret").is_pinned("johndoe", pin)
+
+
+@pytest.mark.asyncio
+async def test_primary_session_pins_writer(db_session, user):
+    issued = []
+    async with AsyncSessionLocal() as session:
+        session.info["username"] = user.username
+        session.info["on_pin"] = issued.append
+        await session.execute(text("SELECT 1"))
+        await session.commit()
+        assert issued == []
+
+        await session.execute(
+            update(User).where(User.id == user.id).values(email="john@example.com")
+        )
+        await session.commit()
+        assert len(issued) == 1
+        assert pins.is_pinned(user.username, issued[0])
+
+    issued.clear()
+    async with AsyncSessionLocal() as session:
+        session.info["username"] = user.username
+        session.info["on_pin"] = issued.append
+        session.add(
+            User(username="jane", email="jane@example.com", hashed_password="x")
+        )
+        await session.rollback()
+        await session.commit()
+        assert issued == []
+    await async_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_measure_replica_lag():
+    # the primary is not in recovery, such that the lag functions return NULL
+    assert await measure_replica_lag(async_engine) == 0
+    await async_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_read_db_routing(monkeypatch):
+    monkeypatch.setattr(auth, "SECRET_KEY", "dummy secret key")
+    token = auth.create_access_token(data={"sub": "johndoe"})
+    async for db in auth.get_async_read_db(token, None):
+        assert not isinstance(db.sync_session, PrimarySession)
+
+    pin = pins.pin("johndoe")
+    async for db in auth.get_async_read_db(token, pin):
+        assert isinstance(db.sync_session, PrimarySession)
+    async for db in auth.get_async_read_db("invalid token", pin):
+        assert not isinstance(db.sync_session, PrimarySession)
@@ -0,0 +1,17 @@
+import subprocess
+import sys
+
+# imported on first use, see scripts/check_import_time.py for the time budget
+LAZY_MODULES = ("boto3", "botocore", "openai", "passlib", "bcrypt")
+
+
+def test_heavy_sdks_are_imported_lazily():
+    code = (
+        "import sys, pictures2pages_v2.app;"
+        "print(' '.join(m for m in sys.modules if m.split('.')[0] in %r))"
+        % (LAZY_MODULES,)
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.split() == []
@@ -0,0 +1,131 @@
+import asyncio
+import gzip
+import unittest.mock as mock
+import zlib
+from unittest import TestCase
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from pictures2pages_v2.app.middlewares import CompressionMiddleware
+from pictures2pages_v2.app.middlewares import compression
+
+ITEMS = [
+    {"title": f"title {i}", "content": "once upon a time " * 20} for i in range(20)
+]
+
+SCOPE = {
+    "type": "http",
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "server": ("testserver", 80),
+    "path": "/stream",
+    "raw_path": b"/stream",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [(b"accept-encoding", b"gzip")],
+    "client": ("testclient", 50000),
+}
+
+
+def build_app(**kwargs) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items")
+    async def items():
+        return ITEMS
+
+    @app.get("/small")
+    async def small():
+        return {"status": "ok"}
+
+    @app.get("/text")
+    async def text():
+        return PlainTextResponse("x" * 2000)
+
+    @app.get("/encoded")
+    async def encoded():
+        return Response(
+            b"x" * 2000,
+            media_type="application/json",
+            headers={"Content-Encoding": "identity"},
+        )
+
+    @app.get("/stream")
+    async def stream():
+        async def body():
+            for _ in range(3):
+                yield b'{"content": "once upon a time"}\n' * 10
+
+        return StreamingResponse(body(), media_type="application/json")
+
+    app.add_middleware(CompressionMiddleware, **kwargs)
+    return app
+
+
+class TestCompression(TestCase):
+    def setUp(self):
+        self.test_client = TestClient(build_app(route_levels={"text": 0}))
+
+    def test_select_encoding(self):
+        self.assertEqual(compression.select_encoding("gzip, deflate"), "gzip")
+        self.assertEqual(compression.select_encoding("*"), "gzip")
+        self.assertIsNone(compression.select_encoding("gzip;q=0, deflate"))
+        self.assertIsNone(compression.select_encoding("gzip;q=x"))
+        self.assertIsNone(compression.select_encoding(""))
+
+    def test_compresses_large_json(self):
+        response = self.test_client.get("/items", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(response.json(), ITEMS)
+        self.assertLess(int(response.headers["Content-Length"]), len(response.content))
+
+    def test_passes_through(self):
+        for path, headers in (
+            ("/small", {"Accept-Encoding": "gzip"}),
+            ("/items", {"Accept-Encoding": "identity"}),
+            ("/text", {"Accept-Encoding": "gzip"}),
+            ("/encoded", {"Accept-Encoding": "gzip"}),
+        ):
+            response = self.test_client.get(path, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.headers.get("Content-Encoding"), "gzip")
+            self.assertNotIn("Vary", response.headers)
+
+    def test_route_level(self):
+        compressors = {"gzip": mock.Mock(wraps=compression.GzipCompressor)}
+        test_client = TestClient(build_app(level=6, route_levels={"items": 9}))
+        with mock.patch.dict(compression.COMPRESSORS, compressors):
+            test_client.get("/items", headers={"Accept-Encoding": "gzip"})
+            test_client.get("/stream", headers={"Accept-Encoding": "gzip"})
+            # text/plain is not compressed
+            test_client.get("/text", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(
+            compressors["gzip"].call_args_list, [mock.call(9), mock.call(6)]
+        )
+
+    def test_streaming_is_not_buffered(self):
+        app = build_app()
+        sent = []
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        async def receive():
+            await asyncio.sleep(1)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if message["type"] == "http.response.body" and message["more_body"]:
+                # each chunk can be decompressed as soon as it is received
+                chunk = decompressor.decompress(message["body"])
+                self.assertEqual(chunk, b'{"content": "once upon a time"}\n' * 10)
+
+        asyncio.run(app(dict(SCOPE), receive, send))
+        headers = dict(sent[0]["headers"])
+        self.assertEqual(headers[b"content-encoding"], b"gzip")
+        self.assertNotIn(b"content-length", headers)
+        body = b"".join(message.get("body", b"") for message in sent[1:])
+        self.assertEqual(
+            gzip.decompress(body), b'{"content": "once upon a time"}\n' * 30
+        )
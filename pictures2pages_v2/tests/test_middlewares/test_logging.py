@@ -1,7 +1,21 @@
+import asyncio
 import unittest.mock as mock
 from unittest import TestCase
 from fastapi.testclient import TestClient
 from pictures2pages_v2.app.application import create_application
+from pictures2pages_v2.app.middlewares import LogTimeMiddleware
+
+SCOPE = {
+    "type": "http",
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "server": ("testserver", 80),
+    "path": "/stream",
+    "query_string": b"",
+    "headers": [],
+    "client": ("testclient", 50000),
+}
 
 
 class TestLogTime(TestCase):
@@ -11,7 +25,7 @@ class TestLogTime(TestCase):
 
     @mock.patch("pictures2pages_v2.app.middlewares.logging.time")
     def test_log_time(self, mocked_time):
-        mocked_time.time.side_effect = [1, 2, 1, 2, 1, 2]
+        mocked_time.perf_counter.side_effect = [1, 2, 1, 2, 1, 2]
         with self.assertLogs("pictures2pages_v2", level="INFO") as cm:
             version_response = self.test_client.get("/api/v1/version")
             error_response = self.test_client.get("/api/v1/not_exist_page")
@@ -29,3 +43,34 @@ class TestLogTime(TestCase):
                     "1000.00ms",
                 ],
             )
+
+    def test_streaming_passes_through(self):
+        sent = []
+
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            for chunk in (b"a", b"b"):
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+                # each chunk reaches the client before the next one is produced
+                self.assertEqual(sent[-1]["body"], chunk)
+            await send({"type": "http.response.body", "body": b""})
+
+        async def send(message):
+            sent.append(message)
+
+        with self.assertLogs("pictures2pages_v2", level="INFO") as cm:
+            asyncio.run(LogTimeMiddleware(app)(SCOPE, None, send))
+        self.assertEqual(len(sent), 4)
+        self.assertEqual(len(cm.output), 1)
+        self.assertIn('"GET /stream HTTP/1.1" 200 OK', cm.output[0])
+
+    def test_exception_is_logged_as_server_error(self):
+        async def app(scope, receive, send):
+            raise RuntimeError("failed")
+
+        with self.assertLogs("pictures2pages_v2", level="INFO") as cm:
+            with self.assertRaises(RuntimeError):
+                asyncio.run(LogTimeMiddleware(app)(SCOPE, None, None))
+        self.assertIn("500 Internal Server Error", cm.output[0])
@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from pictures2pages_v2.app.middlewares import MetricsMiddleware
+from pictures2pages_v2.app.middlewares.metrics import (
+    HTTP_REQUEST_DURATION_SECONDS,
+    HTTP_REQUESTS_IN_FLIGHT,
+    HTTP_REQUESTS_TOTAL,
+)
+
+
+def _requests(method, route, status):
+    return HTTP_REQUESTS_TOTAL.labels(method, route, status).value
+
+
+def test_requests_by_route_template(test_client, user, auth_headers):
+    route = "/api/v1/content/{content_id}"
+    found, missing = _requests("GET", route, "200"), _requests("GET", route, "404")
+    unmatched = _requests("GET", "unmatched", "404")
+    observed = HTTP_REQUEST_DURATION_SECONDS.labels("GET", route, "404").count
+
+    for content_id in (1, 2):
+        response = test_client.get(
+            f"/api/v1/content/{content_id}", headers=auth_headers
+        )
+        assert response.status_code == 404
+    assert test_client.get("/api/v1/not_exist_page").status_code == 404
+
+    # the requests are labelled with the template, not the path
+    assert _requests("GET", route, "404") == missing + 2
+    assert _requests("GET", route, "200") == found
+    assert _requests("GET", "unmatched", "404") == unmatched + 1
+    assert HTTP_REQUEST_DURATION_SECONDS.labels("GET", route, "404").count == (
+        observed + 2
+    )
+    assert HTTP_REQUESTS_IN_FLIGHT.value == 0
+
+
+def test_exception_counted_as_error():
+    in_flight = []
+
+    async def app(scope, receive, send):
+        in_flight.append(HTTP_REQUESTS_IN_FLIGHT.value)
+        raise RuntimeError("dummy")
+
+    scope = {"type": "http", "method": "POST", "path": "/fail"}
+    errors = _requests("POST", "unmatched", "500")
+    with pytest.raises(RuntimeError):
+        asyncio.run(MetricsMiddleware(app)(scope, None, None))
+    assert in_flight == [1]
+    assert HTTP_REQUESTS_IN_FLIGHT.value == 0
+    assert _requests("POST", "unmatched", "500") == errors + 1
@@ -0,0 +1,56 @@
+import re
+import unittest.mock as mock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pictures2pages_v2.app.application import create_application
+from pictures2pages_v2.app.middlewares import ProfilerMiddleware, TracingMiddleware
+from pictures2pages_v2.app.utils.profiling import DeterministicProfiler
+
+
+def _test_client(tmp_path, **kwargs):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    app.add_middleware(ProfilerMiddleware, directory=str(tmp_path), **kwargs)
+    app.add_middleware(TracingMiddleware)
+    return TestClient(app)
+
+
+def test_profile_with_header(tmp_path):
+    test_client = _test_client(tmp_path, profiler_factory=DeterministicProfiler)
+    response = test_client.get(
+        "/items/1", headers={"X-Profile": "1", "X-Request-ID": "req/42"}
+    )
+    assert response.status_code == 200
+    name = response.headers["x-profile-file"]
+    assert name.endswith("-GET-items_item_id-req_42.prof")
+    assert [path.name for path in tmp_path.iterdir()] == [name]
+
+
+def test_not_profiled(tmp_path):
+    test_client = _test_client(tmp_path)
+    response = test_client.get("/items/1")
+    assert "x-profile-file" not in response.headers
+    assert not tmp_path.exists() or not any(tmp_path.iterdir())
+
+
+def test_profile_sampled(tmp_path):
+    test_client = _test_client(tmp_path / "profiles", sample_rate=0.5)
+    with mock.patch("random.random", return_value=0.2):
+        response = test_client.get("/not-found")
+    name = response.headers["x-profile-file"]
+    # without a request id, the profile is named after the trace
+    assert re.search(r"-GET-unmatched-[0-9a-f]{32}\.folded$", name)
+    assert (tmp_path / "profiles" / name).exists()
+    with mock.patch("random.random", return_value=0.7):
+        assert "x-profile-file" not in test_client.get("/items/1").headers
+
+
+def test_disabled_by_default():
+    app = create_application()
+    assert ProfilerMiddleware not in [
+        middleware.cls for middleware in app.user_middleware
+    ]
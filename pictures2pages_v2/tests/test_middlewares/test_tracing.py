@@ -0,0 +1,96 @@
+import asyncio
+import unittest.mock as mock
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pictures2pages_v2.app.api import base
+from pictures2pages_v2.app.middlewares import TracingMiddleware
+from pictures2pages_v2.app.utils.tracing import span
+
+
+def _app(**kwargs):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        with span("load"):
+            with span("query"):
+                pass
+        return {"id": item_id}
+
+    @app.get("/plain")
+    async def plain():
+        return {}
+
+    app.add_middleware(TracingMiddleware, **kwargs)
+    return app
+
+
+def test_server_timing():
+    exporter = mock.Mock()
+    test_client = TestClient(_app(exporter=exporter))
+
+    response = test_client.get("/items/1")
+    names = [
+        timing.split(";")[0] for timing in response.headers["server-timing"].split(", ")
+    ]
+    assert names == ["load", "load.query"]
+    assert "server-timing" not in test_client.get("/plain").headers
+
+    (trace,), _ = exporter.submit.call_args_list[0]
+    assert trace.root.name == "GET /items/{item_id}"
+    assert trace.root.attributes["http.route"] == "/items/{item_id}"
+    assert trace.root.attributes["http.response.status_code"] == 200
+    assert not trace.root.error
+
+
+def test_server_timing_disabled():
+    test_client = TestClient(_app(server_timing=False))
+    assert "server-timing" not in test_client.get("/items/1").headers
+
+
+def test_exception_traced_as_error():
+    exporter = mock.Mock()
+
+    async def app(scope, receive, send):
+        raise RuntimeError("dummy")
+
+    scope = {"type": "http", "method": "GET", "path": "/fail", "headers": []}
+    with pytest.raises(RuntimeError):
+        asyncio.run(TracingMiddleware(app, exporter=exporter)(scope, None, None))
+    (trace,), _ = exporter.submit.call_args
+    assert trace.root.error
+    assert trace.root.attributes["http.response.status_code"] == 500
+
+
+def test_generate_content_stages(
+    test_client, db_session, user, auth_headers, monkeypatch
+):
+    def generate(
+        caption_1, caption_2, caption_3, theme=None, content_type="story", timeout=None
+    ):
+        with span("completion"):
+            return {"title": "A title", content_type: "text"}
+
+    monkeypatch.setattr(base, "detect_labels", lambda *args: [("Dog", 99.0)])
+    monkeypatch.setattr(base, "generate_content_from_image_labels", generate)
+    response = test_client.post(
+        "/api/v1/generate-content",
+        data={
+            "image_url_1": "https://bucket.s3.amazonaws.com/u1.jpg",
+            "image_url_2": "https://bucket.s3.amazonaws.com/u2.jpg",
+            "image_url_3": "https://bucket.s3.amazonaws.com/u3.jpg",
+            "theme": "space",
+            "is_story": True,
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    timings = response.headers["server-timing"].split(", ")
+    names = [timing.split(";")[0] for timing in timings]
+    for caption in ("caption_1", "caption_2", "caption_3"):
+        assert caption in names
+        assert f"{caption}.detect_labels" in names
+        assert f"{caption}.extract_key" in names
+    assert "generate.completion" in names
+    assert names[-1] == "persist"
@@ -0,0 +1,57 @@
+import os
+import runpy
+from pathlib import Path
+
+from pictures2pages_v2.app import server
+from pictures2pages_v2.app.configs import Settings
+from pictures2pages_v2.app.db.session import engine
+
+SOURCE_DIR = Path(server.__file__).parents[1]
+
+
+def test_get_workers():
+    assert server.get_workers(Settings(WORKERS=3)) == 3
+    assert server.get_workers(Settings()) == len(os.sched_getaffinity(0))
+
+
+def test_gunicorn_conf(monkeypatch, tmp_path):
+    monkeypatch.syspath_prepend(str(SOURCE_DIR))
+    monkeypatch.setenv("METRICS_MULTIPROC_DIR", str(tmp_path))
+    (tmp_path / "1.json").write_text("{}")
+    config = runpy.run_path(str(SOURCE_DIR / "gunicorn_conf.py"))
+    options = server.gunicorn_options(Settings())
+    for name, value in options.items():
+        assert config[name] == value
+    assert config["bind"] == "0.0.0.0:8080"
+    assert config["worker_class"] == "uvicorn.workers.UvicornWorker"
+    assert config["preload_app"] is True
+    assert config["max_requests"] == 10000
+    # the snapshots of the previous run are removed
+    assert config["metrics_dir"] == str(tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_prepare_metrics_dir(monkeypatch):
+    monkeypatch.delenv("METRICS_MULTIPROC_DIR", raising=False)
+    settings = Settings()
+    assert server.prepare_metrics_dir(settings, workers=1) is None
+    directory = server.prepare_metrics_dir(settings, workers=2)
+    assert settings.METRICS_MULTIPROC_DIR == directory
+    assert os.environ["METRICS_MULTIPROC_DIR"] == directory
+    assert os.path.isdir(directory)
+    os.rmdir(directory)
+
+
+def test_uvicorn_options():
+    options = server.uvicorn_options(Settings(WORKERS=2, MAX_REQUESTS=0))
+    assert options["workers"] == 2
+    assert options["limit_max_requests"] is None
+    assert options["timeout_keep_alive"] == 5
+
+
+def test_reset_db_pools():
+    with engine.connect():
+        pass
+    assert engine.pool.checkedin() == 1
+    server.reset_db_pools()
+    assert engine.pool.checkedin() == 0
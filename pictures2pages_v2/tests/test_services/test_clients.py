@@ -0,0 +1,20 @@
+import pytest
+from pictures2pages_v2.app.services.clients import (
+    EXTERNAL_CALL_DURATION_SECONDS,
+    observe_call,
+)
+
+
+def _calls(outcome):
+    return EXTERNAL_CALL_DURATION_SECONDS.labels("dummy", "call", outcome).count
+
+
+def test_observe_call():
+    ok, error = _calls("ok"), _calls("error")
+    with observe_call("dummy", "call"):
+        pass
+    with pytest.raises(RuntimeError):
+        with observe_call("dummy", "call"):
+            raise RuntimeError("dummy")
+    assert _calls("ok") == ok + 1
+    assert _calls("error") == error + 1
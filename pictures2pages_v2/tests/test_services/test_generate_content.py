@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+import unittest.mock as mock
+from pictures2pages_v2.app.services import generate_content
+from pictures2pages_v2.app.utils import tracing
+
+
+def test_completion_token_usage(monkeypatch):
+    client = mock.Mock()
+    client.chat.completions.create.return_value = SimpleNamespace(
+        choices=[
+            SimpleNamespace(
+                message=SimpleNamespace(content="Title: The Dog\nOnce upon a time")
+            )
+        ],
+        usage=SimpleNamespace(prompt_tokens=60, completion_tokens=40),
+    )
+    monkeypatch.setattr(generate_content, "get_openai_client", lambda: client)
+
+    trace = tracing.Trace("POST")
+    token = tracing.current_trace.set(trace)
+    try:
+        result = generate_content.generate_content_from_image_labels(
+            ["Dog"], ["Cat"], ["Tree"]
+        )
+    finally:
+        tracing.current_trace.reset(token)
+    assert result == {"title": "The Dog", "story": "Once upon a time"}
+    prompt, completion, parse = trace.spans
+    assert [prompt.name, completion.name, parse.name] == [
+        "prompt",
+        "completion",
+        "parse",
+    ]
+    assert completion.attributes == {
+        "gen_ai.request.model": "gpt-3.5-turbo",
+        "gen_ai.usage.input_tokens": 60,
+        "gen_ai.usage.output_tokens": 40,
+    }
@@ -0,0 +1,87 @@
+import pytest
+from pictures2pages_v2.app.utils.cache import (
+    ENTRY_OVERHEAD,
+    LocalBackend,
+    LRUCache,
+    ResponseCache,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_cache_evicts_by_size():
+    # room for two entries of 10 bytes with one byte keys
+    cache = LRUCache(2 * (11 + ENTRY_OVERHEAD), ttl=10)
+    cache.set("a", b"x" * 10)
+    cache.set("b", b"x" * 10)
+    assert cache.get("a") == b"x" * 10
+    cache.set("c", b"x" * 10)
+    # b was the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert len(cache) == 2
+    assert cache.size == 2 * (11 + ENTRY_OVERHEAD)
+
+    cache.set("a", b"y")
+    assert cache.size == 2 + 11 + 2 * ENTRY_OVERHEAD
+    cache.set("big", b"x" * cache.max_bytes)
+    assert cache.get("big") is None
+    cache.clear()
+    assert len(cache) == 0 and cache.size == 0
+
+
+def test_lru_cache_expires():
+    clock = Clock()
+    cache = LRUCache(1000, ttl=10, clock=clock)
+    cache.set("a", b"1")
+    cache.set("b", b"2", ttl=20)
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.get("b") == b"2"
+    assert cache.size == 1 + 1 + ENTRY_OVERHEAD
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("shared", [False, True])
+async def test_response_cache_invalidate(shared):
+    backend = LocalBackend(1000, ttl=10) if shared else None
+    cache = ResponseCache(LRUCache(1000, ttl=10), backend)
+    key = await cache.key("public:1", "view_content?limit=10")
+    assert await cache.get(key) is None
+    await cache.set(key, b"page")
+    assert await cache.get(key) == b"page"
+    assert await cache.key("public:2", "view_content?limit=10") != key
+
+    await cache.invalidate("public:1")
+    new_key = await cache.key("public:1", "view_content?limit=10")
+    assert new_key != key
+    assert await cache.get(new_key) is None
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 2,
+        "hit_ratio": 1 / 3,
+        "entries": 1,
+        "bytes": len(key) + 4 + ENTRY_OVERHEAD,
+        "max_bytes": 1000,
+    }
+
+
+@pytest.mark.asyncio
+async def test_response_cache_shared_between_workers():
+    backend = LocalBackend(1000, ttl=10)
+    worker_1 = ResponseCache(LRUCache(1000, ttl=10), backend)
+    worker_2 = ResponseCache(LRUCache(1000, ttl=10), backend)
+    key = await worker_1.key("public:1", "view_content")
+    await worker_1.set(key, b"page")
+    assert await worker_2.get(key) == b"page"
+    assert len(worker_2.local) == 1
+
+    # the invalidation of a worker applies to the entries of all of them
+    await worker_1.invalidate("public:1")
+    assert await worker_2.key("public:1", "view_content") != key
@@ -1,7 +1,7 @@
 import pytest
 import unittest.mock as mock
 import click
-from fastapi import Request, Response
+from fastapi import Request
 from pictures2pages_v2.app.utils.logging import status_code_colors, get_request_msg_args
 
 
@@ -45,9 +45,8 @@ def test_get_request_msg_args(response_status_code, expected_status):
         scope=dict(http_version="1.1"),
         client=mock.MagicMock(host="0.0.0.0", port=80),
     )
-    response = mock.MagicMock(spec=Response, status_code=response_status_code)
     host, port, method_path, status, process_time = get_request_msg_args(
-        request, response, 0.32
+        request, response_status_code, 0.32
     )
     assert host == "0.0.0.0"
     assert port == 80
@@ -0,0 +1,84 @@
+import pytest
+from pictures2pages_v2.app.utils.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+    generate_latest,
+)
+
+
+def test_registry():
+    registry = Registry()
+    counter = Counter("dummy_total", "dummy counter", registry=registry)
+    assert registry.get("dummy_total") is counter
+    assert registry.collect() == [counter]
+    with pytest.raises(ValueError):
+        Counter("dummy_total", "dummy counter", registry=registry)
+
+
+def test_counter_and_gauge():
+    counter = Counter("dummy_total", "dummy counter", registry=None)
+    counter.inc()
+    counter.inc(2)
+    assert counter.value == 3
+    gauge = Gauge("dummy", "dummy gauge", registry=None)
+    gauge.inc(5)
+    gauge.dec(2)
+    assert gauge.value == 3
+    gauge.set(1)
+    assert gauge.value == 1
+
+
+def test_labels():
+    counter = Counter("dummy_total", "dummy", labelnames=("a",), registry=None)
+    counter.labels("x").inc()
+    counter.labels("x").inc()
+    counter.labels("y").inc()
+    assert [(k, m.value) for k, m in counter.samples()] == [(("x",), 2), (("y",), 1)]
+    with pytest.raises(ValueError):
+        counter.labels("x", "y")
+
+
+def test_histogram():
+    histogram = Histogram("dummy", "dummy", buckets=(1, 0.1), registry=None)
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.observe(value)
+    assert histogram.snapshot() == {
+        "buckets": [{"le": 0.1, "count": 2}, {"le": 1, "count": 3}],
+        "count": 4,
+        "sum": 2.65,
+    }
+
+
+def test_generate_latest():
+    registry = Registry()
+    counter = Counter(
+        "dummy_total", "dummy counter", labelnames=("path",), registry=registry
+    )
+    counter.labels('/a"b').inc(2)
+    Gauge("dummy_gauge", "dummy gauge", registry=registry).set(1.5)
+    histogram = Histogram(
+        "dummy_seconds",
+        "dummy histogram",
+        labelnames=("pool",),
+        buckets=(0.1, 1),
+        registry=registry,
+    )
+    for value in (0.05, 0.5, 2):
+        histogram.labels("sync").observe(value)
+    assert generate_latest(registry) == (
+        "# HELP dummy_total dummy counter\n"
+        "# TYPE dummy_total counter\n"
+        'dummy_total{path="/a\\"b"} 2.0\n'
+        "# HELP dummy_gauge dummy gauge\n"
+        "# TYPE dummy_gauge gauge\n"
+        "dummy_gauge 1.5\n"
+        "# HELP dummy_seconds dummy histogram\n"
+        "# TYPE dummy_seconds histogram\n"
+        'dummy_seconds_bucket{pool="sync",le="0.1"} 1\n'
+        'dummy_seconds_bucket{pool="sync",le="1.0"} 2\n'
+        'dummy_seconds_bucket{pool="sync",le="+Inf"} 3\n'
+        'dummy_seconds_sum{pool="sync"} 2.55\n'
+        'dummy_seconds_count{pool="sync"} 3\n'
+    )
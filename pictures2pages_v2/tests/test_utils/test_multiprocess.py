@@ -0,0 +1,78 @@
+import json
+import os
+
+from pictures2pages_v2.app.utils import multiprocess
+from pictures2pages_v2.app.utils.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+    generate_latest,
+)
+
+
+def _registry(requests: int, cache_bytes: float, duration: float) -> Registry:
+    registry = Registry()
+    Counter(
+        "dummy_total", "dummy counter", labelnames=("path",), registry=registry
+    ).labels("/a").inc(requests)
+    Gauge("dummy_bytes", "dummy gauge", registry=registry).set(cache_bytes)
+    Histogram(
+        "dummy_seconds", "dummy histogram", buckets=(0.1, 1), registry=registry
+    ).observe(duration)
+    return registry
+
+
+def test_merge():
+    registry = multiprocess.merge(
+        [
+            ("1", multiprocess.snapshot(_registry(2, 10, 0.05))),
+            ("2", multiprocess.snapshot(_registry(3, 20, 0.5))),
+        ]
+    )
+    assert generate_latest(registry) == (
+        "# HELP dummy_total dummy counter\n"
+        "# TYPE dummy_total counter\n"
+        'dummy_total{path="/a"} 5.0\n'
+        "# HELP dummy_bytes dummy gauge\n"
+        "# TYPE dummy_bytes gauge\n"
+        'dummy_bytes{pid="1"} 10.0\n'
+        'dummy_bytes{pid="2"} 20.0\n'
+        "# HELP dummy_seconds dummy histogram\n"
+        "# TYPE dummy_seconds histogram\n"
+        'dummy_seconds_bucket{le="0.1"} 1\n'
+        'dummy_seconds_bucket{le="1.0"} 2\n'
+        'dummy_seconds_bucket{le="+Inf"} 2\n'
+        "dummy_seconds_sum 0.55\n"
+        "dummy_seconds_count 2\n"
+    )
+
+
+def test_collect_and_mark_process_dead(tmp_path):
+    directory = str(tmp_path)
+    multiprocess.write_snapshot(directory, _registry(2, 10, 0.05), pid=1)
+    multiprocess.write_snapshot(directory, _registry(3, 20, 0.5), pid=2)
+    assert sorted(os.listdir(directory)) == ["1.json", "2.json"]
+
+    multiprocess.mark_process_dead(directory, 1)
+    multiprocess.mark_process_dead(directory, 3)
+    assert sorted(os.listdir(directory)) == ["2.json", "archive.json"]
+    text = generate_latest(multiprocess.collect(directory))
+    # the counters of the exited worker are kept, not its gauges
+    assert 'dummy_total{path="/a"} 5.0' in text
+    assert 'dummy_bytes{pid="1"}' not in text
+    assert 'dummy_bytes{pid="2"} 20.0' in text
+    assert "dummy_seconds_count 2" in text
+
+    multiprocess.clear(directory)
+    assert os.listdir(directory) == []
+
+
+def test_metrics_writer(tmp_path):
+    writer = multiprocess.MetricsWriter(str(tmp_path), interval=60)
+    writer.start()
+    path = tmp_path / f"{os.getpid()}.json"
+    assert "http_requests_total" in json.loads(path.read_text())
+    path.unlink()
+    writer.stop()
+    assert path.exists()
@@ -0,0 +1,57 @@
+import pstats
+import threading
+import time
+from pictures2pages_v2.app.utils import profiling
+
+
+def busy(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+
+def test_sampling_profiler(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=busy, args=(stop,), name="busy-worker")
+    worker.start()
+    profiler = profiling.SamplingProfiler(interval=0.001)
+    try:
+        assert profiler.start()
+        time.sleep(0.1)
+        profiler.stop()
+    finally:
+        stop.set()
+        worker.join()
+
+    path = tmp_path / "profile.folded"
+    profiler.write(str(path))
+    lines = path.read_text().splitlines()
+    stacks = dict(line.rsplit(" ", 1) for line in lines)
+    busy_stacks = [stack for stack in stacks if stack.startswith("busy-worker;")]
+    assert busy_stacks
+    assert any("busy (test_profiling.py:" in stack for stack in busy_stacks)
+    assert all(int(samples) > 0 for samples in stacks.values())
+    # the sampler does not sample itself
+    assert not any(stack.startswith("request-profiler;") for stack in stacks)
+
+
+def test_deterministic_profiler(tmp_path):
+    profiler = profiling.DeterministicProfiler()
+    assert profiler.start()
+    # one request is profiled at a time
+    assert not profiling.DeterministicProfiler().start()
+    sum(range(100))
+    profiler.stop()
+    assert profiling.DeterministicProfiler().start()
+    profiling._deterministic_lock.release()
+
+    path = tmp_path / "profile.prof"
+    profiler.write(str(path))
+    assert pstats.Stats(str(path)).total_calls > 0
+
+
+def test_get_profiler_factory():
+    profiler = profiling.get_profiler_factory("sampling", 0.005)()
+    assert isinstance(profiler, profiling.SamplingProfiler)
+    assert profiler.interval == 0.005
+    profiler = profiling.get_profiler_factory("deterministic", 0.005)()
+    assert isinstance(profiler, profiling.DeterministicProfiler)
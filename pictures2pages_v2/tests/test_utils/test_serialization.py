@@ -0,0 +1,67 @@
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+from pictures2pages_v2.app.schemas.base import ImagePage
+from pictures2pages_v2.app.utils import serialization
+
+CONTENT = {
+    "items": [
+        {"id": 1, "title": "é", "created_at": datetime(2026, 10, 19, 12, 0, 1, 5)}
+    ],
+    "next_cursor": None,
+}
+
+
+@pytest.mark.parametrize("orjson", [serialization.orjson, None])
+def test_dumps(monkeypatch, orjson):
+    monkeypatch.setattr(serialization, "orjson", orjson)
+    expected = (
+        '{"items":[{"id":1,"title":"é","created_at":"2026-10-19T12:00:01.000005"}],'
+        '"next_cursor":null}'
+    )
+    assert serialization.dumps(CONTENT) == expected.encode()
+
+
+def test_page_response(monkeypatch):
+    row = SimpleNamespace(
+        id=1,
+        url="u1",
+        description=None,
+        is_public=True,
+        created_at=datetime(2026, 10, 19),
+        owner_id=2,
+        hidden="not listed",
+    )
+    assert isinstance(serialization.page_response(ImagePage, [row], None), ImagePage)
+
+    monkeypatch.setattr(serialization.settings, "FAST_JSON", True)
+    response = serialization.page_response(ImagePage, [row], "next")
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == json.loads(
+        ImagePage(items=[row], next_cursor="next").json()
+    )
+
+
+@pytest.mark.parametrize("fast_json", [False, True])
+def test_page_response_rejects_null(monkeypatch, fast_json):
+    monkeypatch.setattr(serialization.settings, "FAST_JSON", fast_json)
+    row = SimpleNamespace(
+        id=1,
+        url=None,
+        description=None,
+        is_public=True,
+        created_at=datetime(2026, 10, 19),
+        owner_id=2,
+    )
+    with pytest.raises(ValidationError):
+        serialization.page_response(ImagePage, [row], None)
+    assert serialization.required_item_fields(ImagePage) == (
+        "url",
+        "is_public",
+        "id",
+        "created_at",
+        "owner_id",
+    )
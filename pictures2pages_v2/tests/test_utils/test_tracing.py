@@ -0,0 +1,113 @@
+import json
+import threading
+import pytest
+from fastapi.concurrency import run_in_threadpool
+from pictures2pages_v2.app.utils import tracing
+
+TRACEPARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+@pytest.fixture
+def trace():
+    trace = tracing.Trace("GET")
+    token = tracing.current_trace.set(trace)
+    yield trace
+    tracing.current_trace.reset(token)
+
+
+def test_span_outside_trace():
+    with tracing.span("stage") as span:
+        tracing.set_span_attribute("key", "value")
+    assert span is None
+
+
+def test_spans(trace):
+    with tracing.span("caption_1"):
+        with tracing.span("detect_labels"):
+            tracing.set_span_attribute("labels", 3)
+    with pytest.raises(RuntimeError):
+        with tracing.span("persist"):
+            raise RuntimeError("dummy")
+
+    caption, detect, persist = trace.spans
+    assert [span.path for span in trace.spans] == [
+        "caption_1",
+        "caption_1.detect_labels",
+        "persist",
+    ]
+    assert caption.parent_id == trace.root.span_id
+    assert detect.parent_id == caption.span_id
+    assert detect.attributes == {"labels": 3}
+    assert persist.error and not caption.error
+    timings = trace.server_timing().split(", ")
+    assert [timing.split(";")[0] for timing in timings] == [
+        "caption_1",
+        "caption_1.detect_labels",
+        "persist",
+    ]
+    assert all(";dur=" in timing for timing in timings)
+
+
+@pytest.mark.asyncio
+async def test_span_in_threadpool(trace):
+    def stage():
+        with tracing.span("completion"):
+            pass
+
+    with tracing.span("generate"):
+        await run_in_threadpool(stage)
+    assert [span.path for span in trace.spans] == ["generate", "generate.completion"]
+
+
+def test_traceparent():
+    trace = tracing.Trace("GET", TRACEPARENT)
+    assert trace.trace_id == "0af7651916cd43dd8448eb211c80319c"
+    assert trace.root.parent_id == "b7ad6b7169203331"
+    for invalid in (None, "garbage", "00-" + "0" * 32 + "-b7ad6b7169203331-01"):
+        trace = tracing.Trace("GET", invalid)
+        assert len(trace.trace_id) == 32 and trace.trace_id != "0" * 32
+        assert trace.root.parent_id is None
+
+
+def test_to_otlp(trace):
+    with tracing.span("completion") as span:
+        span.set_attribute("gen_ai.usage.input_tokens", 42)
+    trace.root.end = span.end
+    payload = trace.to_otlp("dummy")
+    (resource,) = payload["resourceSpans"]
+    assert resource["resource"]["attributes"] == [
+        {"key": "service.name", "value": {"stringValue": "dummy"}}
+    ]
+    root, completion = resource["scopeSpans"][0]["spans"]
+    assert root["kind"] == tracing.SPAN_KIND_SERVER and "parentSpanId" not in root
+    assert completion["parentSpanId"] == root["spanId"]
+    assert completion["traceId"] == root["traceId"] == trace.trace_id
+    assert completion["attributes"] == [
+        {"key": "gen_ai.usage.input_tokens", "value": {"intValue": "42"}}
+    ]
+    assert int(root["startTimeUnixNano"]) <= int(completion["startTimeUnixNano"])
+    assert int(completion["endTimeUnixNano"]) <= int(root["endTimeUnixNano"])
+
+
+def test_batch_exporter(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = tracing.BatchExporter(
+        [tracing.FileExporter(str(path))], service_name="dummy", interval=0.01
+    )
+    for _ in range(3):
+        trace = tracing.Trace("GET")
+        trace.root.end = trace.root.start
+        exporter.submit(trace)
+    exporter.shutdown()
+    payloads = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(payloads) == 3
+
+
+def test_batch_exporter_full():
+    exporter = tracing.BatchExporter([], service_name="dummy", max_queue_size=1)
+    # the thread is not running, the queue fills up
+    exporter._thread = threading.Thread(target=lambda: None)
+    dropped = tracing.TRACES_DROPPED.value
+    exporter.submit(tracing.Trace("GET"))
+    exporter.submit(tracing.Trace("GET"))
+    assert tracing.TRACES_DROPPED.value == dropped + 1